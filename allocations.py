@@ -0,0 +1,110 @@
+"""Payment allocation engine.
+
+Confirmed payments are applied to the customer's open utang in confirmation
+order, and each (payment, utang, amount) split is recorded in
+payment_allocations. Every transaction carries its unallocated remaining_cents
+and a settlement_status ('open', 'partial', 'settled'), updated when a
+transaction is confirmed, so settling a payment only touches the utang it
+actually pays off. Because both sides queue in confirmation order, replaying a
+customer's history from scratch gives the same allocations as doing it at
+each confirm.
+
+All functions take a cursor and run inside the caller's database transaction.
+"""
+from ids import new_ulid
+
+OPEN = "open"
+PARTIAL = "partial"
+SETTLED = "settled"
+
+# A customer's open items of one type, in confirmation order
+OPEN_ITEMS_SQL = '''
+    SELECT id, description, amount_cents, remaining_cents, owner,
+           COALESCE(NULLIF(confirmed_at, ''), created_at, date) AS confirmed_at
+    FROM transactions
+    WHERE customer = ? AND type = ? AND confirmed = 1 AND remaining_cents > 0
+    ORDER BY confirmed_at, id
+'''
+
+def settlement_status(amount_cents, remaining_cents):
+    """Settlement status of a transaction from its amount and unallocated remainder"""
+    if remaining_cents <= 0:
+        return SETTLED
+    if remaining_cents < amount_cents:
+        return PARTIAL
+    return OPEN
+
+def allocate_customer_payments(cursor, customer):
+    """Apply a customer's unallocated payment credit to their earliest open utang.
+
+    Returns the descriptions of the utang that became fully paid.
+    """
+    payments = [list(row) for row in cursor.execute(OPEN_ITEMS_SQL, (customer, "payment")).fetchall()]
+    if not payments:
+        return []
+
+    allocations = []
+    updates = []
+    settled = []
+    payment_index = 0
+
+    # Read utang lazily: only the ones the available credit reaches are fetched
+    utang_cursor = cursor.connection.execute(OPEN_ITEMS_SQL, (customer, "utang"))
+    for utang_id, description, amount_cents, remaining_cents, owner, utang_confirmed_at in utang_cursor:
+        allocated_at = utang_confirmed_at
+        while remaining_cents > 0 and payment_index < len(payments):
+            payment = payments[payment_index]
+            applied = min(remaining_cents, payment[3])
+            # An allocation happens once both sides are confirmed
+            allocated_at = max(utang_confirmed_at, payment[5])
+            allocations.append((new_ulid(), payment[0], utang_id, customer, owner, applied, allocated_at))
+
+            remaining_cents -= applied
+            payment[3] -= applied
+            if payment[3] == 0:
+                payment_index += 1
+
+        status = settlement_status(amount_cents, remaining_cents)
+        updates.append((remaining_cents, status, allocated_at if status == SETTLED else None, utang_id))
+        if status == SETTLED:
+            settled.append(description)
+
+        if payment_index == len(payments):
+            break
+    utang_cursor.close()
+
+    if not allocations:
+        return []
+
+    # Payments that gave credit: fully used ones plus the one partially used, if any
+    for payment in payments[:payment_index + 1]:
+        status = settlement_status(payment[2], payment[3])
+        updates.append((payment[3], status, payment[5] if status == SETTLED else None, payment[0]))
+
+    cursor.executemany('''
+        INSERT INTO payment_allocations (id, payment_id, utang_id, customer, owner, amount_cents, allocated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', allocations)
+    cursor.executemany('''
+        UPDATE transactions SET remaining_cents = ?, settlement_status = ?, settled_at = ?
+        WHERE id = ?
+    ''', updates)
+    return settled
+
+def rebuild_customer_allocations(cursor, customer):
+    """Discard a customer's allocations and re-apply all of their payments from scratch (after deletes)"""
+    cursor.execute('DELETE FROM payment_allocations WHERE customer = ?', (customer,))
+    cursor.execute('''
+        UPDATE transactions SET remaining_cents = amount_cents, settlement_status = ?, settled_at = NULL
+        WHERE customer = ?
+    ''', (OPEN, customer))
+    return allocate_customer_payments(cursor, customer)
+
+def has_open_utang(cursor, customer):
+    """Check whether a customer still has confirmed utang with an unpaid remainder"""
+    cursor.execute('''
+        SELECT 1 FROM transactions
+        WHERE customer = ? AND type = 'utang' AND confirmed = 1 AND remaining_cents > 0
+        LIMIT 1
+    ''', (customer,))
+    return cursor.fetchone() is not None
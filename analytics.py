@@ -0,0 +1,164 @@
+"""Vectorized owner analytics for the Reports page.
+
+The owner's confirmed transactions are loaded once into NumPy column arrays
+(cached until the owner's data changes) and every figure is computed with
+array operations instead of loops over transaction dicts.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from database import get_read_connection, get_database_path
+from dates import today_day_number
+from metrics import counter
+from services import AGING_BUCKETS
+
+# (database path, owner) -> (data version, loaded arrays), least recently used first
+CACHE_SIZE = int(os.getenv('IUMS_ANALYTICS_CACHE_SIZE', '32'))
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+CACHE_REQUESTS = counter("iums_cache_requests_total", "Cache lookups by cache and result (hit or miss)", ["cache", "result"])
+
+def _data_version(cursor, owner_username):
+    """The owner's change counter (bumped by triggers on every write to their transactions)"""
+    cursor.execute('SELECT version FROM owner_data_versions WHERE owner = ?', (owner_username,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def load_transaction_arrays(owner_username):
+    """Load an owner's confirmed transactions as NumPy column arrays (cached per data version)"""
+    conn = get_read_connection()
+    if not conn:
+        return None
+
+    cursor = conn.cursor()
+    try:
+        key = (get_database_path(), owner_username)
+        version = _data_version(cursor, owner_username)
+        with _cache_lock:
+            cached = _cache.get(key)
+            if cached:
+                _cache.move_to_end(key)
+        if cached and cached[0] == version:
+            conn.close()
+            CACHE_REQUESTS.inc(cache="analytics", result="hit")
+            return cached[1]
+        CACHE_REQUESTS.inc(cache="analytics", result="miss")
+
+        # remaining_cents is the unpaid part kept by the payment allocations
+        cursor.execute('''
+            SELECT customer, type = 'utang', amount_cents, COALESCE(interest_cents, 0),
+                   COALESCE(date_day, 0), due_day, COALESCE(remaining_cents, 0)
+            FROM transactions
+            WHERE owner = ? AND confirmed = 1
+        ''', (owner_username,))
+        rows = cursor.fetchall()
+        conn.close()
+
+        customers = [row[0] for row in rows]
+        columns = list(zip(*(tuple(row)[1:] for row in rows))) or [(), (), (), (), (), ()]
+        customer_names, customer_codes = np.unique(np.array(customers, dtype=object), return_inverse=True) if customers else (np.array([], dtype=object), np.array([], dtype=np.int64))
+
+        arrays = {
+            "customer_names": customer_names,
+            "customer": customer_codes.astype(np.int64),
+            "is_utang": np.array(columns[0], dtype=bool),
+            "amount_cents": np.array(columns[1], dtype=np.int64),
+            "interest_cents": np.array(columns[2], dtype=np.int64),
+            "date_day": np.array(columns[3], dtype=np.int64),
+            # NaN where the transaction has no due date
+            "due_day": np.array(columns[4], dtype=np.float64),
+            "remaining_cents": np.array(columns[5], dtype=np.int64)
+        }
+        with _cache_lock:
+            _cache[key] = (version, arrays)
+            _cache.move_to_end(key)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+        return arrays
+    except Exception as e:
+        conn.close()
+        print(f"Error loading analytics data for {owner_username}: {e}")
+        return None
+
+def customer_balances(arrays):
+    """Per-customer issued, paid and outstanding cents via bincount"""
+    customer_count = len(arrays["customer_names"])
+    utang = np.where(arrays["is_utang"], arrays["amount_cents"], 0)
+    payments = np.where(arrays["is_utang"], 0, arrays["amount_cents"])
+
+    issued = np.bincount(arrays["customer"], weights=utang, minlength=customer_count).astype(np.int64)
+    paid = np.bincount(arrays["customer"], weights=payments, minlength=customer_count).astype(np.int64)
+    return {
+        "customers": arrays["customer_names"],
+        "issued_cents": issued,
+        "paid_cents": paid,
+        "outstanding_cents": issued - paid
+    }
+
+def aging_buckets(arrays, today=None):
+    """Unpaid utang cents and counts per services.AGING_BUCKETS bucket of days past due"""
+    today = today_day_number() if today is None else today
+    remaining = np.where(arrays["is_utang"], arrays["remaining_cents"], 0)
+    open_utang = remaining > 0
+    days_past_due = today - arrays["due_day"]
+    has_due_date = ~np.isnan(days_past_due)
+
+    buckets = []
+    for _, label, low, high in AGING_BUCKETS:
+        if low is None:
+            mask = open_utang & ~(has_due_date & (days_past_due > high))
+        else:
+            mask = open_utang & has_due_date & (days_past_due >= low)
+            if high is not None:
+                mask &= days_past_due <= high
+        buckets.append({"bucket": label, "count": int(mask.sum()), "outstanding_cents": int(remaining[mask].sum())})
+    return buckets
+
+def monthly_series(arrays):
+    """Monthly issuance (utang), collection (payments) and interest cents, oldest month first"""
+    if len(arrays["date_day"]) == 0:
+        return {"months": [], "issued_cents": np.array([], dtype=np.int64), "collected_cents": np.array([], dtype=np.int64), "interest_cents": np.array([], dtype=np.int64)}
+
+    months = arrays["date_day"].astype("datetime64[D]").astype("datetime64[M]")
+    month_values, month_codes = np.unique(months, return_inverse=True)
+    utang = np.where(arrays["is_utang"], arrays["amount_cents"], 0)
+    payments = np.where(arrays["is_utang"], 0, arrays["amount_cents"])
+    interest = np.where(arrays["is_utang"], arrays["interest_cents"], 0)
+    month_count = len(month_values)
+
+    return {
+        "months": [str(month) for month in month_values],
+        "issued_cents": np.bincount(month_codes, weights=utang, minlength=month_count).astype(np.int64),
+        "collected_cents": np.bincount(month_codes, weights=payments, minlength=month_count).astype(np.int64),
+        "interest_cents": np.bincount(month_codes, weights=interest, minlength=month_count).astype(np.int64)
+    }
+
+def collection_rates(series):
+    """Monthly and cumulative collection rate (collected / issued), in percent"""
+    issued = series["issued_cents"].astype(np.float64)
+    collected = series["collected_cents"].astype(np.float64)
+    cumulative_issued = np.cumsum(issued)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        monthly = np.where(issued > 0, collected / issued * 100, np.nan)
+        cumulative = np.where(cumulative_issued > 0, np.cumsum(collected) / cumulative_issued * 100, np.nan)
+    overall = float(collected.sum() / issued.sum() * 100) if issued.sum() > 0 else 0.0
+    return {"monthly": monthly, "cumulative": cumulative, "overall": overall}
+
+def get_owner_analytics(owner_username):
+    """Compute every Reports analytic for an owner from one array load"""
+    arrays = load_transaction_arrays(owner_username)
+    if arrays is None:
+        return None
+
+    series = monthly_series(arrays)
+    return {
+        "transaction_count": len(arrays["amount_cents"]),
+        "balances": customer_balances(arrays),
+        "aging": aging_buckets(arrays),
+        "monthly": series,
+        "collection": collection_rates(series)
+    }
@@ -0,0 +1,367 @@
+"""Headless HTTP/JSON API over the accounting core (services.py).
+
+Runs as its own process, next to or instead of the Streamlit app, for POS
+terminals and other integrations and for load testing. Requests are served by
+a fixed pool of worker threads; --processes pre-forks that many copies of the
+server on one listening socket (Unix only) so requests also spread over CPUs.
+
+Every request except /health authenticates with HTTP Basic auth using an IUMS
+account. Owners act on the customers they created; customers only see and
+confirm their own utang and payments.
+
+    GET  /health
+    GET  /accounts/<username>
+    GET  /customers                              (owner) usernames of my customers
+    GET  /customers/<username>/balance
+    GET  /customers/<username>/transactions
+    GET  /due-dates?days=7                       upcoming and overdue unpaid utang
+    GET  /overdue
+    GET  /transactions/<id>
+    POST /transactions                           (owner) {"customer", "type": "utang"|"payment",
+                                                  "amount", "description", "interest_rate", "due_date"}
+    POST /transactions/<id>/confirm              {"otp"}; 429 after services.MAX_OTP_ATTEMPTS invalid OTPs
+
+New transactions wait for OTP confirmation exactly as in the app: the OTP
+goes to the customer (alert and email), never into the API response.
+
+    python api_server.py --port 8600 --workers 8 --processes 4 [--no-email]
+
+Request counts and latencies are exported with the other metrics (see
+metrics.py) when running a single process.
+"""
+import base64
+import json
+import os
+import re
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, unquote
+
+import services
+from database import activate_shard_for_user, upgrade_schema
+from metrics import counter, histogram, start_exporters_from_env
+
+API_REQUESTS = counter("iums_api_requests_total", "API requests by route and status", ["route", "status"])
+API_REQUEST_SECONDS = histogram("iums_api_request_seconds", "API request handling time in seconds", ["route"])
+
+MAX_BODY_BYTES = 64 * 1024
+TRANSACTION_TYPES = ("utang", "payment")
+
+# confirm_transaction_with_otp failures answered with something other than 400
+CONFIRM_ERROR_STATUS = {
+    "Transaction already confirmed": 409,
+    services.OTP_ATTEMPTS_EXCEEDED: 429
+}
+
+class ApiError(Exception):
+    """Error answered with an HTTP status and a JSON {"error": message} body"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+# Access rules
+def can_access(actor, account):
+    """Whether actor may see account: itself, or a customer the actor (an owner) created"""
+    if actor["username"] == account["username"]:
+        return True
+    return actor["role"] == "Owner" and services.get_account_owner(account) == actor["username"]
+
+def require_owner(actor):
+    if actor["role"] != "Owner":
+        raise ApiError(403, "Only owners can do this")
+
+def get_accessible_account(actor, username):
+    """The account for username, or 404 when it does not exist or belongs to another owner"""
+    account = services.get_account(username)
+    if not account or not can_access(actor, account):
+        raise ApiError(404, "Account not found")
+    return account
+
+def get_accessible_transaction(actor, transaction_id):
+    transaction = services.get_transaction(transaction_id)
+    if not transaction:
+        raise ApiError(404, "Transaction not found")
+    if actor["username"] not in (transaction["customer"], transaction["owner"]):
+        raise ApiError(404, "Transaction not found")
+    return transaction
+
+def public_account(account):
+    """Account without its password"""
+    return {key: value for key, value in account.items() if key != "password"}
+
+def public_transaction(transaction):
+    """Transaction without its OTP"""
+    return {key: value for key, value in transaction.items() if key != "otp"}
+
+def days_param(query, default=7):
+    try:
+        return int(query.get("days", [default])[0])
+    except ValueError:
+        raise ApiError(400, "days must be an integer")
+
+# Handlers: (actor, path match, query, body) -> (status, payload)
+def handle_health(actor, match, query, body):
+    return 200, {"status": "ok"}
+
+def handle_get_account(actor, match, query, body):
+    return 200, {"account": public_account(get_accessible_account(actor, match["username"]))}
+
+def handle_list_customers(actor, match, query, body):
+    require_owner(actor)
+    return 200, {"customers": services.get_my_customer_list(actor["username"])}
+
+def handle_get_balance(actor, match, query, body):
+    account = get_accessible_account(actor, match["username"])
+    return 200, {"customer": account["username"], "balance": services.calculate_balance(account["username"])}
+
+def handle_get_customer_transactions(actor, match, query, body):
+    account = get_accessible_account(actor, match["username"])
+    transactions = services.get_customer_transactions(account["username"])
+    return 200, {"customer": account["username"], "transactions": [public_transaction(t) for t in transactions]}
+
+def handle_get_due_dates(actor, match, query, body):
+    days = days_param(query)
+    if actor["role"] == "Owner":
+        due_dates = services.get_my_upcoming_due_dates(actor["username"], days)
+    else:
+        due_dates = services.get_upcoming_due_dates_for_customer(actor["username"], days)
+    return 200, {"days": days, "due_dates": due_dates}
+
+def handle_get_overdue(actor, match, query, body):
+    if actor["role"] == "Owner":
+        overdue = services.get_my_overdue_transactions(actor["username"])
+    else:
+        overdue = services.get_overdue_transactions_for_customer(actor["username"])
+    return 200, {"overdue": overdue}
+
+def handle_get_transaction(actor, match, query, body):
+    return 200, {"transaction": public_transaction(get_accessible_transaction(actor, match["transaction_id"]))}
+
+def handle_create_transaction(actor, match, query, body):
+    require_owner(actor)
+    transaction_type = body.get("type")
+    if transaction_type not in TRANSACTION_TYPES:
+        raise ApiError(400, f"type must be one of {', '.join(TRANSACTION_TYPES)}")
+    customer = get_accessible_account(actor, body.get("customer") or "")
+    if customer["role"] != "Customer":
+        raise ApiError(400, "Transactions can only be recorded for customers")
+
+    try:
+        interest_rate = float(body.get("interest_rate") or 0)
+    except (ValueError, TypeError):
+        raise ApiError(400, "interest_rate must be a number")
+
+    transaction, message = services.create_pending_transaction_with_due_date(
+        customer["username"], transaction_type, body.get("description") or "", body.get("amount"),
+        created_by=actor["username"], interest_rate=interest_rate if transaction_type == "utang" else 0,
+        due_date=body.get("due_date") if transaction_type == "utang" else None
+    )
+    if not transaction:
+        raise ApiError(400, message)
+    return 201, {"transaction": public_transaction(transaction), "message": message}
+
+def handle_confirm_transaction(actor, match, query, body):
+    transaction = get_accessible_transaction(actor, match["transaction_id"])
+    otp = body.get("otp")
+    if not otp:
+        raise ApiError(400, "otp is required")
+
+    success, message = services.confirm_transaction_with_otp(transaction["id"], str(otp))
+    if not success:
+        raise ApiError(CONFIRM_ERROR_STATUS.get(message, 400), message)
+    return 200, {"confirmed": True, "message": message}
+
+# (method, route name, path pattern, handler, authenticated)
+ROUTES = [
+    ("GET", "health", r"/health", handle_health, False),
+    ("GET", "account", r"/accounts/(?P<username>[^/]+)", handle_get_account, True),
+    ("GET", "customers", r"/customers", handle_list_customers, True),
+    ("GET", "balance", r"/customers/(?P<username>[^/]+)/balance", handle_get_balance, True),
+    ("GET", "customer_transactions", r"/customers/(?P<username>[^/]+)/transactions", handle_get_customer_transactions, True),
+    ("GET", "due_dates", r"/due-dates", handle_get_due_dates, True),
+    ("GET", "overdue", r"/overdue", handle_get_overdue, True),
+    ("GET", "transaction", r"/transactions/(?P<transaction_id>[^/]+)", handle_get_transaction, True),
+    ("POST", "create_transaction", r"/transactions", handle_create_transaction, True),
+    ("POST", "confirm_transaction", r"/transactions/(?P<transaction_id>[^/]+)/confirm", handle_confirm_transaction, True),
+]
+ROUTES = [(method, name, re.compile(pattern), handler, authenticated) for method, name, pattern, handler, authenticated in ROUTES]
+
+def authenticate(authorization):
+    """The account named by a Basic Authorization header if its password matches, else None"""
+    if not authorization or not authorization.startswith("Basic "):
+        return None
+    try:
+        username, _, password = base64.b64decode(authorization[6:]).decode("utf-8").partition(":")
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+    # Route to the user's shard first (no-op without IUMS_SHARD_DIR)
+    activate_shard_for_user(username)
+    account = services.get_account(username)
+    if not account or account["password"] != password:
+        return None
+    return account
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    server_version = "IUMS-API/1.0"
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method):
+        started = time.perf_counter()
+        path, _, query_string = self.path.partition("?")
+        route_name = "unknown"
+
+        try:
+            route = self.match_route(method, path)
+            route_name, match, handler, authenticated = route
+            body = self.read_json_body() if method == "POST" else {}
+
+            actor = None
+            if authenticated:
+                actor = authenticate(self.headers.get("Authorization"))
+                if not actor:
+                    raise ApiError(401, "Invalid username or password")
+
+            status, payload = handler(actor, match, parse_qs(query_string), body)
+        except ApiError as e:
+            status, payload = e.status, {"error": e.message}
+        except Exception as e:
+            print(f"❌ API error on {method} {path}: {e}")
+            status, payload = 500, {"error": "Internal server error"}
+
+        self.send_json(status, payload)
+        API_REQUESTS.inc(route=route_name, status=str(status))
+        API_REQUEST_SECONDS.observe(time.perf_counter() - started, route=route_name)
+
+    def match_route(self, method, path):
+        path = path.rstrip("/") or "/"
+        path_matched = False
+        for route_method, name, pattern, handler, authenticated in ROUTES:
+            match = pattern.fullmatch(path)
+            if not match:
+                continue
+            path_matched = True
+            if route_method == method:
+                return name, {key: unquote(value) for key, value in match.groupdict().items()}, handler, authenticated
+        raise ApiError(405 if path_matched else 404, "Method not allowed" if path_matched else "Not found")
+
+    def read_json_body(self):
+        content_length = (self.headers.get("Content-Length") or "0").strip()
+        if not re.fullmatch(r"[0-9]+", content_length):
+            raise ApiError(400, "Content-Length must be a non-negative integer")
+        length = int(content_length)
+        if length > MAX_BODY_BYTES:
+            raise ApiError(413, "Request body too large")
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            raise ApiError(400, "Request body must be JSON")
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+        return body
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        if status == 401:
+            self.send_header("WWW-Authenticate", 'Basic realm="IUMS"')
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # One line per request would flood the console under load; see the request metrics instead
+        pass
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer handing each connection to a fixed pool of worker threads"""
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, workers):
+        super().__init__(server_address, handler_class)
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="iums-api")
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process_request_in_worker, request, client_address)
+
+    def _process_request_in_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False)
+
+def serve(host="127.0.0.1", port=8600, workers=8, processes=1):
+    """Serve the API until interrupted, pre-forking processes copies of the server on one socket"""
+    # Bring the database up to the current schema once, as the app does at startup (shards upgrade on first use)
+    upgrade_schema()
+    server = PooledHTTPServer((host, port), ApiRequestHandler, workers)
+    print(f"🌐 IUMS API on http://{host}:{server.server_address[1]} ({processes} process(es) × {workers} workers)")
+
+    children = []
+    is_child = False
+    if processes > 1 and hasattr(os, "fork"):
+        for _ in range(processes - 1):
+            pid = os.fork()
+            if pid == 0:
+                is_child = True
+                break
+            children.append(pid)
+    elif processes > 1:
+        print("⚠️ Pre-forking needs os.fork; serving from a single process")
+
+    if children:
+        # Let a SIGTERM to the parent run the cleanup below instead of orphaning the children
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    # Every process has its own registry, so metrics are only exported when there is one
+    if not is_child and not children:
+        start_exporters_from_env()
+
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except OSError:
+                pass
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the IUMS accounting API over HTTP/JSON")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=int(os.getenv("IUMS_API_PORT", "8600")))
+    parser.add_argument("--workers", type=int, default=8, help="Worker threads per process")
+    parser.add_argument("--processes", type=int, default=1, help="Pre-forked server processes sharing the socket")
+    parser.add_argument("--no-email", action="store_true", help="Do not email OTPs (alerts are still written)")
+    args = parser.parse_args()
+
+    if args.no_email:
+        from email_utils import email_service
+        email_service.is_configured = False
+
+    serve(args.host, args.port, args.workers, args.processes)
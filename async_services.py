@@ -0,0 +1,160 @@
+"""Asyncio counterparts of the core services.py API.
+
+Each coroutine runs the blocking services function on a dedicated pool of
+database threads (IUMS_ASYNC_DB_WORKERS, default 8), so an asyncio frontend
+can keep many requests in flight while SQLite works: sqlite3 releases the GIL
+during queries, and every call opens its own connection as usual. The caller's
+context is copied into the worker thread, so shard routing (activate_shard)
+and the query log follow the call. Email goes through
+email_utils.async_email_transport, which has threads of its own, so slow SMTP
+never holds up database calls.
+
+    balance = await async_services.calculate_balance("juan")
+    transaction, message = await async_services.create_pending_transaction_with_due_date(...)
+
+check_due_dates() is the asynchronous reminder run: every alert is written
+in one transaction while the reminder emails go out concurrently (at most
+REMINDER_CONCURRENCY at a time) instead of one utang at a time. run_reminder_scheduler() repeats it on an interval
+(on every shard when sharding is on):
+
+    python async_services.py --interval 3600 [--once] [--no-email]
+"""
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import services
+from database import is_sharding_enabled, activate_shard, SHARD_DIR
+from email_utils import async_email_transport
+from money import from_cents
+
+DB_WORKERS = int(os.getenv("IUMS_ASYNC_DB_WORKERS", "8"))
+# Reminder emails in flight at once during check_due_dates()
+REMINDER_CONCURRENCY = 16
+
+_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="iums-db")
+
+async def run_blocking(function, *args, **kwargs):
+    """Await a blocking call on the database thread pool, in a copy of the caller's context"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, functools.partial(context.run, function, *args, **kwargs))
+
+def _async(function):
+    """Coroutine version of a services function (same arguments and return value)"""
+    @functools.wraps(function)
+    async def wrapper(*args, **kwargs):
+        return await run_blocking(function, *args, **kwargs)
+    return wrapper
+
+# Reads
+get_account = _async(services.get_account)
+get_personal_info = _async(services.get_personal_info)
+get_transaction = _async(services.get_transaction)
+get_customer_transactions = _async(services.get_customer_transactions)
+get_my_transactions = _async(services.get_my_transactions)
+get_pending_transactions = _async(services.get_pending_transactions)
+get_my_pending_transactions = _async(services.get_my_pending_transactions)
+calculate_balance = _async(services.calculate_balance)
+get_my_customer_balances = _async(services.get_my_customer_balances)
+get_my_customer_list = _async(services.get_my_customer_list)
+get_upcoming_due_dates = _async(services.get_upcoming_due_dates)
+get_my_upcoming_due_dates = _async(services.get_my_upcoming_due_dates)
+get_overdue_transactions = _async(services.get_overdue_transactions)
+get_my_overdue_transactions = _async(services.get_my_overdue_transactions)
+get_upcoming_due_dates_for_customer = _async(services.get_upcoming_due_dates_for_customer)
+get_overdue_transactions_for_customer = _async(services.get_overdue_transactions_for_customer)
+get_alerts = _async(services.get_alerts)
+get_receivables_aging = _async(services.get_receivables_aging)
+get_daily_trend = _async(services.get_daily_trend)
+get_my_transaction_statistics = _async(services.get_my_transaction_statistics)
+get_setting = _async(services.get_setting)
+
+# Writes
+create_account = _async(services.create_account)
+delete_account = _async(services.delete_account)
+create_pending_transaction_with_due_date = _async(services.create_pending_transaction_with_due_date)
+confirm_transaction_with_otp = _async(services.confirm_transaction_with_otp)
+send_alert = _async(services.send_alert)
+send_alerts = _async(services.send_alerts)
+mark_alerts_read = _async(services.mark_alerts_read)
+update_setting = _async(services.update_setting)
+
+# Due date reminders
+async def check_due_dates():
+    """Send reminders for unpaid utang due soon or overdue, overlapping the alert writes with the emails"""
+    with services.DUE_DATE_CHECK_SECONDS.time():
+        rows = await run_blocking(services.get_due_reminder_rows)
+        if rows is None:
+            services.DUE_DATE_CHECKS.inc(result="error")
+            return False, "Error checking due dates: could not read due utang"
+
+        reminders = []
+        for row in rows:
+            amount = from_cents(row["amount_cents"])
+            reminders.append((row, amount, services.due_reminder_message(row["description"], amount, row["due_date"], row["days_until_due"])))
+
+        # SQLite takes one writer at a time, so all alerts go in as one transaction...
+        alert_writes = run_blocking(services.send_alerts, [(row["customer"], message) for row, _, message in reminders])
+
+        # ...while the emails (one account lookup for all customers) go out concurrently
+        email_sent = []
+        if async_email_transport.is_configured:
+            accounts = await run_blocking(services.get_personal_info, {row["customer"] for row in rows})
+            semaphore = asyncio.Semaphore(REMINDER_CONCURRENCY)
+
+            async def send_email(row, amount):
+                personal_info = accounts.get(row["customer"], {})
+                if not personal_info.get("email"):
+                    return False
+                async with semaphore:
+                    return await async_email_transport.send_due_date_reminder(
+                        personal_info["email"], personal_info.get("full_name", row["customer"]),
+                        row["description"], amount, row["due_date"], row["days_until_due"]
+                    )
+
+            email_sent = await asyncio.gather(*(send_email(row, amount) for row, amount, _ in reminders))
+        reminders_sent = await alert_writes
+
+    return True, services.due_check_summary(len(rows), reminders_sent, sum(1 for sent in email_sent if sent))
+
+async def run_reminders(shards=(None,)):
+    """One check_due_dates() pass over each shard (None = the default database)"""
+    for shard in shards:
+        if shard:
+            activate_shard(shard)
+        success, message = await check_due_dates()
+        print(f"{'📅' if success else '❌'} {shard or 'default database'}: {message}")
+
+async def run_reminder_scheduler(interval_seconds, shards=(None,), stop=None):
+    """Run reminders now and then every interval_seconds until stop is set"""
+    stop = stop or asyncio.Event()
+    while not stop.is_set():
+        await run_reminders(shards)
+        try:
+            await asyncio.wait_for(stop.wait(), interval_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Send due date reminders on a schedule (asyncio)")
+    parser.add_argument("--interval", type=float, default=3600, help="Seconds between runs")
+    parser.add_argument("--once", action="store_true", help="Run once and exit")
+    parser.add_argument("--no-email", action="store_true", help="Only write alerts, do not email reminders")
+    args = parser.parse_args()
+
+    if args.no_email:
+        async_email_transport.service.is_configured = False
+
+    shards = [None]
+    if is_sharding_enabled():
+        shards = sorted(name for name in os.listdir(SHARD_DIR) if name.startswith("owner_") and name.endswith(".db"))
+
+    try:
+        asyncio.run(run_reminders(shards) if args.once else run_reminder_scheduler(args.interval, shards))
+    except KeyboardInterrupt:
+        pass
@@ -1,5 +1,7 @@
 import streamlit as st
-from utils import get_account, create_account, ensure_session_state
+from utils import ensure_session_state
+from services import get_account, create_account
+from database import activate_shard_for_user, activate_shard
 import base64, os
 
 def _get_base64_image(file_path):
@@ -273,6 +275,9 @@ def show_login_form():
                 st.error("❌ Please enter both username and password")
                 return
 
+            # In sharding mode this routes the session to the user's shard first
+            shard = activate_shard_for_user(username)
+            
             account = get_account(username)
             if not account:
                 st.error("❌ Account not found")
@@ -290,6 +295,7 @@ def show_login_form():
             st.session_state.logged_in = True
             st.session_state.username = username
             st.session_state.role = account["role"]
+            st.session_state.shard = shard
             st.session_state.current_page = "Dashboard"
             st.success(f"🎉 Welcome back, {username}!")
             st.rerun()
@@ -366,6 +372,8 @@ def logout():
     st.session_state.logged_in = False
     st.session_state.username = None
     st.session_state.role = None
+    st.session_state.shard = None
+    activate_shard(None)
     st.session_state.current_page = "Dashboard"
     st.success("✅ Logged out successfully!")
     st.rerun()
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""Compare random uuid4 keys with time-ordered ULIDs for transactions and alerts.
+
+Measures insert throughput, database file size and the range scans behind
+get_alerts() / get_customer_transactions().
+
+    python benchmarks/bench_ids.py --rows 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from ids import new_ulid
+
+STRATEGIES = {
+    "uuid4": lambda: str(uuid.uuid4()),
+    "ulid": new_ulid,
+}
+
+def _build_database(path, id_factory, rows, customers, batch_size):
+    """Create a fresh schema and insert rows one commit per batch, returning rows/second"""
+    database.DB_PATH = path
+    database.init_database()
+    database.add_missing_columns()
+
+    conn = database.get_connection()
+    cursor = conn.cursor()
+    start_date = datetime(2024, 1, 1)
+
+    started = time.perf_counter()
+    for offset in range(0, rows, batch_size):
+        transactions = []
+        alerts = []
+        for i in range(offset, min(offset + batch_size, rows)):
+            customer = f"customer{i % customers}"
+            created = start_date + timedelta(seconds=i * 30)
+            transactions.append((
+                id_factory(), customer, "utang" if i % 3 else "payment", "benchmark", 10000,
+                created.strftime("%Y-%m-%d"), 1, "000000", "owner", created.isoformat(), created.isoformat(),
+                "confirmed", 0, 0, 10000, (created + timedelta(days=30)).strftime("%Y-%m-%d"), "owner"
+            ))
+            alerts.append((id_factory(), customer, created.strftime("%Y-%m-%d"), created.isoformat(), "benchmark alert", 0, "owner"))
+
+        cursor.executemany('''
+            INSERT INTO transactions
+            (id, customer, type, description, amount_cents, date, confirmed, otp, created_by, created_at, confirmed_at,
+             status, interest_rate, interest_cents, principal_cents, due_date, owner)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', transactions)
+        cursor.executemany('''
+            INSERT INTO alerts (id, username, date, timestamp, message, read, owner)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', alerts)
+        conn.commit()
+    elapsed = time.perf_counter() - started
+    conn.close()
+
+    return (rows * 2) / elapsed
+
+def _time_range_scans(path, customers, repeats):
+    """Time the get_alerts / get_customer_transactions queries, returning average ms per call"""
+    database.DB_PATH = path
+    conn = database.get_connection()
+    cursor = conn.cursor()
+    sample = [f"customer{random.randrange(customers)}" for _ in range(repeats)]
+
+    started = time.perf_counter()
+    for customer in sample:
+        cursor.execute('SELECT * FROM alerts WHERE username = ? ORDER BY timestamp DESC LIMIT 50', (customer,))
+        cursor.fetchall()
+    alerts_ms = (time.perf_counter() - started) * 1000 / repeats
+
+    started = time.perf_counter()
+    for customer in sample:
+        cursor.execute('SELECT * FROM transactions WHERE customer = ? ORDER BY date DESC', (customer,))
+        cursor.fetchall()
+    transactions_ms = (time.perf_counter() - started) * 1000 / repeats
+
+    # Point lookups by primary key (confirm_transaction_with_otp, delete_transaction)
+    cursor.execute('SELECT id FROM transactions ORDER BY random() LIMIT ?', (repeats,))
+    ids = [row[0] for row in cursor.fetchall()]
+    started = time.perf_counter()
+    for transaction_id in ids:
+        cursor.execute('SELECT * FROM transactions WHERE id = ?', (transaction_id,)).fetchone()
+    lookup_ms = (time.perf_counter() - started) * 1000 / max(len(ids), 1)
+
+    conn.close()
+    return alerts_ms, transactions_ms, lookup_ms
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000, help="transactions (and alerts) to insert")
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=100, help="rows per commit")
+    parser.add_argument("--repeats", type=int, default=200, help="queries per range-scan measurement")
+    args = parser.parse_args()
+
+    print(f"{'strategy':<8} {'inserts/s':>12} {'size MB':>9} {'alerts ms':>10} {'txns ms':>9} {'by id ms':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, id_factory in STRATEGIES.items():
+            path = os.path.join(workdir, f"{name}.db")
+            throughput = _build_database(path, id_factory, args.rows, args.customers, args.batch_size)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            alerts_ms, transactions_ms, lookup_ms = _time_range_scans(path, args.customers, args.repeats)
+            print(f"{name:<8} {throughput:>12,.0f} {size_mb:>9.2f} {alerts_ms:>10.3f} {transactions_ms:>9.3f} {lookup_ms:>9.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Benchmark full page reruns with Streamlit's AppTest.
+
+Runs iums.py headless, logged in as the busiest generated owner (or that
+owner's busiest customer) with current_page set to each page, and records the
+wall time per rerun, the number of SQL statements and connections, and the
+peak Python memory. Statements are counted with a trace callback on every
+connection opened during the rerun; peak memory is measured with tracemalloc
+on one extra rerun so it does not slow down the timed ones. A page that fails
+to render (an exception, the "contact support" fallback or an st.error) is
+reported as an error instead of being timed.
+
+    python benchmarks/bench_pages.py --sizes 10k 100k --repeat 3 --json pages.json
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import element_tree
+
+import database
+from bench_utils import SIZES, DEFAULT_DATA_DIR, get_dataset, pick_subjects
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "iums.py")
+
+# Page name: (role, current_page)
+PAGES = {
+    "owner_overview": ("Owner", "Dashboard"),
+    "manage_account": ("Owner", "Manage Account"),
+    "add_utang": ("Owner", "Add Utang"),
+    "record_payment": ("Owner", "Record Payment"),
+    "reports": ("Owner", "Reports"),
+    "settings": ("Owner", "Settings"),
+    "pending_confirmations": ("Owner", "Pending Confirmations"),
+    "owner_profile": ("Owner", "Owner Profile"),
+    "customer_overview": ("Customer", "Dashboard"),
+    "customer_balance": ("Customer", "Balance"),
+    "customer_history": ("Customer", "Transaction History"),
+    "customer_pending": ("Customer", "Pending Transactions"),
+    "customer_alerts": ("Customer", "Alerts"),
+    "customer_profile": ("Customer", "Profile Settings")
+}
+# Shown by iums.main() when a dashboard raises
+SUPPORT_MESSAGE = "Please refresh the page or contact support"
+
+DEFAULT_PAGES = ["owner_overview", "reports", "record_payment", "customer_overview"]
+
+# AppTest in streamlit 1.28 cannot parse empty block protos (emitted by st.spinner); skip them
+_block_init = element_tree.Block.__init__
+
+def _tolerant_block_init(self, proto, root):
+    if proto is not None and proto.WhichOneof("type") is None:
+        proto = None
+    _block_init(self, proto, root)
+
+element_tree.Block.__init__ = _tolerant_block_init
+
+# ...nor selectboxes with a format_func (the stored value is not among the formatted options);
+# pages are never interacted with here, so keep the widget's default selection
+_selectbox_index = element_tree.Selectbox.index
+
+def _tolerant_selectbox_index(self):
+    try:
+        return _selectbox_index.fget(self)
+    except ValueError:
+        return self.proto.default
+
+element_tree.Selectbox.index = property(_tolerant_selectbox_index)
+
+class QueryCounter:
+    """Counts connections and executed statements by wrapping sqlite3.connect while active"""
+    def __init__(self):
+        self.connections = 0
+        self.statements = 0
+        self._connect = sqlite3.connect
+
+    def _counting_connect(self, *args, **kwargs):
+        conn = self._connect(*args, **kwargs)
+        self.connections += 1
+        conn.set_trace_callback(self._trace)
+        return conn
+
+    def _trace(self, statement):
+        self.statements += 1
+
+    def __enter__(self):
+        self.connections = 0
+        self.statements = 0
+        sqlite3.connect = self._counting_connect
+        return self
+
+    def __exit__(self, *exc_info):
+        sqlite3.connect = self._connect
+
+def new_session(username, role, current_page):
+    """An AppTest for iums.py already logged in on a page (system initialization skipped)"""
+    at = AppTest.from_file(APP_PATH, default_timeout=600)
+    at.session_state["logged_in"] = True
+    at.session_state["username"] = username
+    at.session_state["role"] = role
+    at.session_state["current_page"] = current_page
+    at.session_state["system_initialized"] = True
+    return at
+
+def page_error(at):
+    """The first sign that a page failed to render, or None
+
+    iums.main() catches dashboard exceptions and shows SUPPORT_MESSAGE instead,
+    so besides uncaught exceptions this looks for that message and for any
+    st.error other than the 🚨 overdue banners pages show on purpose.
+    """
+    if at.exception:
+        return at.exception[0].value
+    for info in at.info:
+        if SUPPORT_MESSAGE in info.value:
+            return info.value
+    for error in at.error:
+        if not error.value.startswith("🚨"):
+            return error.value
+    return None
+
+def bench_page(username, role, current_page, repeat):
+    """Rerun one page repeat times after a warm-up; returns timings, query counts and peak memory"""
+    at = new_session(username, role, current_page)
+    at.run()
+    error = page_error(at)
+    if error:
+        return {"error": error}
+
+    samples = []
+    counter = QueryCounter()
+    with counter:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            at.run()
+            samples.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    at.run()
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "statements": counter.statements / repeat,
+        "connections": counter.connections / repeat,
+        "peak_mb": peak_bytes / (1024 * 1024)
+    }
+
+def run_page_benchmarks(sizes, pages, repeat, data_dir):
+    """Benchmark each page on each dataset size; returns {size: {page: stats}}"""
+    from email_utils import email_service
+
+    # Rendering must not send mail
+    email_service.is_configured = False
+
+    results = {}
+    previous_path = database.DB_PATH
+    try:
+        for size in sizes:
+            database.DB_PATH = get_dataset(size, data_dir)
+            owner, customer = pick_subjects(database.DB_PATH)
+            results[size] = {}
+            for page in pages:
+                role, current_page = PAGES[page]
+                username = owner if role == "Owner" else customer
+                stats = bench_page(username, role, current_page, repeat)
+                results[size][page] = stats
+                if "error" in stats:
+                    print(f"{size:>5} {page:<24} ❌ {stats['error']}")
+                else:
+                    print(f"{size:>5} {page:<24} median {stats['median'] * 1000:9.1f} ms   "
+                          f"{stats['statements']:>6.0f} stmts {stats['connections']:>5.0f} conns   peak {stats['peak_mb']:7.1f} MB")
+    finally:
+        database.DB_PATH = previous_path
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", choices=SIZES, default=["10k", "100k"])
+    parser.add_argument("--pages", nargs="+", choices=PAGES, default=DEFAULT_PAGES)
+    parser.add_argument("--repeat", type=int, default=3, help="timed reruns per page (after one warm-up)")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where generated databases are kept between runs")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    results = run_page_benchmarks(args.sizes, args.pages, args.repeat, args.data_dir)
+
+    # Per-page report: how each page scales with the dataset size
+    print()
+    print(f"{'page':<24}" + "".join(f"{size:>14}" for size in args.sizes))
+    for page in args.pages:
+        cells = []
+        for size in args.sizes:
+            stats = results[size][page]
+            cells.append(f"{'error':>14}" if "error" in stats else f"{stats['median'] * 1000:>11.1f} ms")
+        print(f"{page:<24}" + "".join(cells))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Report saved to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Benchmark the services.py data-access layer against generated databases.
+
+Times calculate_balance, get_my_transactions, check_due_dates and
+get_my_transaction_statistics on datasets of several sizes (built once with
+generate_dataset.py and reused); services.py does not use Streamlit, so the
+functions are called directly. Results can be saved as a baseline JSON file;
+later runs compared against it flag every benchmark whose median got slower
+than the threshold and exit with status 1.
+
+check_due_dates writes one alert per due or overdue utang, so its time grows
+with the number of open utang rather than with the table size; use
+--benchmarks to leave it out of quick runs on the larger datasets.
+
+    python benchmarks/bench_utils.py --sizes 10k 100k --save-baseline baseline.json
+    python benchmarks/bench_utils.py --sizes 10k 100k --compare baseline.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from generate_dataset import generate_dataset
+
+# Dataset sizes by name: generate_dataset() arguments
+SIZES = {
+    "10k": {"owners": 5, "customers_per_owner": 100, "transactions": 10000},
+    "100k": {"owners": 10, "customers_per_owner": 500, "transactions": 100000},
+    "1m": {"owners": 20, "customers_per_owner": 2500, "transactions": 1000000}
+}
+BENCHMARKS = ("calculate_balance", "get_my_transactions", "check_due_dates", "get_my_transaction_statistics")
+SEED = 20240101
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "iums_benchmarks")
+
+def get_dataset(size, data_dir):
+    """Path of the generated database for a size, generating it on first use"""
+    db_path = os.path.join(data_dir, f"iums_{size}.db")
+    if not os.path.exists(db_path):
+        os.makedirs(data_dir, exist_ok=True)
+        print(f"Generating {size} dataset in {db_path} ...")
+        generate_dataset(db_path, seed=SEED, **SIZES[size])
+    return db_path
+
+def pick_subjects(db_path):
+    """The owner with the most transactions and their most active customer (the worst case per call)"""
+    conn = sqlite3.connect(db_path)
+    owner = conn.execute('SELECT owner FROM transactions GROUP BY owner ORDER BY COUNT(*) DESC LIMIT 1').fetchone()[0]
+    customer = conn.execute('''
+        SELECT customer FROM transactions WHERE owner = ? GROUP BY customer ORDER BY COUNT(*) DESC LIMIT 1
+    ''', (owner,)).fetchone()[0]
+    conn.close()
+    return owner, customer
+
+def clear_new_alerts(db_path, last_alert_id):
+    """Remove alerts written by a benchmark run (ULIDs sort after every generated one)"""
+    conn = sqlite3.connect(db_path)
+    conn.execute('DELETE FROM alerts WHERE id > ?', (last_alert_id,))
+    conn.commit()
+    conn.close()
+
+def time_call(function, repeat, after=None):
+    """Run function repeat times (after one warm-up call); returns per-call seconds"""
+    function()
+    if after:
+        after()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+        if after:
+            after()
+    return samples
+
+def run_benchmarks(sizes, repeat, data_dir, selected=BENCHMARKS):
+    """Time each services function on each dataset size; returns {size: {benchmark: stats}}"""
+    import services
+    from email_utils import email_service
+
+    # Measure the data access, not SMTP round trips
+    email_service.is_configured = False
+
+    results = {}
+    previous_path = database.DB_PATH
+    try:
+        for size in sizes:
+            db_path = get_dataset(size, data_dir)
+            database.DB_PATH = db_path
+            owner, customer = pick_subjects(db_path)
+
+            conn = sqlite3.connect(db_path)
+            last_alert_id = conn.execute("SELECT COALESCE(MAX(id), '') FROM alerts").fetchone()[0]
+            conn.close()
+
+            benchmarks = {
+                "calculate_balance": (lambda: services.calculate_balance(customer), None),
+                "get_my_transactions": (lambda: services.get_my_transactions(owner), None),
+                "check_due_dates": (services.check_due_dates, lambda: clear_new_alerts(db_path, last_alert_id)),
+                "get_my_transaction_statistics": (lambda: services.get_my_transaction_statistics(owner), None)
+            }
+
+            results[size] = {}
+            for name, (function, after) in benchmarks.items():
+                if name not in selected:
+                    continue
+                samples = time_call(function, repeat, after)
+                results[size][name] = {
+                    "min": min(samples),
+                    "median": statistics.median(samples),
+                    "repeat": repeat
+                }
+                print(f"{size:>5} {name:<32} median {results[size][name]['median'] * 1000:9.2f} ms   min {results[size][name]['min'] * 1000:9.2f} ms")
+    finally:
+        database.DB_PATH = previous_path
+    return results
+
+def compare_results(results, baseline, threshold):
+    """List (size, name, baseline median, median, change) for benchmarks slower than baseline by more than threshold"""
+    regressions = []
+    for size, benchmarks in results.items():
+        for name, stats in benchmarks.items():
+            reference = baseline.get("results", {}).get(size, {}).get(name)
+            if not reference:
+                continue
+            change = stats["median"] / reference["median"] - 1
+            marker = "❌ REGRESSION" if change > threshold else ("✅ faster" if change < -threshold else "")
+            print(f"{size:>5} {name:<32} {reference['median'] * 1000:9.2f} ms -> {stats['median'] * 1000:9.2f} ms ({change:+.1%}) {marker}")
+            if change > threshold:
+                regressions.append((size, name, reference["median"], stats["median"], change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", choices=SIZES, default=["10k", "100k"])
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per benchmark (after one warm-up)")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where generated databases are kept between runs")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown of the median before flagging (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.repeat, args.data_dir, args.benchmarks)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({
+                "created_at": datetime.now().isoformat(),
+                "machine": platform.node(),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "results": results
+            }, f, indent=2)
+        print(f"✅ Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("machine") != platform.node():
+            print(f"⚠️ Baseline was recorded on {baseline.get('machine')}, timings may not be comparable")
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("✅ No regressions")
+
+if __name__ == "__main__":
+    main()
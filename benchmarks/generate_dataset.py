@@ -0,0 +1,232 @@
+"""Generate a synthetic IUMS database for load and scale testing.
+
+Creates N owners with M customers each and a history of utang and payments
+spread over the last --days days: log-normal amounts, optional interest,
+due dates, a share of still-pending OTP transactions and per-customer alerts.
+Rows are written with executemany in large batches straight into the chosen
+database file, then the derived tables (payment allocations, daily rollups)
+are built with the normal migrations.
+
+    python benchmarks/generate_dataset.py --db /tmp/iums_100k.db --owners 10 --customers 500 --transactions 100000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from ids import new_ulid
+from dates import to_day_number
+
+BATCH_SIZE = 50000
+
+ALERT_MESSAGES = [
+    "📅 REMINDER: Your utang is due soon.",
+    "✅ PAYMENT CONFIRMED",
+    "✅ UTANG CONFIRMED",
+    "🔐 OTP sent for a new transaction",
+    "⏰ URGENT: Your utang is due in 3 days."
+]
+
+def _insert_batches(conn, sql, rows):
+    """executemany in BATCH_SIZE slices, one commit each"""
+    for start in range(0, len(rows), BATCH_SIZE):
+        conn.executemany(sql, rows[start:start + BATCH_SIZE])
+        conn.commit()
+
+def _build_accounts(owners, customers_per_owner, created_at, debt_limit_cents):
+    """Owner and customer account rows (passwords are all 'password')"""
+    accounts = []
+    customers = []
+    for owner_index in range(owners):
+        owner = f"owner{owner_index}"
+        accounts.append((owner, "password", "Owner", 0, json.dumps({
+            "full_name": f"Owner {owner_index}", "email": f"{owner}@example.com", "address": ""
+        }), created_at, "system"))
+        for customer_index in range(customers_per_owner):
+            customer = f"{owner}_customer{customer_index}"
+            accounts.append((customer, "password", "Customer", debt_limit_cents, json.dumps({
+                "full_name": f"Customer {owner_index}-{customer_index}",
+                "email": f"{customer}@example.com",
+                "address": "Manila"
+            }), created_at, owner))
+            customers.append((customer, owner))
+    return accounts, customers
+
+def _build_transactions(rng, customers, total, days, payment_ratio, interest_share, pending_share, due_days, amount_median, amount_sigma):
+    """Transaction rows, chronological per customer, with payments never exceeding the running balance"""
+    now = datetime.now().replace(microsecond=0)
+    start = now - timedelta(days=days)
+
+    # Skewed activity: a few customers have many transactions, most have a few
+    weights = rng.lognormal(0.0, 1.0, len(customers))
+    counts = rng.multinomial(total, weights / weights.sum())
+
+    # Everything random is drawn up front in vectorized calls, then walked per customer
+    offsets = np.sort(rng.uniform(0, days * 86400, total))
+    is_payment = rng.random(total) < payment_ratio
+    principal_cents = np.maximum(np.rint(rng.lognormal(np.log(amount_median * 100), amount_sigma, total)), 100).astype(np.int64)
+    payment_fraction = rng.uniform(0.2, 1.0, total)
+    interest_rate = np.where(rng.random(total) < interest_share, rng.choice([1.0, 3.0, 5.0], total), 0.0)
+    due_in = rng.integers(due_days[0], due_days[1] + 1, total)
+    pending_window = days * 86400 - 7 * 86400
+    pending_draw = rng.random(total)
+    otps = rng.integers(100000, 1000000, total)
+
+    # Deal the (globally sorted) time slots out to customers, each customer's slice in time order
+    slots = rng.permutation(total)
+    bounds = np.concatenate(([0], np.cumsum(counts)))
+
+    transactions = []
+    position = 0
+    for customer_index, (customer, owner) in enumerate(customers):
+        rows = np.sort(slots[bounds[customer_index]:bounds[customer_index + 1]])
+        balance_cents = 0
+        for index in rows:
+            created = start + timedelta(seconds=float(offsets[index]))
+            # Only recent transactions can still be waiting for their OTP
+            pending = offsets[index] > pending_window and pending_draw[index] < pending_share
+
+            if is_payment[index] and balance_cents > 0:
+                transaction_type = "payment"
+                amount_cents = max(int(balance_cents * payment_fraction[index]), 1)
+                principal, interest, rate, due_date = amount_cents, 0, 0.0, None
+            else:
+                transaction_type = "utang"
+                principal = int(principal_cents[index])
+                rate = float(interest_rate[index])
+                interest = int(round(principal * rate / 100))
+                amount_cents = principal + interest
+                due_date = (created + timedelta(days=int(due_in[index]))).strftime('%Y-%m-%d')
+
+            if not pending:
+                balance_cents += amount_cents if transaction_type == "utang" else -amount_cents
+
+            date = created.strftime('%Y-%m-%d')
+            created_at = created.isoformat()
+            transactions.append((
+                new_ulid(int(created.timestamp() * 1000)), customer, transaction_type,
+                f"Generated {transaction_type} {position}", amount_cents, date,
+                0 if pending else 1, str(otps[index]), owner, created_at,
+                "" if pending else (created + timedelta(minutes=2)).isoformat(),
+                "pending_otp" if pending else "confirmed", rate, interest, principal, due_date, owner,
+                to_day_number(date), to_day_number(due_date)
+            ))
+            position += 1
+    return transactions
+
+def _build_alerts(rng, customers, per_customer, days):
+    """Alert rows: a Poisson number per customer at random times, most of them read"""
+    now = datetime.now().replace(microsecond=0)
+    counts = rng.poisson(per_customer, len(customers))
+    alerts = []
+    for (customer, owner), count in zip(customers, counts):
+        for _ in range(count):
+            created = now - timedelta(seconds=float(rng.uniform(0, days * 86400)))
+            alerts.append((
+                new_ulid(int(created.timestamp() * 1000)), customer, created.strftime('%Y-%m-%d'), created.isoformat(),
+                ALERT_MESSAGES[rng.integers(len(ALERT_MESSAGES))], int(rng.random() < 0.8), owner
+            ))
+    return alerts
+
+def generate_dataset(db_path, owners=5, customers_per_owner=100, transactions=10000, days=365,
+                     payment_ratio=0.4, interest_share=0.3, pending_share=0.02, due_days=(7, 60),
+                     amount_median=500.0, amount_sigma=1.0, alerts_per_customer=5.0, seed=None):
+    """Create (or overwrite) db_path with a synthetic dataset; returns row counts and timings"""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    rng = np.random.default_rng(seed)
+    timings = {}
+
+    # Create the current schema through the normal code path
+    previous_path = database.DB_PATH
+    database.DB_PATH = db_path
+    try:
+        database.init_database()
+        database.add_missing_columns()
+
+        started = time.perf_counter()
+        accounts, customers = _build_accounts(owners, customers_per_owner, datetime.now().isoformat(), 1000000)
+        transaction_rows = _build_transactions(
+            rng, customers, transactions, days, payment_ratio, interest_share, pending_share,
+            due_days, amount_median, amount_sigma
+        )
+        alert_rows = _build_alerts(rng, customers, alerts_per_customer, days)
+        timings["generate"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA synchronous = OFF")
+        _insert_batches(conn, '''
+            INSERT INTO accounts (username, password, role, debt_limit_cents, personal_info, created_date, created_by)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', accounts)
+        _insert_batches(conn, '''
+            INSERT INTO transactions
+            (id, customer, type, description, amount_cents, date, confirmed, otp, created_by, created_at, confirmed_at,
+             status, interest_rate, interest_cents, principal_cents, due_date, owner, date_day, due_day)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', transaction_rows)
+        _insert_batches(conn, '''
+            INSERT INTO alerts (id, username, date, timestamp, message, read, owner)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', alert_rows)
+        conn.close()
+        timings["insert"] = time.perf_counter() - started
+
+        # Derived tables via the same migrations a real database goes through
+        started = time.perf_counter()
+        database.migrate_payment_allocations()
+        database.rebuild_daily_rollups()
+        conn = sqlite3.connect(db_path)
+        conn.execute("ANALYZE")
+        conn.close()
+        timings["derive"] = time.perf_counter() - started
+    finally:
+        database.DB_PATH = previous_path
+
+    pending = sum(1 for row in transaction_rows if not row[6])
+    return {
+        "accounts": len(accounts),
+        "transactions": len(transaction_rows),
+        "pending": pending,
+        "alerts": len(alert_rows),
+        "size_mb": os.path.getsize(db_path) / (1024 * 1024),
+        "timings": timings
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="database file to create (overwritten if it exists)")
+    parser.add_argument("--owners", type=int, default=5)
+    parser.add_argument("--customers", type=int, default=100, help="customers per owner")
+    parser.add_argument("--transactions", type=int, default=10000, help="total transactions across all customers")
+    parser.add_argument("--days", type=int, default=365, help="length of the history")
+    parser.add_argument("--payment-ratio", type=float, default=0.4, help="share of transactions that are payments")
+    parser.add_argument("--interest-share", type=float, default=0.3, help="share of utang with interest (1/3/5%%)")
+    parser.add_argument("--pending-share", type=float, default=0.02, help="chance that a transaction from the last week is still awaiting its OTP")
+    parser.add_argument("--due-days", type=int, nargs=2, default=(7, 60), metavar=("MIN", "MAX"), help="due date range after the utang date")
+    parser.add_argument("--amount-median", type=float, default=500.0, help="median utang principal in pesos (log-normal)")
+    parser.add_argument("--amount-sigma", type=float, default=1.0, help="log-normal sigma of utang amounts")
+    parser.add_argument("--alerts-per-customer", type=float, default=5.0, help="mean alerts per customer (Poisson)")
+    parser.add_argument("--seed", type=int, help="random seed for a reproducible dataset")
+    args = parser.parse_args()
+
+    summary = generate_dataset(
+        args.db, args.owners, args.customers, args.transactions, args.days, args.payment_ratio,
+        args.interest_share, args.pending_share, tuple(args.due_days), args.amount_median,
+        args.amount_sigma, args.alerts_per_customer, args.seed
+    )
+    timings = summary.pop("timings")
+    print(f"✅ {args.db}: " + ", ".join(f"{key} {value:,.2f}" if isinstance(value, float) else f"{key} {value:,}" for key, value in summary.items()))
+    print("   " + ", ".join(f"{step} {seconds:.2f}s" for step, seconds in timings.items()))
+
+if __name__ == "__main__":
+    main()
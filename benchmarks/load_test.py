@@ -0,0 +1,245 @@
+"""Load test the HTTP API (api_server.py) against a generated database.
+
+Starts api_server.py on a copy of a generated dataset (so the writes do not
+touch the cached one), then runs --concurrency client threads for --duration
+seconds. Each client logs in as the busiest generated owner and picks
+operations by weight from the mix: reading customer balances, transaction
+lists, due dates and accounts, and recording a new utang or payment that it
+then confirms with the OTP (read straight from the database copy, standing in
+for the customer). Reports requests per second and p50/p99 latency per
+operation and overall.
+
+    python benchmarks/load_test.py --size 100k --duration 30 --concurrency 32 --workers 8 --processes 4
+    python benchmarks/load_test.py --mix balance=50 create_confirm=50 --json load.json
+"""
+import argparse
+import base64
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from bench_utils import SIZES, SEED, DEFAULT_DATA_DIR, get_dataset, pick_subjects
+
+API_SERVER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api_server.py")
+PASSWORD = "password"  # every generated account's password (see generate_dataset.py)
+
+# Operation: weight in the default mix
+DEFAULT_MIX = {
+    "balance": 35,
+    "transactions": 15,
+    "due_dates": 15,
+    "overdue": 5,
+    "account": 10,
+    "create_confirm": 20
+}
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(db_path, port, workers, processes):
+    """Start api_server.py on db_path and wait until /health answers; returns the process"""
+    env = dict(os.environ, IUMS_DB_PATH=db_path)
+    env.pop("IUMS_SHARD_DIR", None)
+    process = subprocess.Popen(
+        [sys.executable, API_SERVER_PATH, "--port", str(port), "--workers", str(workers),
+         "--processes", str(processes), "--no-email"],
+        env=env, cwd=os.path.dirname(db_path), stdout=subprocess.DEVNULL
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"api_server.py exited with status {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("api_server.py did not start within 120 seconds")
+
+class LoadClient:
+    """One client thread's connection, credentials and recorded (operation, status, seconds) samples"""
+    def __init__(self, port, owner, customers, db_path, seed):
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        self.auth = "Basic " + base64.b64encode(f"{owner}:{PASSWORD}".encode()).decode()
+        self.customers = customers
+        self.db_path = db_path
+        self.rng = random.Random(seed)
+        self.samples = []
+        self._db = None
+
+    def request(self, operation, method, path, body=None):
+        headers = {"Authorization": self.auth}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+
+        started = time.perf_counter()
+        try:
+            self.conn.request(method, path, payload, headers)
+            response = self.conn.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            data, status = b"", 0
+        self.samples.append((operation, status, time.perf_counter() - started))
+        return status, data
+
+    def read_otp(self, transaction_id):
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, timeout=30)
+        row = self._db.execute('SELECT otp FROM transactions WHERE id = ?', (transaction_id,)).fetchone()
+        return row[0] if row else None
+
+    def run_operation(self, operation):
+        customer = self.rng.choice(self.customers)
+        if operation == "balance":
+            self.request(operation, "GET", f"/customers/{customer}/balance")
+        elif operation == "transactions":
+            self.request(operation, "GET", f"/customers/{customer}/transactions")
+        elif operation == "due_dates":
+            self.request(operation, "GET", "/due-dates?days=7")
+        elif operation == "overdue":
+            self.request(operation, "GET", "/overdue")
+        elif operation == "account":
+            self.request(operation, "GET", f"/accounts/{customer}")
+        elif operation == "create_confirm":
+            is_payment = self.rng.random() < 0.4
+            status, data = self.request("create", "POST", "/transactions", {
+                "customer": customer,
+                "type": "payment" if is_payment else "utang",
+                "amount": round(self.rng.uniform(20, 2000), 2),
+                "description": "Load test payment" if is_payment else "Load test utang"
+            })
+            if status != 201:
+                return
+            transaction_id = json.loads(data)["transaction"]["id"]
+            self.request("confirm", "POST", f"/transactions/{transaction_id}/confirm", {"otp": self.read_otp(transaction_id)})
+
+    def run(self, mix, deadline):
+        operations = list(mix)
+        weights = [mix[operation] for operation in operations]
+        while time.perf_counter() < deadline:
+            self.run_operation(self.rng.choices(operations, weights)[0])
+        self.conn.close()
+        if self._db is not None:
+            self._db.close()
+
+def percentile(samples, fraction):
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method="inclusive")[round(fraction * 100) - 1]
+
+def summarize(samples, elapsed):
+    """Per-operation and overall request count, errors, requests per second and latency percentiles"""
+    groups = {}
+    for operation, status, seconds in samples:
+        groups.setdefault(operation, []).append((status, seconds))
+    groups["all"] = [(status, seconds) for _, status, seconds in samples]
+
+    summary = {}
+    for operation, entries in groups.items():
+        latencies = [seconds for _, seconds in entries]
+        summary[operation] = {
+            "requests": len(entries),
+            "errors": sum(1 for status, _ in entries if not 200 <= status < 300),
+            "rps": len(entries) / elapsed,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "max_ms": max(latencies) * 1000 if latencies else 0.0
+        }
+    return summary
+
+def run_load_test(size, data_dir, duration, concurrency, workers, processes, mix):
+    """Serve a copy of the size dataset and drive it for duration seconds; returns the summary"""
+    source_path = get_dataset(size, data_dir)
+    owner, _ = pick_subjects(source_path)
+    conn = sqlite3.connect(source_path)
+    customers = [row[0] for row in conn.execute(
+        "SELECT username FROM accounts WHERE created_by = ? AND role = 'Customer'", (owner,))]
+    conn.close()
+
+    work_dir = tempfile.mkdtemp(prefix="iums_load_")
+    db_path = os.path.join(work_dir, "iums.db")
+    shutil.copy(source_path, db_path)
+    port = free_port()
+    server = start_server(db_path, port, workers, processes)
+
+    try:
+        clients = [LoadClient(port, owner, customers, db_path, SEED + index) for index in range(concurrency)]
+        started = time.perf_counter()
+        deadline = started + duration
+        threads = [threading.Thread(target=client.run, args=(mix, deadline)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return summarize([sample for client in clients for sample in client.samples], elapsed)
+
+def parse_mix(values):
+    mix = {}
+    for value in values:
+        operation, _, weight = value.partition("=")
+        if operation not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown operation {operation!r} (choose from {', '.join(DEFAULT_MIX)})")
+        mix[operation] = float(weight or 1)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", choices=SIZES, default="10k")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where generated databases are kept between runs")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to generate load")
+    parser.add_argument("--concurrency", type=int, default=16, help="client threads, each with its own connection")
+    parser.add_argument("--workers", type=int, default=8, help="server worker threads per process")
+    parser.add_argument("--processes", type=int, default=1, help="pre-forked server processes")
+    parser.add_argument("--mix", nargs="+", metavar="OPERATION=WEIGHT", help=f"default: {' '.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())}")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    summary = run_load_test(args.size, args.data_dir, args.duration, args.concurrency, args.workers, args.processes, mix)
+
+    print(f"{'operation':<16}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for operation, stats in summary.items():
+        print(f"{operation:<16}{stats['requests']:>10}{stats['errors']:>8}{stats['rps']:>10.1f}"
+              f"{stats['p50_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "size": args.size,
+                "duration": args.duration,
+                "concurrency": args.concurrency,
+                "workers": args.workers,
+                "processes": args.processes,
+                "mix": mix,
+                "summary": summary
+            }, f, indent=2)
+        print(f"✅ Report saved to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""Bulk import of customer accounts and opening utang balances from CSV.
+
+Rows are streamed from the file, validated a chunk at a time (one IN query per
+chunk for existing usernames) and written with executemany, one database
+transaction per chunk. Each chunk is handed to the serialized writer (see
+database.serialized_write), so a large import takes turns with the app's other
+writes instead of contending for the lock. Bad rows are skipped and reported
+with their line number.
+
+    python bulk_import.py customers.csv --owner store_owner
+"""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from database import (
+    get_connection, get_read_connection, serialized_write, get_catalog_connection, is_sharding_enabled, get_shard_file_for_owner,
+    activate_shard, get_active_shard, register_accounts, upsert_daily_rollups
+)
+from ids import new_ulid
+from money import to_cents
+from dates import to_day_number
+
+REQUIRED_COLUMNS = ["username", "password", "full_name", "email"]
+OPTIONAL_COLUMNS = ["address", "debt_limit", "opening_balance", "due_date"]
+CSV_TEMPLATE = ",".join(REQUIRED_COLUMNS + OPTIONAL_COLUMNS) + "\njuan,secret123,Juan Dela Cruz,juan@example.com,Manila,5000,1250.50,2025-12-31\n"
+
+DEFAULT_CHUNK_SIZE = 5000
+# Stay well under SQLite's bound-parameter limit in the username lookups
+LOOKUP_BATCH_SIZE = 500
+
+def _validate_row(row, default_debt_limit_cents):
+    """Validate one CSV row, returning (cleaned values, None) or (None, error message)"""
+    values = {column: (row.get(column) or "").strip() for column in REQUIRED_COLUMNS + OPTIONAL_COLUMNS}
+
+    missing = [column for column in REQUIRED_COLUMNS if not values[column]]
+    if missing:
+        return None, f"Missing {', '.join(missing)}"
+
+    if "@" not in values["email"] or "." not in values["email"]:
+        return None, "Invalid email address"
+
+    try:
+        debt_limit_cents = to_cents(values["debt_limit"]) if values["debt_limit"] else default_debt_limit_cents
+        opening_cents = to_cents(values["opening_balance"])
+    except ValueError as e:
+        return None, str(e)
+
+    if debt_limit_cents < 0 or opening_cents < 0:
+        return None, "Amounts cannot be negative"
+
+    due_date = values["due_date"] or None
+    if opening_cents and due_date:
+        try:
+            datetime.strptime(due_date, '%Y-%m-%d')
+        except ValueError:
+            return None, f"Invalid due date {due_date!r} (expected YYYY-MM-DD)"
+
+    values["debt_limit_cents"] = debt_limit_cents
+    values["opening_cents"] = opening_cents
+    values["due_date"] = due_date
+    return values, None
+
+def _existing_usernames(conn, usernames):
+    """Get which of the usernames already exist, querying in batches"""
+    existing = set()
+    for start in range(0, len(usernames), LOOKUP_BATCH_SIZE):
+        batch = usernames[start:start + LOOKUP_BATCH_SIZE]
+        placeholders = ", ".join("?" * len(batch))
+        rows = conn.execute(f"SELECT username FROM accounts WHERE username IN ({placeholders})", batch).fetchall()
+        existing.update(row[0] for row in rows)
+    return existing
+
+def _catalog_usernames(usernames):
+    """Get which of the usernames are already registered in another shard"""
+    conn = get_catalog_connection()
+    if not conn:
+        return set()
+
+    existing = set()
+    for start in range(0, len(usernames), LOOKUP_BATCH_SIZE):
+        batch = usernames[start:start + LOOKUP_BATCH_SIZE]
+        placeholders = ", ".join("?" * len(batch))
+        rows = conn.execute(f"SELECT username FROM account_directory WHERE username IN ({placeholders})", batch).fetchall()
+        existing.update(row[0] for row in rows)
+    conn.close()
+    return existing
+
+def _get_default_debt_limit_cents(conn):
+    """Read the customer credit limit setting directly (same default as create_account)"""
+    row = conn.execute("SELECT value FROM system_settings WHERE key = 'customerCreditLimit'").fetchone()
+    try:
+        return to_cents(row[0]) if row else to_cents(10000.00)
+    except ValueError:
+        return to_cents(10000.00)
+
+@serialized_write
+def _write_chunk(chunk, owner_username, default_due_days):
+    """Insert a validated chunk of (line, values) in a single transaction on the writer thread"""
+    now = datetime.now()
+    created_at = now.isoformat()
+    today = now.strftime('%Y-%m-%d')
+    default_due_date = (now + timedelta(days=default_due_days)).strftime('%Y-%m-%d')
+    # Most rows share a handful of dates, so convert each distinct one only once
+    day_numbers = {today: to_day_number(today), default_due_date: to_day_number(default_due_date)}
+
+    accounts, transactions, alerts = [], [], []
+    for line_number, values in chunk:
+        personal_info = json.dumps({
+            "full_name": values["full_name"],
+            "email": values["email"],
+            "address": values["address"]
+        })
+        accounts.append((
+            values["username"], values["password"], "Customer", values["debt_limit_cents"],
+            personal_info, created_at, owner_username
+        ))
+        alerts.append((
+            new_ulid(), values["username"], today, created_at,
+            f"Welcome to IUMS! Your account has been created by {owner_username}.", False, owner_username
+        ))
+
+        if values["opening_cents"]:
+            due_date = values["due_date"] or default_due_date
+            if due_date not in day_numbers:
+                day_numbers[due_date] = to_day_number(due_date)
+            transactions.append((
+                new_ulid(), values["username"], "utang", "Opening balance", values["opening_cents"],
+                today, True, "", owner_username, created_at, created_at, "confirmed",
+                0, 0, values["opening_cents"], due_date, owner_username,
+                day_numbers[today], day_numbers[due_date], values["opening_cents"], "open"
+            ))
+
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+
+    cursor = conn.cursor()
+    try:
+        cursor.executemany('''
+            INSERT INTO accounts (username, password, role, debt_limit_cents, personal_info, created_date, created_by)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', accounts)
+        cursor.executemany('''
+            INSERT INTO transactions
+            (id, customer, type, description, amount_cents, date, confirmed, otp, created_by, created_at, confirmed_at,
+             status, interest_rate, interest_cents, principal_cents, due_date, owner, date_day, due_day,
+             remaining_cents, settlement_status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', transactions)
+        cursor.executemany('''
+            INSERT INTO alerts (id, username, date, timestamp, message, read, owner)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', alerts)
+        if transactions:
+            # Opening balances are confirmed utang dated today: one rollup row per chunk
+            opening_cents = sum(transaction[4] for transaction in transactions)
+            upsert_daily_rollups(cursor, [
+                (owner_username, day_numbers[today], "utang", "confirmed", len(transactions), opening_cents, opening_cents, 0)
+            ])
+        conn.commit()
+        conn.close()
+        return len(accounts), len(transactions)
+    except Exception:
+        conn.rollback()
+        conn.close()
+        raise
+
+def import_customers_csv(csv_file, owner_username, chunk_size=DEFAULT_CHUNK_SIZE, default_due_days=30):
+    """Import customer accounts (and opening utang balances) for an owner from a CSV text stream.
+
+    Returns a summary dict with counts and a list of (line number, username, error) for skipped rows.
+    """
+    result = {"rows": 0, "imported": 0, "opening_balances": 0, "errors": []}
+
+    reader = csv.DictReader(csv_file)
+    header = [column.strip() for column in (reader.fieldnames or [])]
+    missing_columns = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing_columns:
+        result["errors"].append((1, "", f"Missing required columns: {', '.join(missing_columns)}"))
+        return result
+    reader.fieldnames = header
+
+    # Customers live in their owner's shard
+    previous_shard = get_active_shard()
+    if is_sharding_enabled():
+        shard_file = get_shard_file_for_owner(owner_username)
+        activate_shard(shard_file)
+
+    # Reads only: the chunks are written by the serialized writer
+    conn = get_read_connection()
+    if not conn:
+        if is_sharding_enabled():
+            activate_shard(previous_shard)
+        result["errors"].append((0, "", "Database connection failed"))
+        return result
+
+    try:
+        default_debt_limit_cents = _get_default_debt_limit_cents(conn)
+        seen_usernames = set()
+
+        def flush(pending):
+            """Check a chunk against the database, then write the rows that are still valid"""
+            usernames = [values["username"] for _, values in pending]
+            taken = _existing_usernames(conn, usernames)
+            if is_sharding_enabled():
+                taken |= _catalog_usernames(usernames)
+
+            valid = []
+            for line_number, values in pending:
+                if values["username"] in taken:
+                    result["errors"].append((line_number, values["username"], "Username already exists"))
+                else:
+                    valid.append((line_number, values))
+            if not valid:
+                return
+
+            try:
+                imported, opening_balances = _write_chunk(valid, owner_username, default_due_days)
+            except Exception as e:
+                for line_number, values in valid:
+                    result["errors"].append((line_number, values["username"], f"Chunk rolled back: {e}"))
+                return
+
+            result["imported"] += imported
+            result["opening_balances"] += opening_balances
+            if is_sharding_enabled():
+                register_accounts([(values["username"], "Customer", owner_username, shard_file) for _, values in valid])
+
+        pending = []
+        for row in reader:
+            result["rows"] += 1
+            line_number = reader.line_num
+
+            values, error = _validate_row(row, default_debt_limit_cents)
+            if error is None and values["username"] in seen_usernames:
+                error = "Duplicate username in file"
+            if error:
+                result["errors"].append((line_number, (row.get("username") or "").strip(), error))
+                continue
+
+            seen_usernames.add(values["username"])
+            pending.append((line_number, values))
+            if len(pending) >= chunk_size:
+                flush(pending)
+                pending = []
+
+        if pending:
+            flush(pending)
+
+        conn.close()
+        print(f"✅ Imported {result['imported']} customers ({result['opening_balances']} opening balances), {len(result['errors'])} rows skipped")
+        return result
+    except Exception as e:
+        conn.close()
+        result["errors"].append((0, "", f"Import failed: {str(e)}"))
+        return result
+    finally:
+        if is_sharding_enabled():
+            activate_shard(previous_shard)
+
+def import_customers_upload(uploaded_file, owner_username, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Import from a binary upload (e.g. a Streamlit UploadedFile) without reading it all into memory"""
+    text_stream = io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+    try:
+        return import_customers_csv(text_stream, owner_username, chunk_size)
+    finally:
+        # Leave the caller's file object open
+        text_stream.detach()
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Bulk import customer accounts and opening balances from CSV")
+    parser.add_argument("csv_path", help="CSV file with columns: " + ", ".join(REQUIRED_COLUMNS + OPTIONAL_COLUMNS))
+    parser.add_argument("--owner", required=True, help="Owner username the customers belong to")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per transaction")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with open(args.csv_path, newline="", encoding="utf-8-sig") as f:
+        summary = import_customers_csv(f, args.owner, args.chunk_size)
+    elapsed = time.perf_counter() - started
+
+    print(f"{summary['rows']} rows in {elapsed:.2f}s")
+    for line_number, username, error in summary["errors"][:50]:
+        print(f"  line {line_number} {username}: {error}")
+    if len(summary["errors"]) > 50:
+        print(f"  ... {len(summary['errors']) - 50} more errors")
@@ -1,11 +1,12 @@
 import streamlit as st
-from utils import (
+from services import (
     calculate_balance, get_customer_transactions, get_pending_transactions,
     get_alerts, mark_alerts_read, format_currency, get_account,
-    update_account_password, update_account_username, delete_transaction, delete_alert,
+    update_account_password, update_account_username, update_personal_info, delete_transaction, delete_alert,
     get_upcoming_due_dates_for_customer, get_overdue_transactions_for_customer
 )
 from datetime import datetime
+from profiling import timed
 
 def show_customer_dashboard():
     """Show customer dashboard with organized message containers"""
@@ -175,6 +176,7 @@ def show_customer_dashboard():
     elif st.session_state.current_page == "Profile Settings":
         show_profile_settings()
 
+@timed("page")
 def show_customer_overview():
     """Show customer overview with organized message containers"""
     st.markdown("## Customer Dashboard")
@@ -475,14 +477,13 @@ def display_transaction_item(transaction, show_interest_details=True, show_delet
                 with col3a:
                     st.metric("Principal", format_currency(transaction.get('principal_amount', transaction['amount'])))
             
-            # Due date information
-            if (transaction.get("due_date") and 
+            # Due date information (unpaid utang only)
+            if (transaction.get("days_until_due") is not None and 
                 transaction["type"] == "utang" and 
-                transaction["confirmed"]):
+                transaction["confirmed"] and 
+                transaction.get("settlement_status") != "settled"):
                 
-                due_date = datetime.strptime(transaction["due_date"], '%Y-%m-%d').date()
-                today = datetime.now().date()
-                days_until_due = (due_date - today).days
+                days_until_due = transaction["days_until_due"]
                 
                 if days_until_due < 0:
                     due_status = f"OVERDUE ({abs(days_until_due)} days)"
@@ -562,6 +563,7 @@ def display_alert_item(alert):
             else:
                 st.error("Failed to delete alert")
 
+@timed("page")
 def show_balance_page():
     """Show detailed balance information"""
     st.markdown("## 💰 Balance Details")
@@ -682,6 +684,7 @@ def show_balance_page():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
 
+@timed("page")
 def show_transaction_history():
     """Show customer transaction history with due dates"""
     st.markdown("## 📊 Transaction History")
@@ -756,6 +759,7 @@ def show_transaction_history():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
 
+@timed("page")
 def show_pending_transactions():
     """Show pending transactions waiting for customer OTP confirmation"""
     st.markdown("## ⏳ Pending Transactions")
@@ -816,6 +820,7 @@ def show_pending_transactions():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
 
+@timed("page")
 def show_alerts_page():
     """Show customer alerts and notifications"""
     st.markdown("## 🔔 Alerts & Notifications")
@@ -906,6 +911,7 @@ def show_alerts_page():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
 
+@timed("page")
 def show_profile_settings():
     """Show customer profile settings with email field and without contact number"""
     st.markdown("## 👤 Profile Settings")
@@ -1015,21 +1021,12 @@ def show_profile_settings():
                         }
                         
                         # Update account in database
-                        conn = get_connection()
-                        if conn:
-                            cursor = conn.cursor()
-                            try:
-                                cursor.execute(
-                                    'UPDATE accounts SET personal_info = ? WHERE username = ?',
-                                    (json.dumps(updated_personal_info), username)
-                                )
-                                conn.commit()
-                                conn.close()
-                                st.success("✅ Personal information updated successfully!")
-                                st.rerun()
-                            except Exception as e:
-                                conn.close()
-                                st.error(f"❌ Error updating personal information: {str(e)}")
+                        success, message = update_personal_info(username, updated_personal_info)
+                        if success:
+                            st.success(f"✅ {message}!")
+                            st.rerun()
+                        else:
+                            st.error(f"❌ {message}")
         
         st.markdown("</div></div>", unsafe_allow_html=True)
     
@@ -1,18 +1,425 @@
 import sqlite3
 import json
 import os
+import re
+import hashlib
+import contextvars
+import concurrent.futures
+import functools
+import pathlib
+import queue
+import threading
+import time
 from datetime import datetime, timedelta
+from ids import new_ulid
+from money import to_cents
+from dates import SQL_DAY_NUMBER, to_day_number
+from allocations import rebuild_customer_allocations
+from query_log import get_connection_factory
+from metrics import counter, histogram
+
+# Rollup day of a transaction (older rows may predate the date_day column being filled)
+ROLLUP_DAY = f"COALESCE(date_day, {SQL_DAY_NUMBER.format(column='date')})"
+
+# Database location. Setting IUMS_SHARD_DIR turns on per-owner sharding:
+# every owner (and the customers they created) gets its own SQLite file in
+# that directory and a small catalog database maps usernames to shard files.
+DB_PATH = os.getenv('IUMS_DB_PATH', 'iums.db')
+SHARD_DIR = os.getenv('IUMS_SHARD_DIR')
+CATALOG_FILE = 'catalog.db'
+
+# Canonical table definitions, shared by init_database() and the table rebuild migrations.
+# Money columns hold INTEGER cents (see money.py); date_day/due_day mirror the
+# date/due_date text as INTEGER day numbers (see dates.py).
+ACCOUNTS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        username TEXT PRIMARY KEY,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL,
+        debt_limit_cents INTEGER DEFAULT 0,
+        personal_info TEXT,
+        created_date TEXT,
+        created_by TEXT  -- Track who created the account
+    )
+'''
+
+TRANSACTIONS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id TEXT PRIMARY KEY,
+        customer TEXT NOT NULL,
+        type TEXT NOT NULL,
+        description TEXT,
+        amount_cents INTEGER NOT NULL DEFAULT 0,
+        date TEXT NOT NULL,
+        confirmed INTEGER DEFAULT 0,
+        otp TEXT,
+        created_by TEXT,
+        created_at TEXT,
+        confirmed_at TEXT,
+        status TEXT DEFAULT 'pending',
+        interest_rate REAL DEFAULT 0,
+        interest_cents INTEGER DEFAULT 0,
+        principal_cents INTEGER DEFAULT 0,
+        due_date TEXT,
+        owner TEXT,  -- Store owner the customer belongs to (denormalized from accounts)
+        date_day INTEGER,
+        due_day INTEGER,
+        remaining_cents INTEGER,  -- Part not yet covered by payment allocations (utang: unpaid, payment: unapplied)
+        settlement_status TEXT DEFAULT 'open',  -- open, partial or settled (see allocations.py)
+        settled_at TEXT,
+        otp_attempts INTEGER DEFAULT 0,  -- Invalid OTPs entered so far (see services.MAX_OTP_ATTEMPTS)
+        FOREIGN KEY (customer) REFERENCES accounts (username)
+    )
+'''
+
+# Per-owner daily totals of confirmed transactions, kept up to date incrementally
+# (update_daily_rollups) so trend charts read O(days) rows instead of every transaction
+DAILY_ROLLUPS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS daily_rollups (
+        owner TEXT NOT NULL,
+        day INTEGER NOT NULL,  -- day number of the transaction date (see dates.py)
+        type TEXT NOT NULL,
+        status TEXT NOT NULL,
+        txn_count INTEGER NOT NULL DEFAULT 0,
+        amount_cents INTEGER NOT NULL DEFAULT 0,
+        principal_cents INTEGER NOT NULL DEFAULT 0,
+        interest_cents INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (owner, day, type, status)
+    )
+'''
+
+# Which utang each payment settled, and how much of it (see allocations.py)
+PAYMENT_ALLOCATIONS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS payment_allocations (
+        id TEXT PRIMARY KEY,
+        payment_id TEXT NOT NULL,
+        utang_id TEXT NOT NULL,
+        customer TEXT NOT NULL,
+        owner TEXT,
+        amount_cents INTEGER NOT NULL,
+        allocated_at TEXT,
+        FOREIGN KEY (payment_id) REFERENCES transactions (id),
+        FOREIGN KEY (utang_id) REFERENCES transactions (id)
+    )
+'''
+
+# One row per customer and accrual period (see interest_accrual.py); the UNIQUE key makes
+# re-running a period a no-op. transaction_id is the utang entry that carries the interest
+# (NULL once that entry is deleted, i.e. the interest was waived).
+INTEREST_ACCRUALS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS interest_accruals (
+        id TEXT PRIMARY KEY,
+        customer TEXT NOT NULL,
+        owner TEXT,
+        schedule TEXT NOT NULL,  -- daily or monthly
+        period TEXT NOT NULL,  -- YYYY-MM-DD (daily) or YYYY-MM (monthly)
+        method TEXT NOT NULL,  -- simple or compound
+        rate REAL NOT NULL,  -- percent for the period
+        base_cents INTEGER NOT NULL,
+        amount_cents INTEGER NOT NULL,
+        transaction_id TEXT,
+        created_at TEXT,
+        UNIQUE (customer, schedule, period)
+    )
+'''
+
+# Per-owner change counter, bumped by triggers on every insert, update and delete of that
+# owner's transactions (see create_triggers); caches of owner data compare it to invalidate
+OWNER_DATA_VERSIONS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS owner_data_versions (
+        owner TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+'''
+
+# Connection churn: every rerun opens one connection per data-access call
+DB_CONNECTIONS = counter("iums_db_connections_total", "Connections opened by get_connection() / get_read_connection()", ["mode", "result"])
+DB_CONNECT_SECONDS = histogram("iums_db_connect_seconds", "Time to open a database connection in seconds")
+DB_WRITE_WAIT_SECONDS = histogram("iums_db_write_wait_seconds", "Time a write waited in the writer queue in seconds")
+DB_WRITES = counter("iums_db_writes_total", "Writes run by the serialized writer by result", ["result"])
+
+# Writes queued for the writer thread before callers block; a write that has not started
+# WRITE_QUEUE_TIMEOUT seconds after it was submitted is dropped and its caller gets an
+# OperationalError, like a locked database (a write that has started always finishes)
+WRITE_QUEUE_SIZE = int(os.getenv('IUMS_WRITE_QUEUE_SIZE', '256'))
+WRITE_QUEUE_TIMEOUT = 30
+
+# Shard used by get_connection() for the current session/thread (None = DB_PATH)
+_active_shard = contextvars.ContextVar('iums_active_shard', default=None)
+_prepared_shards = set()
+# Database files already switched to WAL by this process
+_wal_databases = set()
 
 def get_connection():
-    """Get database connection"""
+    """Get read-write database connection (instrumented while the query debug panel is logging, see query_log.py)"""
+    started = time.perf_counter()
     try:
-        conn = sqlite3.connect('iums.db', check_same_thread=False)
+        path = get_database_path()
+        conn = sqlite3.connect(path, check_same_thread=False, factory=get_connection_factory())
         conn.row_factory = sqlite3.Row
+        if path not in _wal_databases:
+            # WAL lets readers keep reading while a write commits (the mode is stored in the file)
+            conn.execute('PRAGMA journal_mode=WAL')
+            _wal_databases.add(path)
+        DB_CONNECT_SECONDS.observe(time.perf_counter() - started)
+        DB_CONNECTIONS.inc(mode="write", result="ok")
         return conn
     except Exception as e:
+        DB_CONNECTIONS.inc(mode="write", result="error")
         print(f"❌ Database connection failed: {e}")
         return None
 
+def get_read_connection():
+    """Get read-only connection for query-only functions; under WAL it never blocks or is blocked by the writer"""
+    path = get_database_path()
+    if path not in _wal_databases or not os.path.exists(path):
+        # Let a read-write connection create the file and switch it to WAL first
+        conn = get_connection()
+        if not conn:
+            return None
+        conn.close()
+    
+    started = time.perf_counter()
+    try:
+        conn = sqlite3.connect(f"{pathlib.Path(path).absolute().as_uri()}?mode=ro", uri=True, check_same_thread=False, factory=get_connection_factory())
+        conn.row_factory = sqlite3.Row
+        DB_CONNECT_SECONDS.observe(time.perf_counter() - started)
+        DB_CONNECTIONS.inc(mode="read", result="ok")
+        return conn
+    except Exception as e:
+        DB_CONNECTIONS.inc(mode="read", result="error")
+        print(f"❌ Read-only database connection failed: {e}")
+        return None
+
+class SerializedWriter:
+    """One thread running every write in submission order, fed by a bounded queue"""
+    def __init__(self, max_queue):
+        self.max_queue = max_queue
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+    
+    def _ensure_started(self):
+        # Started lazily, and again in a forked child (threads do not survive fork)
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._thread = threading.Thread(target=self._run_forever, name="iums-db-writer", daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+    
+    def run(self, function, *args, **kwargs):
+        """Run function(*args, **kwargs) on the writer thread in the caller's context and return its result"""
+        if threading.current_thread() is self._thread:
+            # A write calling another write (e.g. confirmation sending an alert) runs inline
+            return function(*args, **kwargs)
+        
+        self._ensure_started()
+        future = concurrent.futures.Future()
+        deadline = time.monotonic() + WRITE_QUEUE_TIMEOUT
+        try:
+            self._queue.put((future, contextvars.copy_context(), function, args, kwargs, time.perf_counter()), timeout=WRITE_QUEUE_TIMEOUT)
+        except queue.Full:
+            DB_WRITES.inc(result="rejected")
+            raise sqlite3.OperationalError("database write queue is full")
+        
+        try:
+            return future.result(timeout=max(deadline - time.monotonic(), 0))
+        except concurrent.futures.TimeoutError:
+            # Still queued: cancel it so the writer skips it. Already running: wait for it to finish
+            if future.cancel():
+                DB_WRITES.inc(result="timeout")
+                raise sqlite3.OperationalError("timed out waiting for the database writer")
+            return future.result()
+    
+    def _run_forever(self):
+        while True:
+            future, context, function, args, kwargs, queued_at = self._queue.get()
+            DB_WRITE_WAIT_SECONDS.observe(time.perf_counter() - queued_at)
+            if not future.set_running_or_notify_cancel():
+                continue  # its caller gave up waiting
+            try:
+                future.set_result(context.run(function, *args, **kwargs))
+                DB_WRITES.inc(result="ok")
+            except BaseException as e:
+                future.set_exception(e)
+                DB_WRITES.inc(result="error")
+
+_writer = SerializedWriter(WRITE_QUEUE_SIZE)
+
+def serialized_write(function):
+    """Decorator sending every call through the single writer thread, so writes apply one at a time in order"""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        return _writer.run(function, *args, **kwargs)
+    return wrapper
+
+def get_database_path():
+    """Get the database file the current session is routed to"""
+    shard_file = _active_shard.get()
+    if SHARD_DIR and shard_file:
+        return os.path.join(SHARD_DIR, shard_file)
+    return DB_PATH
+
+# Sharding support
+def is_sharding_enabled():
+    """Check if per-owner sharding mode is enabled"""
+    return bool(SHARD_DIR)
+
+def get_catalog_connection():
+    """Get connection to the shard catalog (username -> shard file directory)"""
+    try:
+        os.makedirs(SHARD_DIR, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(SHARD_DIR, CATALOG_FILE), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS account_directory (
+                username TEXT PRIMARY KEY,
+                role TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                shard_file TEXT NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_account_directory_owner ON account_directory (owner)')
+        return conn
+    except Exception as e:
+        print(f"❌ Catalog connection failed: {e}")
+        return None
+
+def get_shard_file_for_owner(owner):
+    """Get the shard file of an owner, naming a new one if the owner is not in the catalog yet"""
+    conn = get_catalog_connection()
+    if conn:
+        row = conn.execute('SELECT shard_file FROM account_directory WHERE username = ?', (owner,)).fetchone()
+        conn.close()
+        if row:
+            return row[0]
+    
+    # Usernames are case-sensitive but file systems may not be, so add a short hash
+    slug = re.sub(r'[^A-Za-z0-9_-]', '_', owner)[:40]
+    digest = hashlib.sha1(owner.encode('utf-8')).hexdigest()[:8]
+    return f"owner_{slug}_{digest}.db"
+
+def lookup_shard(username):
+    """Find the shard file holding an account, or None if the username is unknown"""
+    conn = get_catalog_connection()
+    if not conn:
+        return None
+    
+    try:
+        row = conn.execute('SELECT shard_file FROM account_directory WHERE username = ?', (username,)).fetchone()
+        conn.close()
+        return row[0] if row else None
+    except Exception as e:
+        conn.close()
+        print(f"❌ Catalog lookup failed: {e}")
+        return None
+
+def register_account(username, role, owner, shard_file):
+    """Record which shard an account lives in"""
+    conn = get_catalog_connection()
+    if not conn:
+        return False
+    
+    try:
+        conn.execute('''
+            INSERT OR REPLACE INTO account_directory (username, role, owner, shard_file)
+            VALUES (?, ?, ?, ?)
+        ''', (username, role, owner, shard_file))
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        conn.close()
+        print(f"❌ Catalog registration failed: {e}")
+        return False
+
+def register_accounts(entries):
+    """Record many (username, role, owner, shard_file) catalog entries in one transaction"""
+    conn = get_catalog_connection()
+    if not conn:
+        return False
+    
+    try:
+        conn.executemany('''
+            INSERT OR REPLACE INTO account_directory (username, role, owner, shard_file)
+            VALUES (?, ?, ?, ?)
+        ''', entries)
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        conn.close()
+        print(f"❌ Catalog registration failed: {e}")
+        return False
+
+def unregister_account(username):
+    """Remove an account from the shard catalog"""
+    conn = get_catalog_connection()
+    if not conn:
+        return False
+    
+    try:
+        conn.execute('DELETE FROM account_directory WHERE username = ?', (username,))
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        conn.close()
+        return False
+
+def rename_catalog_account(old_username, new_username):
+    """Carry a username change into the catalog (the shard file name stays the same)"""
+    conn = get_catalog_connection()
+    if not conn:
+        return False
+    
+    try:
+        conn.execute('UPDATE account_directory SET username = ? WHERE username = ?', (new_username, old_username))
+        conn.execute('UPDATE account_directory SET owner = ? WHERE owner = ?', (new_username, old_username))
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        conn.close()
+        return False
+
+def activate_shard(shard_file):
+    """Route get_connection() to a shard for the current session (None = default database)"""
+    _active_shard.set(shard_file if SHARD_DIR else None)
+    
+    if SHARD_DIR and shard_file and shard_file not in _prepared_shards:
+        # New or not yet seen shard files get the full schema once per process
+        _prepared_shards.add(shard_file)
+        os.makedirs(SHARD_DIR, exist_ok=True)
+        upgrade_schema()
+
+def upgrade_schema():
+    """Create tables and run every schema migration on the currently routed database"""
+    init_database()
+    add_missing_columns()
+    migrate_created_by_field()
+    migrate_money_to_cents()
+    migrate_owner_field()
+    migrate_time_ordered_ids()
+    migrate_day_numbers()
+    migrate_daily_rollups()
+    migrate_payment_allocations()
+
+def get_active_shard():
+    """Get the shard file the current session is routed to"""
+    return _active_shard.get()
+
+def activate_shard_for_user(username):
+    """Look up a user's shard in the catalog and route to it; returns the shard file"""
+    if not SHARD_DIR:
+        return None
+    
+    shard_file = lookup_shard(username)
+    activate_shard(shard_file)
+    return shard_file
+
 def init_database():
     """Initialize database tables with proper default values"""
     conn = get_connection()
@@ -23,40 +430,10 @@ def init_database():
     
     try:
         # Create accounts table WITH created_by field
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS accounts (
-                username TEXT PRIMARY KEY,
-                password TEXT NOT NULL,
-                role TEXT NOT NULL,
-                debt_limit REAL DEFAULT 0,
-                personal_info TEXT,
-                created_date TEXT,
-                created_by TEXT  -- Track who created the account
-            )
-        ''')
+        cursor.execute(ACCOUNTS_TABLE_SQL.format(table='accounts'))
         
         # Create transactions table with proper defaults
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                id TEXT PRIMARY KEY,
-                customer TEXT NOT NULL,
-                type TEXT NOT NULL,
-                description TEXT,
-                amount REAL NOT NULL DEFAULT 0,
-                date TEXT NOT NULL,
-                confirmed INTEGER DEFAULT 0,
-                otp TEXT,
-                created_by TEXT,
-                created_at TEXT,
-                confirmed_at TEXT,
-                status TEXT DEFAULT 'pending',
-                interest_rate REAL DEFAULT 0,
-                interest_amount REAL DEFAULT 0,
-                principal_amount REAL DEFAULT 0,
-                due_date TEXT,
-                FOREIGN KEY (customer) REFERENCES accounts (username)
-            )
-        ''')
+        cursor.execute(TRANSACTIONS_TABLE_SQL.format(table='transactions'))
         
         # Create alerts table
         cursor.execute('''
@@ -67,10 +444,23 @@ def init_database():
                 timestamp TEXT NOT NULL,
                 message TEXT NOT NULL,
                 read INTEGER DEFAULT 0,
+                owner TEXT,
                 FOREIGN KEY (username) REFERENCES accounts (username)
             )
         ''')
         
+        # Create daily rollups table for trend charts
+        cursor.execute(DAILY_ROLLUPS_TABLE_SQL)
+        
+        # Create payment allocations table (payment -> utang settlements)
+        cursor.execute(PAYMENT_ALLOCATIONS_TABLE_SQL)
+        
+        # Create interest accruals ledger (batch accrual on overdue utang)
+        cursor.execute(INTEREST_ACCRUALS_TABLE_SQL)
+        
+        # Create owner data versions (cache invalidation)
+        cursor.execute(OWNER_DATA_VERSIONS_TABLE_SQL)
+        
         # Create system settings table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS system_settings (
@@ -85,7 +475,11 @@ def init_database():
             ('appName', 'IUMS'),
             ('customerCreditLimit', '10000.00'),
             ('interestRate', '3.0'),
-            ('dueDateReminderDays', '7,3,1,0')
+            ('dueDateReminderDays', '7,3,1,0'),
+            ('accrualSchedule', 'monthly'),
+            ('accrualMethod', 'simple'),
+            ('accrualRate', '3.0'),
+            ('accrualGraceDays', '0')
         ]
         
         cursor.executemany('INSERT OR IGNORE INTO system_settings (key, value) VALUES (?, ?)', default_settings)
@@ -131,11 +525,12 @@ def add_missing_columns():
             cursor.execute('ALTER TABLE transactions ADD COLUMN interest_rate REAL DEFAULT 0')
             missing_columns.append('interest_rate')
         
-        if 'interest_amount' not in columns:
+        # Legacy REAL money columns; migrate_money_to_cents() replaces them with *_cents columns
+        if 'interest_amount' not in columns and 'interest_cents' not in columns:
             cursor.execute('ALTER TABLE transactions ADD COLUMN interest_amount REAL DEFAULT 0')
             missing_columns.append('interest_amount')
         
-        if 'principal_amount' not in columns:
+        if 'principal_amount' not in columns and 'principal_cents' not in columns:
             cursor.execute('ALTER TABLE transactions ADD COLUMN principal_amount REAL DEFAULT 0')
             missing_columns.append('principal_amount')
         
@@ -147,9 +542,50 @@ def add_missing_columns():
             cursor.execute('ALTER TABLE transactions ADD COLUMN due_date TEXT')
             missing_columns.append('due_date')
         
+        if 'owner' not in columns:
+            cursor.execute('ALTER TABLE transactions ADD COLUMN owner TEXT')
+            missing_columns.append('owner')
+        
+        # Day-number mirrors of date/due_date; migrate_day_numbers() backfills them
+        if 'date_day' not in columns:
+            cursor.execute('ALTER TABLE transactions ADD COLUMN date_day INTEGER')
+            missing_columns.append('date_day')
+        
+        if 'due_day' not in columns:
+            cursor.execute('ALTER TABLE transactions ADD COLUMN due_day INTEGER')
+            missing_columns.append('due_day')
+        
+        # Settlement state; migrate_payment_allocations() fills it from the payment history
+        if 'remaining_cents' not in columns:
+            cursor.execute('ALTER TABLE transactions ADD COLUMN remaining_cents INTEGER')
+            missing_columns.append('remaining_cents')
+        
+        if 'settlement_status' not in columns:
+            cursor.execute("ALTER TABLE transactions ADD COLUMN settlement_status TEXT DEFAULT 'open'")
+            missing_columns.append('settlement_status')
+        
+        if 'settled_at' not in columns:
+            cursor.execute('ALTER TABLE transactions ADD COLUMN settled_at TEXT')
+            missing_columns.append('settled_at')
+        
+        if 'otp_attempts' not in columns:
+            cursor.execute('ALTER TABLE transactions ADD COLUMN otp_attempts INTEGER DEFAULT 0')
+            missing_columns.append('otp_attempts')
+        
         if missing_columns:
             print(f"✅ Added missing columns to transactions: {', '.join(missing_columns)}")
         
+        # Check alerts table columns
+        cursor.execute("PRAGMA table_info(alerts)")
+        columns = [column[1] for column in cursor.fetchall()]
+        
+        if 'owner' not in columns:
+            cursor.execute('ALTER TABLE alerts ADD COLUMN owner TEXT')
+            print("✅ Added owner column to alerts table")
+        
+        create_indexes(cursor)
+        create_triggers(cursor)
+        
         conn.commit()
         conn.close()
         return True
@@ -160,6 +596,77 @@ def add_missing_columns():
             conn.close()
         return False
 
+def create_indexes(cursor):
+    """Create secondary indexes (safe to re-run; also used after table rebuilds)"""
+    # Indexes for owner-scoped joins (accounts.created_by -> transactions.customer)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_accounts_created_by_role ON accounts (created_by, role)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transactions_customer_confirmed ON transactions (customer, confirmed)')
+    
+    # Indexes for owner dashboards reading the denormalized owner column
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transactions_owner_status_date ON transactions (owner, status, date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_alerts_owner_date ON alerts (owner, date)')
+    
+    # Due-date range scans now only look at unpaid utang (partial indexes below replace these)
+    cursor.execute('DROP INDEX IF EXISTS idx_transactions_type_due_day')
+    cursor.execute('DROP INDEX IF EXISTS idx_transactions_owner_due_day')
+    cursor.execute('DROP INDEX IF EXISTS idx_transactions_customer_due_day')
+    
+    # get_alerts() reads the newest alerts of one user
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_alerts_username_timestamp ON alerts (username, timestamp)')
+    
+    # Partial indexes over unpaid utang only: due-date range scans (check_due_dates,
+    # upcoming/overdue lists, aging) stay small however much history is settled
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_open_due_day ON transactions (due_day)
+        WHERE type = 'utang' AND confirmed = 1 AND remaining_cents > 0
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_owner_open_due_day ON transactions (owner, due_day)
+        WHERE type = 'utang' AND confirmed = 1 AND remaining_cents > 0
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_payment_allocations_payment ON payment_allocations (payment_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_payment_allocations_utang ON payment_allocations (utang_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_payment_allocations_customer ON payment_allocations (customer)')
+    
+    # Compound accrual joins open utang to the accrual entries that created them
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_interest_accruals_transaction ON interest_accruals (transaction_id)')
+
+def create_triggers(cursor):
+    """Create the owner data version triggers on transactions (safe to re-run; also used after table rebuilds)"""
+    cursor.execute(OWNER_DATA_VERSIONS_TABLE_SQL)
+    bump = '''
+        INSERT INTO owner_data_versions (owner, version) SELECT {row}.owner, 1 WHERE {row}.owner IS NOT NULL {extra}
+        ON CONFLICT (owner) DO UPDATE SET version = version + 1;
+    '''
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_version_insert AFTER INSERT ON transactions
+        BEGIN {bump.format(row="NEW", extra="")} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_version_update AFTER UPDATE ON transactions
+        BEGIN
+            {bump.format(row="OLD", extra="")}
+            {bump.format(row="NEW", extra="AND NEW.owner IS NOT OLD.owner")}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_version_delete AFTER DELETE ON transactions
+        BEGIN {bump.format(row="OLD", extra="")} END
+    ''')
+
+def rebuild_table(cursor, table, create_sql, select_columns):
+    """Rebuild a table with a new definition, copying rows with the given SELECT expressions"""
+    cursor.execute(f"DROP TABLE IF EXISTS {table}_rebuild")
+    cursor.execute(create_sql.format(table=f"{table}_rebuild"))
+    
+    cursor.execute(f"PRAGMA table_info({table}_rebuild)")
+    new_columns = [column[1] for column in cursor.fetchall()]
+    expressions = ', '.join(select_columns.get(column, column) for column in new_columns)
+    
+    cursor.execute(f"INSERT INTO {table}_rebuild ({', '.join(new_columns)}) SELECT {expressions} FROM {table}")
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {table}_rebuild RENAME TO {table}")
+
 def migrate_created_by_field():
     """Ensure all accounts have a created_by value"""
     conn = get_connection()
@@ -182,6 +689,280 @@ def migrate_created_by_field():
             conn.close()
         return False
 
+def migrate_owner_field():
+    """Backfill the owner column on transactions and alerts from accounts.created_by"""
+    conn = get_connection()
+    if not conn:
+        return False
+        
+    cursor = conn.cursor()
+    
+    try:
+        # Owners own their own rows; customers belong to the owner who created them
+        owner_of = '''
+            SELECT CASE WHEN a.role = 'Owner' THEN a.username ELSE a.created_by END
+            FROM accounts a WHERE a.username = {column}
+        '''
+        cursor.execute(f"UPDATE transactions SET owner = ({owner_of.format(column='transactions.customer')}) WHERE owner IS NULL")
+        transactions_updated = cursor.rowcount
+        cursor.execute(f"UPDATE alerts SET owner = ({owner_of.format(column='alerts.username')}) WHERE owner IS NULL")
+        alerts_updated = cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        if transactions_updated or alerts_updated:
+            print(f"✅ Backfilled owner for {transactions_updated} transactions and {alerts_updated} alerts")
+        return True
+    except Exception as e:
+        print(f"❌ Error migrating owner field: {e}")
+        if conn:
+            conn.close()
+        return False
+
+def migrate_time_ordered_ids():
+    """Replace random uuid4 transaction/alert IDs with time-ordered ULIDs"""
+    conn = get_connection()
+    if not conn:
+        return False
+        
+    cursor = conn.cursor()
+    
+    def _timestamp_ms(value):
+        try:
+            return int(datetime.fromisoformat(value).timestamp() * 1000)
+        except (TypeError, ValueError):
+            return None
+    
+    try:
+        migrated = 0
+        # uuid4 IDs are the only ones with dashes; ULIDs never contain them
+        for table, time_column in (('transactions', 'created_at'), ('alerts', 'timestamp')):
+            cursor.execute(f"SELECT id, {time_column} FROM {table} WHERE id LIKE '%-%' ORDER BY {time_column}")
+            rows = cursor.fetchall()
+            
+            updates = []
+            for row in rows:
+                timestamp_ms = _timestamp_ms(row[1])
+                updates.append((new_ulid(timestamp_ms) if timestamp_ms is not None else new_ulid(), row[0]))
+            
+            cursor.executemany(f"UPDATE {table} SET id = ? WHERE id = ?", updates)
+            migrated += len(updates)
+        
+        conn.commit()
+        
+        if migrated:
+            # Rewrite the primary key B-trees that the random keys left fragmented
+            conn.execute("VACUUM")
+            print(f"✅ Migrated {migrated} IDs to time-ordered ULIDs")
+        
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"❌ Error migrating IDs: {e}")
+        if conn:
+            conn.close()
+        return False
+
+def migrate_money_to_cents():
+    """Convert REAL peso columns (amount, interest, principal, debt limit) to INTEGER cents"""
+    conn = get_connection()
+    if not conn:
+        return False
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("PRAGMA table_info(transactions)")
+        transaction_columns = [column[1] for column in cursor.fetchall()]
+        cursor.execute("PRAGMA table_info(accounts)")
+        account_columns = [column[1] for column in cursor.fetchall()]
+        
+        if 'amount_cents' in transaction_columns and 'debt_limit_cents' in account_columns:
+            conn.close()
+            return True
+        
+        to_cents = "CAST(ROUND(COALESCE({column}, 0) * 100) AS INTEGER)"
+        
+        # Rebuild (not ALTER) so the old REAL columns are actually dropped from every row
+        cursor.execute("BEGIN")
+        if 'amount_cents' not in transaction_columns:
+            rebuild_table(cursor, 'transactions', TRANSACTIONS_TABLE_SQL, {
+                'amount_cents': to_cents.format(column='amount'),
+                'interest_cents': to_cents.format(column='interest_amount'),
+                'principal_cents': f"CAST(ROUND(COALESCE(principal_amount, amount, 0) * 100) AS INTEGER)"
+            })
+        if 'debt_limit_cents' not in account_columns:
+            rebuild_table(cursor, 'accounts', ACCOUNTS_TABLE_SQL, {
+                'debt_limit_cents': to_cents.format(column='debt_limit')
+            })
+        create_indexes(cursor)
+        create_triggers(cursor)
+        
+        conn.commit()
+        conn.execute("VACUUM")
+        conn.close()
+        print("✅ Migrated money columns to integer cents")
+        return True
+    except Exception as e:
+        print(f"❌ Error migrating money columns: {e}")
+        if conn:
+            conn.rollback()
+            conn.close()
+        return False
+
+def migrate_day_numbers():
+    """Backfill the date_day/due_day INTEGER columns from the date/due_date text columns"""
+    conn = get_connection()
+    if not conn:
+        return False
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(f"""
+            UPDATE transactions SET date_day = {SQL_DAY_NUMBER.format(column='date')}
+            WHERE date_day IS NULL AND date IS NOT NULL AND date != ''
+        """)
+        dates_updated = cursor.rowcount
+        cursor.execute(f"""
+            UPDATE transactions SET due_day = {SQL_DAY_NUMBER.format(column='due_date')}
+            WHERE due_day IS NULL AND due_date IS NOT NULL AND due_date != ''
+        """)
+        due_dates_updated = cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        if dates_updated or due_dates_updated:
+            print(f"✅ Backfilled day numbers for {dates_updated} dates and {due_dates_updated} due dates")
+        return True
+    except Exception as e:
+        print(f"❌ Error migrating day numbers: {e}")
+        if conn:
+            conn.close()
+        return False
+
+# Daily rollups
+def upsert_daily_rollups(cursor, entries):
+    """Add (owner, day, type, status, count, amount, principal, interest) deltas to daily_rollups"""
+    entries = list(entries)
+    cursor.executemany('''
+        INSERT INTO daily_rollups (owner, day, type, status, txn_count, amount_cents, principal_cents, interest_cents)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (owner, day, type, status) DO UPDATE SET
+            txn_count = txn_count + excluded.txn_count,
+            amount_cents = amount_cents + excluded.amount_cents,
+            principal_cents = principal_cents + excluded.principal_cents,
+            interest_cents = interest_cents + excluded.interest_cents
+    ''', entries)
+    # Only rows that just lost transactions can have dropped to zero; delete those by primary key
+    cursor.executemany('''
+        DELETE FROM daily_rollups
+        WHERE owner = ? AND day = ? AND type = ? AND status = ? AND txn_count = 0
+    ''', [entry[:4] for entry in entries if entry[4] < 0])
+
+def update_daily_rollups(cursor, where_sql, params, sign=1):
+    """Add (sign=1) or remove (sign=-1) the confirmed transactions matching where_sql from daily_rollups.
+    
+    Call inside the same transaction as the change it mirrors: after confirming rows, before deleting them.
+    """
+    cursor.execute(f'''
+        SELECT owner, {ROLLUP_DAY}, type, status, COUNT(*),
+               SUM(amount_cents), SUM(COALESCE(principal_cents, 0)), SUM(COALESCE(interest_cents, 0))
+        FROM transactions
+        WHERE confirmed = 1 AND owner IS NOT NULL AND ({where_sql})
+        GROUP BY 1, 2, 3, 4
+    ''', params)
+    entries = [
+        (row[0], row[1], row[2], row[3], sign * row[4], sign * row[5], sign * row[6], sign * row[7])
+        for row in cursor.fetchall()
+    ]
+    if entries:
+        upsert_daily_rollups(cursor, entries)
+
+def rebuild_daily_rollups(owner=None):
+    """Recompute daily_rollups from the transactions table (for one owner, or everyone)"""
+    conn = get_connection()
+    if not conn:
+        return False
+        
+    cursor = conn.cursor()
+    
+    owner_clause = "AND owner = ?" if owner else ""
+    params = (owner,) if owner else ()
+    
+    try:
+        cursor.execute(f"DELETE FROM daily_rollups WHERE 1 = 1 {owner_clause}", params)
+        cursor.execute(f'''
+            INSERT INTO daily_rollups (owner, day, type, status, txn_count, amount_cents, principal_cents, interest_cents)
+            SELECT owner, {ROLLUP_DAY}, type, status, COUNT(*),
+                   SUM(amount_cents), SUM(COALESCE(principal_cents, 0)), SUM(COALESCE(interest_cents, 0))
+            FROM transactions
+            WHERE confirmed = 1 AND owner IS NOT NULL {owner_clause}
+            GROUP BY 1, 2, 3, 4
+        ''', params)
+        rows = cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        print(f"✅ Rebuilt {rows} daily rollup rows")
+        return True
+    except Exception as e:
+        print(f"❌ Error rebuilding daily rollups: {e}")
+        if conn:
+            conn.close()
+        return False
+
+def migrate_daily_rollups():
+    """Build daily_rollups the first time if it is empty but confirmed transactions exist"""
+    conn = get_connection()
+    if not conn:
+        return False
+    
+    try:
+        has_rollups = conn.execute('SELECT 1 FROM daily_rollups LIMIT 1').fetchone()
+        has_confirmed = conn.execute('SELECT 1 FROM transactions WHERE confirmed = 1 AND owner IS NOT NULL LIMIT 1').fetchone()
+        conn.close()
+    except Exception as e:
+        print(f"❌ Error checking daily rollups: {e}")
+        conn.close()
+        return False
+    
+    if has_rollups or not has_confirmed:
+        return True
+    return rebuild_daily_rollups()
+
+# Payment allocations
+def migrate_payment_allocations():
+    """Fill remaining_cents/settlement_status and allocate past payments for customers not yet allocated"""
+    conn = get_connection()
+    if not conn:
+        return False
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('SELECT DISTINCT customer FROM transactions WHERE remaining_cents IS NULL')
+        customers = [row[0] for row in cursor.fetchall()]
+        if not customers:
+            conn.close()
+            return True
+        
+        # Replay each customer's whole history so allocations follow the same oldest-first order
+        settled = 0
+        for customer in customers:
+            settled += len(rebuild_customer_allocations(cursor, customer))
+        
+        conn.commit()
+        conn.close()
+        print(f"✅ Allocated payments for {len(customers)} customers ({settled} utang settled)")
+        return True
+    except Exception as e:
+        print(f"❌ Error migrating payment allocations: {e}")
+        if conn:
+            conn.rollback()
+            conn.close()
+        return False
+
 def migrate_from_json():
     """Migrate data from old JSON format to database"""
     if not os.path.exists('data.json'):
@@ -206,13 +987,13 @@ def migrate_from_json():
                 
                 cursor.execute('''
                     INSERT OR IGNORE INTO accounts 
-                    (username, password, role, debt_limit, personal_info, created_date, created_by)
+                    (username, password, role, debt_limit_cents, personal_info, created_date, created_by)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     username,
                     account_data.get('password', ''),
                     account_data.get('role', 'Customer'),
-                    account_data.get('debtLimit', 10000.00),
+                    to_cents(account_data.get('debtLimit', 10000.00)),
                     personal_info_json,
                     account_data.get('created_date', datetime.now().isoformat()),
                     created_by
@@ -221,19 +1002,20 @@ def migrate_from_json():
         # Migrate transactions
         if 'transactions' in old_data:
             for transaction_id, transaction_data in old_data['transactions'].items():
-                due_date = transaction_data.get('due_date') or (datetime.strptime(transaction_data.get('date', datetime.now().strftime('%Y-%m-%d')), '%Y-%m-%d') + timedelta(days=30)).strftime('%Y-%m-%d')
+                transaction_date = transaction_data.get('date', datetime.now().strftime('%Y-%m-%d'))
+                due_date = transaction_data.get('due_date') or (datetime.strptime(transaction_date, '%Y-%m-%d') + timedelta(days=30)).strftime('%Y-%m-%d')
                 
                 cursor.execute('''
                     INSERT OR IGNORE INTO transactions 
-                    (id, customer, type, description, amount, date, confirmed, otp, created_by, created_at, confirmed_at, status, interest_rate, interest_amount, principal_amount, due_date)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    (id, customer, type, description, amount_cents, date, confirmed, otp, created_by, created_at, confirmed_at, status, interest_rate, interest_cents, principal_cents, due_date, date_day, due_day)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     transaction_id,
                     transaction_data.get('customer', ''),
                     transaction_data.get('type', 'utang'),
                     transaction_data.get('description', ''),
-                    transaction_data.get('amount', 0),
-                    transaction_data.get('date', datetime.now().strftime('%Y-%m-%d')),
+                    to_cents(transaction_data.get('amount', 0)),
+                    transaction_date,
                     int(transaction_data.get('confirmed', False)),
                     transaction_data.get('otp', ''),
                     transaction_data.get('created_by', 'system'),
@@ -241,9 +1023,11 @@ def migrate_from_json():
                     transaction_data.get('confirmed_at', ''),
                     transaction_data.get('status', 'confirmed' if transaction_data.get('confirmed') else 'pending'),
                     transaction_data.get('interest_rate', 0),
-                    transaction_data.get('interest_amount', 0),
-                    transaction_data.get('principal_amount', transaction_data.get('amount', 0)),
-                    due_date
+                    to_cents(transaction_data.get('interest_amount', 0)),
+                    to_cents(transaction_data.get('principal_amount', transaction_data.get('amount', 0))),
+                    due_date,
+                    to_day_number(transaction_date),
+                    to_day_number(due_date)
                 ))
         
         conn.commit()
@@ -270,7 +1054,7 @@ def check_database_health():
         # Check if all tables exist
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
         tables = [row[0] for row in cursor.fetchall()]
-        required_tables = ['accounts', 'transactions', 'alerts', 'system_settings']
+        required_tables = ['accounts', 'transactions', 'alerts', 'system_settings', 'daily_rollups', 'payment_allocations', 'interest_accruals']
         
         missing_tables = [table for table in required_tables if table not in tables]
         if missing_tables:
@@ -289,7 +1073,7 @@ def check_database_health():
         # Check transactions table structure
         cursor.execute("PRAGMA table_info(transactions)")
         columns = [column[1] for column in cursor.fetchall()]
-        required_columns = ['interest_rate', 'interest_amount', 'principal_amount', 'status', 'due_date']
+        required_columns = ['interest_rate', 'status', 'due_date', 'owner', 'due_day', 'remaining_cents']
         
         missing_columns = [col for col in required_columns if col not in columns]
         if missing_columns:
@@ -303,4 +1087,123 @@ def check_database_health():
     except Exception as e:
         if conn:
             conn.close()
-        return False, f"Database health check failed: {str(e)}"
\ No newline at end of file
+        return False, f"Database health check failed: {str(e)}"
+
+def split_database_into_shards(source_path=None, shard_dir=None):
+    """Split a single-file database into per-owner shard files and build the catalog"""
+    global SHARD_DIR, DB_PATH
+    source_path = source_path or DB_PATH
+    if shard_dir:
+        SHARD_DIR = shard_dir
+    if not SHARD_DIR:
+        return False, "No shard directory configured (set IUMS_SHARD_DIR or pass shard_dir)"
+    if not os.path.exists(source_path):
+        return False, f"Source database not found: {source_path}"
+    
+    previous_shard = _active_shard.get()
+    
+    # Bring the source up to the current schema so columns line up with the shards
+    default_path = DB_PATH
+    DB_PATH = source_path
+    _active_shard.set(None)
+    upgrade_schema()
+    DB_PATH = default_path
+    
+    source = sqlite3.connect(source_path)
+    source.row_factory = sqlite3.Row
+    
+    try:
+        # Owners own themselves; customers (and anything without an owner account) follow created_by
+        accounts = source.execute('''
+            SELECT username, role,
+                   CASE WHEN role = 'Owner' THEN username ELSE COALESCE(created_by, 'system') END AS owner
+            FROM accounts
+        ''').fetchall()
+        
+        owners = sorted({row["owner"] for row in accounts})
+        summary = {}
+        
+        for owner in owners:
+            shard_file = get_shard_file_for_owner(owner)
+            activate_shard(shard_file)
+            
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.execute("ATTACH DATABASE ? AS src", (source_path,))
+            
+            owner_accounts = '''
+                SELECT username FROM src.accounts
+                WHERE CASE WHEN role = 'Owner' THEN username ELSE COALESCE(created_by, 'system') END = ?
+            '''
+            copies = {
+                'accounts': f"username IN ({owner_accounts})",
+                'transactions': f"customer IN ({owner_accounts})",
+                'alerts': f"username IN ({owner_accounts})",
+                'payment_allocations': f"customer IN ({owner_accounts})",
+                'interest_accruals': f"customer IN ({owner_accounts})",
+                'system_settings': "1 = 1"
+            }
+            
+            counts = {}
+            for table, where in copies.items():
+                # Copy only the columns both schemas have (the source may predate newer columns)
+                cursor.execute(f"PRAGMA main.table_info({table})")
+                target_columns = [column[1] for column in cursor.fetchall()]
+                cursor.execute(f"PRAGMA src.table_info({table})")
+                source_columns = {column[1] for column in cursor.fetchall()}
+                columns = ', '.join(c for c in target_columns if c in source_columns)
+                
+                params = () if table == 'system_settings' else (owner,)
+                cursor.execute(f"INSERT OR REPLACE INTO main.{table} ({columns}) SELECT {columns} FROM src.{table} WHERE {where}", params)
+                counts[table] = cursor.rowcount
+            
+            conn.commit()
+            cursor.execute("DETACH DATABASE src")
+            conn.close()
+            
+            # Fill the owner column for copied rows, then register every account
+            migrate_owner_field()
+            register_accounts([
+                (row["username"], row["role"], owner, shard_file) for row in accounts if row["owner"] == owner
+            ])
+            rebuild_daily_rollups()
+            
+            summary[owner] = {"shard_file": shard_file, **counts}
+        
+        source.close()
+        print(f"✅ Split {source_path} into {len(summary)} shards in {SHARD_DIR}")
+        return True, summary
+    except Exception as e:
+        source.close()
+        print(f"❌ Shard split failed: {e}")
+        return False, f"Shard split failed: {str(e)}"
+    finally:
+        activate_shard(previous_shard)
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="IUMS database maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    split_parser = subparsers.add_parser("split-shards", help="Split a database into per-owner shard files")
+    split_parser.add_argument("--source", default=DB_PATH, help="Database to split (default: %(default)s)")
+    split_parser.add_argument("--shard-dir", default=SHARD_DIR or "shards", help="Output directory for shard files")
+    rollup_parser = subparsers.add_parser("rebuild-rollups", help="Recompute the daily_rollups table from transactions")
+    rollup_parser.add_argument("--owner", help="Only rebuild this owner's rollups")
+    args = parser.parse_args()
+    
+    if args.command == "split-shards":
+        success, result = split_database_into_shards(args.source, args.shard_dir)
+        if success:
+            for owner, info in result.items():
+                print(f"  {owner}: {info}")
+        else:
+            print(result)
+    elif args.command == "rebuild-rollups":
+        if is_sharding_enabled():
+            for shard_path in sorted(os.listdir(SHARD_DIR)):
+                if shard_path.startswith("owner_") and shard_path.endswith(".db"):
+                    activate_shard(shard_path)
+                    rebuild_daily_rollups(args.owner)
+        else:
+            rebuild_daily_rollups(args.owner)
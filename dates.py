@@ -0,0 +1,30 @@
+from datetime import date, datetime, timedelta
+
+# Transaction and due dates are also stored as INTEGER day numbers (days since
+# 1970-01-01) so due-date filters are plain range predicates on an index and
+# days-until-due is a subtraction instead of parsing 'YYYY-MM-DD' text per row.
+
+EPOCH = date(1970, 1, 1)
+
+# SQLite expression converting a 'YYYY-MM-DD' text column to a day number (2440587.5 = julianday of the epoch)
+SQL_DAY_NUMBER = "CAST(julianday({column}) - 2440587.5 AS INTEGER)"
+
+def to_day_number(value):
+    """Convert a date, datetime or 'YYYY-MM-DD' string to a day number (None for empty values)"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        value = value.date()
+    elif isinstance(value, str):
+        value = datetime.strptime(value[:10], '%Y-%m-%d').date()
+    return (value - EPOCH).days
+
+def from_day_number(day_number):
+    """Convert a day number back to a 'YYYY-MM-DD' string"""
+    if day_number is None:
+        return None
+    return (EPOCH + timedelta(days=int(day_number))).strftime('%Y-%m-%d')
+
+def today_day_number():
+    """Get today's day number"""
+    return to_day_number(datetime.now())
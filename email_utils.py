@@ -1,8 +1,30 @@
 import smtplib
 import os
+import functools
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import streamlit as st
+from metrics import counter, histogram
+
+# Send outcomes (sent, failed, or skipped when email is not configured) and SMTP latency
+EMAIL_SENDS = counter("iums_email_sends_total", "Email send attempts by kind and result", ["kind", "result"])
+EMAIL_SEND_SECONDS = histogram("iums_email_send_seconds", "Email send time in seconds (SMTP connect, login and send)", ["kind"])
+
+def track_send(kind):
+    """Decorator counting and timing an EmailService send method by outcome"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.is_configured:
+                EMAIL_SENDS.inc(kind=kind, result="skipped")
+                return method(self, *args, **kwargs)
+            with EMAIL_SEND_SECONDS.time(kind=kind):
+                sent = method(self, *args, **kwargs)
+            EMAIL_SENDS.inc(kind=kind, result="sent" if sent else "failed")
+            return sent
+        return wrapper
+    return decorator
 
 class EmailService:
     def __init__(self):
@@ -34,6 +56,8 @@ class EmailService:
             
             # Option 2: Streamlit secrets (for deployment)
             try:
+                # Imported here so the services layer can send mail without Streamlit installed
+                import streamlit as st
                 if hasattr(st, 'secrets') and 'email' in st.secrets:
                     self.sender_email = st.secrets['email']['username']
                     self.sender_password = st.secrets['email']['password']
@@ -82,6 +106,7 @@ class EmailService:
             print(f"❌ SMTP connection failed: {e}")
             return False
     
+    @track_send("otp")
     def send_otp_email(self, recipient_email, customer_name, otp_code, transaction_type, amount, description, due_date=None):
         """Send OTP email to customer"""
         if not self.is_configured:
@@ -198,6 +223,7 @@ class EmailService:
             print(f"❌ Error sending OTP email: {e}")
             return False
     
+    @track_send("due_date_reminder")
     def send_due_date_reminder(self, recipient_email, customer_name, description, amount, due_date, days_until_due):
         """Send due date reminder email"""
         if not self.is_configured:
@@ -267,8 +293,30 @@ class EmailService:
             print(f"❌ Error sending due date reminder: {e}")
             return False
 
-# Create global instance
+class AsyncEmailTransport:
+    """Awaitable EmailService sends, run on a small pool of SMTP threads of their own"""
+    def __init__(self, service, max_workers=4):
+        self.service = service
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="iums-smtp")
+    
+    @property
+    def is_configured(self):
+        return self.service.is_configured
+    
+    async def _run(self, method, *args, **kwargs):
+        # A slow SMTP server ties up these threads only, never the database pool or the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+    
+    async def send_otp_email(self, *args, **kwargs):
+        return await self._run(self.service.send_otp_email, *args, **kwargs)
+    
+    async def send_due_date_reminder(self, *args, **kwargs):
+        return await self._run(self.service.send_due_date_reminder, *args, **kwargs)
+
+# Create global instances
 email_service = EmailService()
+async_email_transport = AsyncEmailTransport(email_service, int(os.getenv("IUMS_SMTP_WORKERS", "4")))
 
 # Test on import
 print("🔧 Initializing Email Service...")
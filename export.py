@@ -0,0 +1,155 @@
+"""Streaming exports of an owner's transactions, balances and due-date list.
+
+Rows are read with fetchmany() in fixed-size batches and written straight to
+the output (CSV text or a write-only XLSX workbook), so memory use does not
+grow with the size of the history.
+
+This bounds memory only while the export is built. Streamlit's
+st.download_button reads the whole finished file into memory to serve it, so a
+dashboard download still holds one copy of the export; very large exports
+should be written straight to disk with write_csv()/write_xlsx() instead.
+"""
+import csv
+import io
+import tempfile
+
+from database import get_read_connection
+from money import from_cents
+from dates import today_day_number
+
+FETCH_BATCH_SIZE = 1000
+
+# Each dataset: column headers, owner-scoped query, and which columns hold cents
+EXPORT_DATASETS = {
+    "transactions": {
+        "label": "Transactions",
+        "headers": ["ID", "Date", "Customer", "Type", "Description", "Status", "Confirmed",
+                    "Amount", "Principal", "Interest", "Interest Rate", "Due Date", "Created By", "Created At", "Confirmed At"],
+        "sql": '''
+            SELECT id, date, customer, type, description, status, confirmed,
+                   amount_cents, principal_cents, interest_cents, interest_rate, due_date,
+                   created_by, created_at, confirmed_at
+            FROM transactions
+            WHERE owner = ?
+            ORDER BY date_day, id
+        ''',
+        "params": lambda owner_username: (owner_username,),
+        "cents_columns": {7, 8, 9}
+    },
+    "balances": {
+        "label": "Customer Balances",
+        "headers": ["Customer", "Debt Limit", "Total Utang", "Total Payments", "Outstanding", "Total Interest"],
+        "sql": '''
+            SELECT a.username,
+                   a.debt_limit_cents,
+                   COALESCE(SUM(CASE WHEN t.type = 'utang' THEN t.amount_cents ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN t.type = 'payment' THEN t.amount_cents ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN t.type = 'utang' THEN t.amount_cents ELSE -t.amount_cents END), 0),
+                   COALESCE(SUM(t.interest_cents), 0)
+            FROM accounts a
+            LEFT JOIN transactions t ON t.customer = a.username AND t.confirmed = 1
+            WHERE a.created_by = ? AND a.role = 'Customer'
+            GROUP BY a.username
+            ORDER BY a.username
+        ''',
+        "params": lambda owner_username: (owner_username,),
+        "cents_columns": {1, 2, 3, 4, 5}
+    },
+    "due_dates": {
+        "label": "Due Dates (Unpaid Utang)",
+        "headers": ["Customer", "Description", "Amount", "Remaining", "Due Date", "Days Until Due", "Customer Outstanding"],
+        "sql": '''
+            SELECT t.customer, t.description, t.amount_cents, t.remaining_cents, t.due_date, t.due_day - ?, b.outstanding_cents
+            FROM transactions t
+            JOIN (
+                SELECT customer, SUM(CASE WHEN type = 'utang' THEN amount_cents ELSE -amount_cents END) AS outstanding_cents
+                FROM transactions
+                WHERE owner = ? AND confirmed = 1
+                GROUP BY customer
+                HAVING outstanding_cents > 0
+            ) b ON b.customer = t.customer
+            WHERE t.owner = ? AND t.type = 'utang' AND t.confirmed = 1 AND t.remaining_cents > 0 AND t.due_day IS NOT NULL
+            ORDER BY t.due_day
+        ''',
+        "params": lambda owner_username: (today_day_number(), owner_username, owner_username),
+        "cents_columns": {2, 3, 6}
+    }
+}
+
+EXPORT_FORMATS = {
+    "csv": {"label": "CSV", "extension": "csv", "mime": "text/csv"},
+    "xlsx": {"label": "Excel (XLSX)", "extension": "xlsx", "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"}
+}
+
+def iter_export_rows(dataset, owner_username, batch_size=FETCH_BATCH_SIZE):
+    """Yield formatted rows of an export dataset, fetching batch_size rows at a time"""
+    spec = EXPORT_DATASETS[dataset]
+    cents_columns = spec["cents_columns"]
+
+    conn = get_read_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute(spec["sql"], spec["params"](owner_username))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield [from_cents(value) if index in cents_columns else value for index, value in enumerate(row)]
+    finally:
+        conn.close()
+
+def stream_csv(dataset, owner_username, batch_size=FETCH_BATCH_SIZE):
+    """Yield an export as CSV text chunks (one chunk per fetched batch)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_DATASETS[dataset]["headers"])
+
+    for count, row in enumerate(iter_export_rows(dataset, owner_username, batch_size), 1):
+        writer.writerow(row)
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+def write_csv(dataset, owner_username, file_obj, batch_size=FETCH_BATCH_SIZE):
+    """Write an export as CSV to a text file object"""
+    for chunk in stream_csv(dataset, owner_username, batch_size):
+        file_obj.write(chunk)
+
+def write_xlsx(dataset, owner_username, file_obj, batch_size=FETCH_BATCH_SIZE):
+    """Write an export as an XLSX workbook using openpyxl's write-only (streaming) mode"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(EXPORT_DATASETS[dataset]["label"][:31])
+    sheet.append(EXPORT_DATASETS[dataset]["headers"])
+    for row in iter_export_rows(dataset, owner_username, batch_size):
+        sheet.append(row)
+    workbook.save(file_obj)
+
+def export_to_file(dataset, owner_username, export_format="csv"):
+    """Export to an unnamed temporary file (rewound) and return it with its file name and MIME type; the caller must close the file"""
+    spec = EXPORT_FORMATS[export_format]
+    file_name = f"{owner_username}_{dataset}.{spec['extension']}"
+
+    export_file = tempfile.TemporaryFile()
+    try:
+        if export_format == "xlsx":
+            write_xlsx(dataset, owner_username, export_file)
+        else:
+            text_file = io.TextIOWrapper(export_file, encoding="utf-8", newline="")
+            write_csv(dataset, owner_username, text_file)
+            text_file.flush()
+            text_file.detach()
+    except Exception:
+        export_file.close()
+        raise
+
+    export_file.seek(0)
+    return export_file, file_name, spec["mime"]
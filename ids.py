@@ -0,0 +1,45 @@
+import os
+import time
+import threading
+
+# Crockford base32 alphabet used by ULIDs (no I, L, O, U)
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+_lock = threading.Lock()
+_last_timestamp = 0
+_last_random = 0
+
+def _encode(value, length):
+    """Encode an integer as fixed-width Crockford base32"""
+    chars = []
+    for _ in range(length):
+        chars.append(_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+def new_ulid(timestamp_ms=None):
+    """Generate a 26-character time-ordered ID (48-bit millisecond timestamp + 80 random bits)"""
+    global _last_timestamp, _last_random
+    
+    if timestamp_ms is not None:
+        # Explicit timestamps (migrations) do not take part in the monotonic sequence
+        return _encode(int(timestamp_ms), 10) + _encode(int.from_bytes(os.urandom(10), "big"), 16)
+    
+    # IDs sort in creation order, so new rows append to the end of the primary key B-tree
+    with _lock:
+        now = int(time.time() * 1000)
+        if now <= _last_timestamp:
+            # Same (or earlier) millisecond: bump the random part to stay ordered
+            now = _last_timestamp
+            _last_random = (_last_random + 1) & ((1 << 80) - 1)
+        else:
+            _last_timestamp = now
+            _last_random = int.from_bytes(os.urandom(10), "big") >> 1  # leave headroom for increments
+        return _encode(now, 10) + _encode(_last_random, 16)
+
+def ulid_timestamp(ulid):
+    """Get the millisecond timestamp encoded in a ULID"""
+    value = 0
+    for char in ulid[:10]:
+        value = value * 32 + _ALPHABET.index(char)
+    return value
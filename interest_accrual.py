@@ -0,0 +1,293 @@
+"""Batch interest accrual on overdue utang.
+
+A run charges interest for one period (a day, or a calendar month) on every
+customer's overdue balance: the unpaid remainder of utang past its due date
+(plus grace days) at the end of the period. Remainders are taken as of that
+day from the payment allocations, so a catch-up run charges each past period
+on what was unpaid then, not on today's balance. Compound accrual also charges
+interest on earlier accruals that are still unpaid. Per-customer bases and
+amounts are computed with NumPy over all open utang at once, and each accrual
+is written in bulk as a confirmed utang entry ("Interest accrual <period>"),
+due ACCRUAL_DUE_DAYS after it is charged, plus a row in the interest_accruals
+ledger. Only periods that have fully ended (by yesterday) are ever charged.
+
+Runs are idempotent: a customer is charged at most once per schedule and
+period, so a nightly job can simply be re-run or catch up on missed periods.
+
+    python interest_accrual.py [--date YYYY-MM-DD] [--schedule daily|monthly]
+                               [--method simple|compound] [--rate 3.0] [--catch-up-from YYYY-MM-DD]
+"""
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from database import (
+    get_connection, serialized_write, upsert_daily_rollups, is_sharding_enabled, activate_shard, SHARD_DIR
+)
+from allocations import allocate_customer_payments
+from ids import new_ulid
+from dates import to_day_number, from_day_number, today_day_number
+
+SCHEDULES = ("daily", "monthly")
+METHODS = ("simple", "compound")
+
+# Days the customer has to pay an accrual entry (counted from the run that charges it)
+ACCRUAL_DUE_DAYS = 30
+
+# system_settings keys and defaults; accrualRate is a percent per month
+DEFAULT_SETTINGS = {
+    "accrualSchedule": "monthly",
+    "accrualMethod": "simple",
+    "accrualRate": "3.0",
+    "accrualGraceDays": "0"
+}
+
+def get_accrual_settings(cursor):
+    """Read the accrual settings directly from system_settings (no Streamlit needed)"""
+    placeholders = ", ".join("?" * len(DEFAULT_SETTINGS))
+    cursor.execute(f"SELECT key, value FROM system_settings WHERE key IN ({placeholders})", tuple(DEFAULT_SETTINGS))
+    values = {**DEFAULT_SETTINGS, **{row[0]: row[1] for row in cursor.fetchall()}}
+    return {
+        "schedule": values["accrualSchedule"] if values["accrualSchedule"] in SCHEDULES else "monthly",
+        "method": values["accrualMethod"] if values["accrualMethod"] in METHODS else "simple",
+        "monthly_rate": float(values["accrualRate"]),
+        "grace_days": int(float(values["accrualGraceDays"]))
+    }
+
+def get_period(as_of_day, schedule):
+    """Get (period key, last day number) of the latest period that has ended on or before as_of_day"""
+    if schedule == "daily":
+        return from_day_number(as_of_day), as_of_day
+
+    # Monthly: the month of as_of_day if it is that month's last day, else the month before
+    as_of = datetime.strptime(from_day_number(as_of_day), '%Y-%m-%d')
+    if (as_of + timedelta(days=1)).month == as_of.month:
+        as_of = as_of.replace(day=1) - timedelta(days=1)
+    return as_of.strftime('%Y-%m'), to_day_number(as_of)
+
+def last_ended_day():
+    """Day number of the last day that has fully ended (yesterday); later periods cannot be accrued yet"""
+    return today_day_number() - 1
+
+def period_rate(monthly_rate, schedule):
+    """Interest for one period as a fraction (a daily rate is the monthly rate spread over 365/12 days)"""
+    if schedule == "daily":
+        return monthly_rate / 100 * 12 / 365
+    return monthly_rate / 100
+
+def load_open_utang(cursor, period_end_day, owner_username=None):
+    """Load every utang open at the end of period_end_day as NumPy columns, flagging the ones that are accrual entries
+
+    The remainder is taken as of that day: allocations from payments dated later are added
+    back, so utang settled since then count, and entries dated later (including accruals of
+    later periods) do not. Accrual entries only count for periods after their own.
+    """
+    owner_clause = "AND {table}.owner = ?" if owner_username else ""
+    owner_params = (owner_username,) if owner_username else ()
+    cursor.execute(f'''
+        WITH candidates AS (
+            SELECT id FROM transactions t
+            WHERE t.type = 'utang' AND t.confirmed = 1 AND t.remaining_cents > 0 {owner_clause.format(table="t")}
+            UNION
+            -- Settled or paid down since: a payment dated later was allocated to them
+            SELECT a.utang_id FROM payment_allocations a
+            JOIN transactions p ON p.id = a.payment_id
+            WHERE p.date_day > ? {owner_clause.format(table="a")}
+        )
+        SELECT t.customer, t.owner,
+               t.amount_cents - COALESCE((
+                   SELECT SUM(a.amount_cents) FROM payment_allocations a
+                   JOIN transactions p ON p.id = a.payment_id
+                   WHERE a.utang_id = t.id AND COALESCE(p.date_day, 0) <= ?
+               ), 0) AS remaining_cents,
+               COALESCE(t.due_day, -1), ai.id IS NOT NULL
+        FROM candidates c
+        JOIN transactions t ON t.id = c.id
+        LEFT JOIN interest_accruals ai ON ai.transaction_id = t.id
+        WHERE COALESCE(t.date_day, 0) <= ? AND (ai.id IS NULL OR t.date_day < ?)
+    ''', owner_params + (period_end_day,) + owner_params + (period_end_day,) * 3)
+    rows = [row for row in cursor.fetchall() if row[2] > 0]
+
+    columns = list(zip(*(tuple(row) for row in rows))) or [(), (), (), (), ()]
+    customers, first_index, customer_codes = np.unique(np.array(columns[0], dtype=object), return_index=True, return_inverse=True)
+    return {
+        "customers": customers,
+        "owners": np.array(columns[1], dtype=object)[first_index],
+        "customer": customer_codes.astype(np.int64),
+        "remaining_cents": np.array(columns[2], dtype=np.int64),
+        "due_day": np.array(columns[3], dtype=np.int64),
+        "is_accrual": np.array(columns[4], dtype=bool)
+    }
+
+def compute_accruals(arrays, period_end_day, method, rate, grace_days=0):
+    """Per-customer (base, amount) cents for one period; customers with nothing to charge get 0"""
+    customer_count = len(arrays["customers"])
+    is_accrual = arrays["is_accrual"]
+    overdue = ~is_accrual & (arrays["due_day"] >= 0) & (arrays["due_day"] + grace_days < period_end_day)
+
+    base = np.bincount(arrays["customer"], weights=np.where(overdue, arrays["remaining_cents"], 0), minlength=customer_count)
+    if method == "compound":
+        # Unpaid interest from earlier periods earns interest too
+        base = base + np.bincount(arrays["customer"], weights=np.where(is_accrual, arrays["remaining_cents"], 0), minlength=customer_count)
+
+    base = base.astype(np.int64)
+    amount = np.rint(base * rate).astype(np.int64)
+    return base, amount
+
+@serialized_write
+def run_interest_accrual(as_of=None, schedule=None, method=None, monthly_rate=None, grace_days=None, owner_username=None):
+    """Accrue interest for the period ending on or before as_of (default yesterday); returns a summary dict.
+
+    Arguments left as None come from the accrual settings. An as_of after yesterday is
+    rejected: that period has not ended, so its balances are not final.
+    """
+    as_of_day = to_day_number(as_of) if as_of is not None else last_ended_day()
+    if as_of_day > last_ended_day():
+        return {"success": False, "message": f"Cannot accrue as of {from_day_number(as_of_day)}: only periods ended by {from_day_number(last_ended_day())} can be accrued"}
+
+    conn = get_connection()
+    if not conn:
+        return {"success": False, "message": "Database connection failed"}
+
+    cursor = conn.cursor()
+    try:
+        settings = get_accrual_settings(cursor)
+        schedule = schedule or settings["schedule"]
+        method = method or settings["method"]
+        monthly_rate = settings["monthly_rate"] if monthly_rate is None else float(monthly_rate)
+        grace_days = settings["grace_days"] if grace_days is None else int(grace_days)
+
+        period, period_end_day = get_period(as_of_day, schedule)
+        rate = period_rate(monthly_rate, schedule)
+
+        arrays = load_open_utang(cursor, period_end_day, owner_username)
+        base, amount = compute_accruals(arrays, period_end_day, method, rate, grace_days)
+
+        # Idempotency: skip customers already charged for this period
+        cursor.execute('SELECT customer FROM interest_accruals WHERE schedule = ? AND period = ?', (schedule, period))
+        already_accrued = {row[0] for row in cursor.fetchall()}
+        charge = amount > 0
+        if already_accrued:
+            charge &= np.fromiter((customer not in already_accrued for customer in arrays["customers"]), dtype=bool, count=len(charge))
+
+        now = datetime.now().isoformat()
+        period_date = from_day_number(period_end_day)
+        due_day = today_day_number() + ACCRUAL_DUE_DAYS
+        due_date = from_day_number(due_day)
+        description = f"Interest accrual {period}"
+        rate_percent = round(rate * 100, 6)
+
+        transactions, ledger, rollups = [], [], {}
+        for index in np.flatnonzero(charge):
+            customer = arrays["customers"][index]
+            owner = arrays["owners"][index]
+            amount_cents = int(amount[index])
+            transaction_id = new_ulid()
+
+            transactions.append((
+                transaction_id, customer, "utang", description, amount_cents, period_date, True, "", "system",
+                now, now, "confirmed", rate_percent, amount_cents, 0, due_date, owner,
+                period_end_day, due_day, amount_cents, "open"
+            ))
+            ledger.append((
+                new_ulid(), customer, owner, schedule, period, method, rate_percent,
+                int(base[index]), amount_cents, transaction_id, now
+            ))
+            count, total = rollups.get(owner, (0, 0))
+            rollups[owner] = (count + 1, total + amount_cents)
+
+        cursor.executemany('''
+            INSERT INTO transactions
+            (id, customer, type, description, amount_cents, date, confirmed, otp, created_by, created_at, confirmed_at,
+             status, interest_rate, interest_cents, principal_cents, due_date, owner, date_day, due_day,
+             remaining_cents, settlement_status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', transactions)
+        cursor.executemany('''
+            INSERT INTO interest_accruals
+            (id, customer, owner, schedule, period, method, rate, base_cents, amount_cents, transaction_id, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', ledger)
+        upsert_daily_rollups(cursor, [
+            (owner, period_end_day, "utang", "confirmed", count, total, 0, total)
+            for owner, (count, total) in rollups.items() if owner is not None
+        ])
+
+        # Customers holding unapplied payment credit settle the new entries right away
+        cursor.execute('''
+            SELECT DISTINCT customer FROM transactions
+            WHERE type = 'payment' AND confirmed = 1 AND remaining_cents > 0
+        ''')
+        charged = {row[1] for row in transactions}
+        for (customer,) in cursor.fetchall():
+            if customer in charged:
+                allocate_customer_payments(cursor, customer)
+
+        conn.commit()
+        conn.close()
+
+        total_cents = sum(row[4] for row in transactions)
+        print(f"✅ Accrued interest for {len(transactions)} customers ({schedule} {method}, period {period}): {total_cents / 100:.2f}")
+        return {
+            "success": True,
+            "period": period,
+            "schedule": schedule,
+            "method": method,
+            "customers": len(transactions),
+            "skipped": int((amount > 0).sum()) - len(transactions),
+            "accrued_cents": total_cents
+        }
+    except Exception as e:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.close()
+        print(f"❌ Error accruing interest: {e}")
+        return {"success": False, "message": f"Error accruing interest: {str(e)}"}
+
+def run_interest_accrual_range(start, end=None, schedule=None, **options):
+    """Accrue every period ending between start and end (default and at most yesterday), oldest first, to catch up on missed runs"""
+    conn = get_connection()
+    if not conn:
+        return []
+    schedule = schedule or get_accrual_settings(conn.cursor())["schedule"]
+    conn.close()
+
+    end_day = min(to_day_number(end), last_ended_day()) if end is not None else last_ended_day()
+    summaries = []
+    last_period = None
+    for day in range(to_day_number(start), end_day + 1):
+        period, period_end_day = get_period(day, schedule)
+        if period_end_day == day and period != last_period:
+            summaries.append(run_interest_accrual(from_day_number(day), schedule=schedule, **options))
+            last_period = period
+    return summaries
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Accrue interest on overdue utang for one period (idempotent)")
+    parser.add_argument("--date", help="Accrue the period ending on or before this date (default: yesterday)")
+    parser.add_argument("--schedule", choices=SCHEDULES, help="default: accrualSchedule setting")
+    parser.add_argument("--method", choices=METHODS, help="default: accrualMethod setting")
+    parser.add_argument("--rate", type=float, help="percent per month (default: accrualRate setting)")
+    parser.add_argument("--grace-days", type=int, help="days after the due date before interest starts")
+    parser.add_argument("--owner", help="Only accrue for this owner's customers")
+    parser.add_argument("--catch-up-from", help="Accrue every period from this date through --date")
+    args = parser.parse_args()
+
+    options = {"method": args.method, "monthly_rate": args.rate, "grace_days": args.grace_days, "owner_username": args.owner}
+    shards = [None]
+    if is_sharding_enabled():
+        shards = sorted(name for name in os.listdir(SHARD_DIR) if name.startswith("owner_") and name.endswith(".db"))
+
+    started = time.perf_counter()
+    for shard in shards:
+        if shard:
+            activate_shard(shard)
+        if args.catch_up_from:
+            run_interest_accrual_range(args.catch_up_from, args.date, args.schedule, **options)
+        else:
+            run_interest_accrual(args.date, args.schedule, **options)
+    print(f"Finished in {time.perf_counter() - started:.2f}s")
@@ -1,9 +1,19 @@
 import streamlit as st
 from auth import show_login_page, logout
 from customer_dashboard import show_customer_dashboard
-from owner_dashboard import show_owner_dashboard
-from utils import ensure_session_state, get_setting
-from database import init_database, migrate_from_json, add_missing_columns, check_database_health, migrate_created_by_field
+from owner_dashboard import show_owner_dashboard, show_query_debug_panel, show_profiling_panel
+from utils import ensure_session_state
+from services import get_setting
+from database import init_database, migrate_from_json, add_missing_columns, check_database_health, migrate_created_by_field, migrate_owner_field, migrate_time_ordered_ids, migrate_money_to_cents, migrate_day_numbers, migrate_daily_rollups, migrate_payment_allocations, activate_shard
+from query_log import start_rerun, finish_rerun, current_rerun
+from profiling import set_page, RerunProfiler
+from metrics import start_exporters_from_env
+
+# Reruns kept in the query debug panel's history table
+QUERY_LOG_HISTORY = 20
+
+# Metrics exporters configured by IUMS_METRICS_PORT / IUMS_METRICS_FILE (started once per process)
+start_exporters_from_env()
 
 # Page configuration
 st.set_page_config(
@@ -140,13 +150,17 @@ def show_sidebar():
         # Auto-check due dates for owners (ONLY when logged in as Owner)
         if st.session_state.role == "Owner":
             if st.sidebar.button("Check Due Dates", key="check_due_dates_sidebar", use_container_width=True):
-                from utils import check_due_dates
+                from services import check_due_dates
                 success, message = check_due_dates()
                 if success:
                     st.sidebar.success(message)
                 else:
                     st.sidebar.error(message)
                 st.rerun()
+            
+            # Per-rerun SQL log with N+1 detection, shown under the page
+            st.sidebar.checkbox("🐞 Query Debug Panel", key="query_log_enabled", help="Log every SQL statement this page runs")
+            st.sidebar.checkbox("⏱️ Profiling Panel", key="profiling_enabled", help="Page and function timings, cProfile/tracemalloc on demand")
     else:
         # Show login message or basic info when not logged in
         st.sidebar.markdown("""
@@ -182,9 +196,27 @@ def initialize_system():
             # Migrate created_by field
             migrate_created_by_field()
             
+            # Store money as integer cents (before anything inserts in the new format)
+            migrate_money_to_cents()
+            
             # Migrate from old formats
             migrate_from_json()
             
+            # Backfill denormalized owner column (also covers rows migrated from JSON)
+            migrate_owner_field()
+            
+            # Switch legacy random UUID keys to time-ordered IDs
+            migrate_time_ordered_ids()
+            
+            # Mirror date/due_date text as integer day numbers for due-date range queries
+            migrate_day_numbers()
+            
+            # Build the daily rollups behind the trend charts (first run only)
+            migrate_daily_rollups()
+            
+            # Record which utang each past payment settled (first run only)
+            migrate_payment_allocations()
+            
             # Check database health
             health_status, health_message = check_database_health()
             if not health_status:
@@ -207,6 +239,19 @@ def main():
     apply_custom_styles()
     ensure_session_state()
     
+    # Route this rerun's queries to the logged-in user's shard (no-op unless sharding is enabled)
+    activate_shard(st.session_state.shard)
+    
+    # Log this rerun's SQL for the owner query debug panel (see query_log.py)
+    page = f"{st.session_state.role} / {st.session_state.current_page}" if st.session_state.logged_in else "Login"
+    if st.session_state.query_log_enabled and st.session_state.role == "Owner":
+        start_rerun(page)
+    else:
+        finish_rerun()
+    
+    # Label page and service timings with the page (see profiling.py)
+    set_page(page)
+    
     # Initialize system
     if not initialize_system():
         st.error("System initialization failed. Please refresh the page.")
@@ -223,6 +268,12 @@ def main():
         show_login_page()
         return
     
+    # One-off cProfile/tracemalloc capture of this rerun, requested from the profiling panel
+    profiler = None
+    if st.session_state.profile_next_rerun:
+        profiler = RerunProfiler(st.session_state.profile_next_rerun).start()
+        st.session_state.profile_next_rerun = None
+    
     # Show appropriate dashboard based on role
     try:
         if st.session_state.role == "Owner":
@@ -233,6 +284,19 @@ def main():
             st.error("❌ Unknown user role")
     except Exception as e:
         st.info("Please refresh the page or contact support if the issue persists.")
+    finally:
+        if profiler:
+            st.session_state.profile_report = profiler.stop(page)
+
+    # Query debug panel: this rerun's statements, then remember it for the history table
+    rerun_log = current_rerun()
+    if rerun_log:
+        show_query_debug_panel(rerun_log, st.session_state.query_log_reruns)
+        st.session_state.query_log_reruns = ([rerun_log.summary()] + st.session_state.query_log_reruns)[:QUERY_LOG_HISTORY]
+    
+    # Profiling panel: page and service timings, on-demand rerun profiles
+    if st.session_state.profiling_enabled and st.session_state.role == "Owner":
+        show_profiling_panel()
 
     # Footer
     st.markdown("""
@@ -0,0 +1,209 @@
+"""In-process Prometheus-style metrics: counters and histograms.
+
+Modules create their metrics at import time with counter() / histogram() and
+update them on their hot paths (a lock and a few additions per update). The
+registry is rendered in the Prometheus text exposition format and exported
+without any external service, either or both of:
+
+    IUMS_METRICS_PORT=9464        serve http://127.0.0.1:9464/metrics for scraping
+    IUMS_METRICS_FILE=/var/lib/node_exporter/iums.prom
+                                  rewrite a file every IUMS_METRICS_INTERVAL
+                                  seconds (default 15) for node_exporter's
+                                  textfile collector
+
+start_exporters_from_env() is called by iums.py and starts them once per process.
+"""
+import contextlib
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds; suits SQLite statements (sub-millisecond) up to SMTP sends (seconds)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_registry = []
+_registry_lock = threading.Lock()
+_exporters_started = False
+
+def _escape(value):
+    """Escape a label value for the text format"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames, labelvalues, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic count per label combination"""
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Current count for one label combination (0 if never incremented)"""
+        return self._values.get(tuple(labels.get(name, "") for name in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in sorted(values.items())]
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observations per label combination"""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with block in seconds (also when it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        samples = []
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"'), cumulative))
+            samples.append((f"{self.name}_sum", _format_labels(self.labelnames, key), total))
+            samples.append((f"{self.name}_count", _format_labels(self.labelnames, key), cumulative))
+        return samples
+
+def _register(metric):
+    with _registry_lock:
+        for existing in _registry:
+            if existing.name == metric.name:
+                # A module reload gets the existing metric instead of duplicating its series
+                return existing
+        _registry.append(metric)
+    return metric
+
+def counter(name, documentation, labelnames=()):
+    """Create (or get the already registered) counter"""
+    return _register(Counter(name, documentation, labelnames))
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Create (or get the already registered) histogram"""
+    return _register(Histogram(name, documentation, labelnames, buckets))
+
+def render():
+    """The whole registry in the Prometheus text exposition format"""
+    lines = []
+    with _registry_lock:
+        metrics = list(_registry)
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{labels} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+def write_textfile(path):
+    """Write the registry to path atomically (the textfile collector never sees a partial file)"""
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "w") as f:
+        f.write(render())
+    os.replace(temporary_path, path)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the app's console
+        pass
+
+def start_http_server(port, address="127.0.0.1"):
+    """Serve /metrics from a daemon thread; returns the server"""
+    server = ThreadingHTTPServer((address, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="iums-metrics-http", daemon=True).start()
+    return server
+
+def start_textfile_writer(path, interval=15):
+    """Rewrite the metrics file every interval seconds from a daemon thread"""
+    def write_forever():
+        while True:
+            try:
+                write_textfile(path)
+            except Exception as e:
+                print(f"❌ Error writing metrics file {path}: {e}")
+            time.sleep(interval)
+
+    threading.Thread(target=write_forever, name="iums-metrics-file", daemon=True).start()
+
+def is_exporting():
+    """Whether an exporter is running (per-statement query timing is only collected then)"""
+    return _exporters_started
+
+def start_exporters_from_env():
+    """Start the exporters configured by IUMS_METRICS_PORT / IUMS_METRICS_FILE, once per process"""
+    global _exporters_started
+    with _registry_lock:
+        if _exporters_started:
+            return
+        port = os.getenv("IUMS_METRICS_PORT")
+        path = os.getenv("IUMS_METRICS_FILE")
+        if not port and not path:
+            return
+        _exporters_started = True
+
+    if port:
+        try:
+            start_http_server(int(port), os.getenv("IUMS_METRICS_ADDR", "127.0.0.1"))
+            print(f"📈 Metrics served on port {port}")
+        except Exception as e:
+            print(f"❌ Could not start metrics server on port {port}: {e}")
+    if path:
+        start_textfile_writer(path, float(os.getenv("IUMS_METRICS_INTERVAL", "15")))
+        print(f"📈 Metrics written to {path}")
@@ -0,0 +1,32 @@
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+
+# Money is stored as INTEGER cents in the database; pesos (floats) only appear
+# at the edges (forms, display, email) and are converted with these helpers.
+
+def to_cents(amount):
+    """Convert a peso amount (float, int, str or Decimal) to integer cents, rounding half up"""
+    if amount is None:
+        return 0
+    if isinstance(amount, str):
+        amount = amount.strip().replace(",", "")
+        if amount == "":
+            return 0
+    try:
+        # Go through str() so 0.1 + 0.2 style float noise does not leak into the cents
+        value = Decimal(str(amount))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Invalid amount: {amount!r}")
+    return int((value * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+def from_cents(cents):
+    """Convert integer cents to a peso float for display and the dict-based API"""
+    if cents is None:
+        return 0.0
+    return int(cents) / 100
+
+def percent_of_cents(cents, rate):
+    """Get rate percent of an amount in cents, rounded half up to whole cents"""
+    if not cents or not rate:
+        return 0
+    value = Decimal(int(cents)) * Decimal(str(rate)) / Decimal(100)
+    return int(value.quantize(Decimal("1"), rounding=ROUND_HALF_UP))
@@ -1,7 +1,7 @@
 import streamlit as st
-from utils import (
+from services import (
     calculate_balance, get_customer_transactions, get_pending_transactions,
-    confirm_transaction_with_otp, get_alerts, mark_alerts_read, format_currency,
+    confirm_transaction_with_otp, confirm_transactions_with_otp, get_alerts, mark_alerts_read, format_currency,
     send_alert, get_account, get_personal_info_display, update_account_password, 
     update_account_username, get_setting, list_my_accounts, create_account,
     delete_account, create_pending_transaction_with_due_date, get_all_transactions,
@@ -9,8 +9,17 @@ from utils import (
     validate_amount, calculate_interest, get_interest_rate, get_transaction_statistics,
     get_my_transaction_statistics, delete_transaction, delete_alert, check_due_dates, 
     get_upcoming_due_dates, get_overdue_transactions, verify_transaction_exists,
-    get_my_upcoming_due_dates, get_my_overdue_transactions, get_my_transactions
+    get_my_upcoming_due_dates, get_my_overdue_transactions, get_my_transactions,
+    get_my_pending_transactions, get_my_customer_balances, get_receivables_aging, get_aging_drilldown,
+    AGING_BUCKETS, get_daily_trend
 )
+from bulk_import import import_customers_upload, CSV_TEMPLATE, REQUIRED_COLUMNS, OPTIONAL_COLUMNS
+from export import export_to_file, EXPORT_DATASETS, EXPORT_FORMATS
+from analytics import get_owner_analytics
+from interest_accrual import run_interest_accrual, SCHEDULES, METHODS
+from money import from_cents
+from query_log import N_PLUS_ONE_THRESHOLD
+from profiling import timed, summarize_timings, clear_timings, PROFILE_MODES
 from datetime import datetime, timedelta
 
 def debug_transaction_state():
@@ -22,6 +31,93 @@ def debug_transaction_state():
     else:
         print("   No current transaction in session state")
 
+def show_query_debug_panel(rerun_log, history):
+    """Show the SQL statements this rerun ran, N+1 suspects and the recent rerun history"""
+    st.markdown("---")
+    st.markdown("### 🐞 Query Debug Panel")
+    
+    repeated = rerun_log.repeated_statements()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Statements", rerun_log.statement_count)
+    with col2:
+        st.metric("Connections", rerun_log.connections)
+    with col3:
+        st.metric("SQL Time", f"{rerun_log.total_ms:.1f} ms")
+    with col4:
+        st.metric("N+1 Suspects", len(repeated))
+    
+    if repeated:
+        st.warning(f"⚠️ {len(repeated)} statement(s) ran {N_PLUS_ONE_THRESHOLD} or more times on {rerun_log.page} - likely a query inside a loop")
+        st.dataframe(
+            [{
+                "Runs": group["count"],
+                "Total ms": round(group["ms"], 2),
+                "Rows": group["rows"],
+                "Called From": max(group["callers"], key=group["callers"].get),
+                "Statement": group["sql"]
+            } for group in repeated],
+            use_container_width=True
+        )
+    else:
+        st.success(f"✅ No statement ran {N_PLUS_ONE_THRESHOLD} or more times on {rerun_log.page}")
+    
+    with st.expander(f"All Statements ({rerun_log.statement_count})"):
+        st.dataframe(
+            [{
+                "#": index + 1,
+                "ms": round(entry["ms"], 2),
+                "Rows": entry["rows"],
+                "Params": entry["params"],
+                "Called From": entry["caller"],
+                "Statement": entry["sql"]
+            } for index, entry in enumerate(rerun_log.statements)],
+            use_container_width=True
+        )
+    
+    if history:
+        with st.expander(f"Previous Reruns ({len(history)})"):
+            st.dataframe(history, use_container_width=True)
+
+def show_profiling_panel():
+    """Show page and service timings from the ring buffer and run on-demand rerun profiles"""
+    st.markdown("---")
+    st.markdown("### ⏱️ Profiling Panel")
+    
+    summary = summarize_timings()
+    if summary:
+        st.dataframe(
+            [{
+                "Kind": group["kind"],
+                "Function": group["name"],
+                "Calls": group["calls"],
+                "Mean ms": round(group["mean_ms"], 2),
+                "p95 ms": round(group["p95_ms"], 2),
+                "Max ms": round(group["max_ms"], 2),
+                "Last Page": group["last_page"]
+            } for group in summary],
+            use_container_width=True
+        )
+    else:
+        st.info("No timings recorded yet.")
+    
+    col1, col2, col3 = st.columns(3)
+    labels = {"cprofile": "🔬 cProfile Next Rerun", "tracemalloc": "🧠 Memory Snapshot Next Rerun"}
+    for column, mode in zip((col1, col2), PROFILE_MODES):
+        with column:
+            if st.button(labels[mode], key=f"profile_{mode}", use_container_width=True):
+                st.session_state.profile_next_rerun = mode
+                st.rerun()
+    with col3:
+        if st.button("🗑️ Clear Timings", key="clear_timings", use_container_width=True):
+            clear_timings()
+            st.rerun()
+    
+    report = st.session_state.profile_report
+    if report:
+        with st.expander(f"Last {report['mode']} report: {report['page']} at {report['at']} ({report['elapsed_ms']:.0f} ms)", expanded=True):
+            st.code(report["text"])
+
 def show_owner_dashboard():
     """Show owner dashboard with organized message containers"""
     
@@ -42,6 +138,7 @@ def show_owner_dashboard():
     elif st.session_state.current_page == "Owner Profile":
         show_owner_profile()
 
+@timed("page")
 def show_owner_overview():
     """Show owner overview with organized message containers"""
     st.markdown("## Owner Dashboard")
@@ -165,21 +262,19 @@ def show_owner_overview():
     owner_username = st.session_state.username
     
     # Quick stats in organized containers - ONLY SHOW OWNER'S DATA
-    accounts = list_my_accounts(owner_username)
+    customer_balances = get_my_customer_balances(owner_username)
     transactions = get_my_transactions(owner_username)
     
-    total_customers = len([acc for acc in accounts if acc.get("role") == "Customer"])
+    total_customers = len(customer_balances)
     total_transactions = len(transactions)
     
     # Calculate total outstanding and interest for owner's customers
     total_outstanding = 0
     total_interest = 0
     
-    for account in accounts:
-        if account.get("role") == "Customer":
-            balance = calculate_balance(account["username"])
-            total_outstanding += balance["outstanding"]
-            total_interest += balance["total_interest_paid"]
+    for balance in customer_balances.values():
+        total_outstanding += balance["outstanding"]
+        total_interest += balance["total_interest_paid"]
     
     # Due date statistics for owner's customers
     upcoming_due_dates = get_my_upcoming_due_dates(owner_username, 7)
@@ -236,6 +331,17 @@ def show_owner_overview():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
     
+    # 30-day activity trend from daily_rollups
+    trend = get_daily_trend(owner_username, 30)
+    if any(trend["count"]):
+        st.markdown("**Last 30 Days: Utang vs Payments**")
+        st.area_chart(
+            {"Date": trend["dates"], "Utang": trend["utang"], "Payments": trend["payment"]},
+            x="Date",
+            y=["Utang", "Payments"],
+            height=200
+        )
+    
     # Alerts Container - ORGANIZED MESSAGES
     with st.container():
         alert_count = 0
@@ -276,7 +382,7 @@ def show_owner_overview():
                 """, unsafe_allow_html=True)
         
         # Pending transactions alert for owner's customers
-        pending_count = len(get_pending_transactions())
+        pending_count = len(get_my_pending_transactions(owner_username))
         if pending_count > 0:
             alert_count += 1
             st.markdown(f"""
@@ -391,6 +497,7 @@ def show_owner_overview():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
 
+@timed("page")
 def show_account_management():
     """Show account management in organized containers - ONLY SHOW OWNER'S ACCOUNTS"""
     st.markdown("## Manage My Accounts")
@@ -462,6 +569,33 @@ def show_account_management():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
     
+    # Bulk import of customers and opening balances
+    with st.expander("📥 Bulk Import Customers from CSV"):
+        st.write(f"**Required columns:** {', '.join(REQUIRED_COLUMNS)}")
+        st.write(f"**Optional columns:** {', '.join(OPTIONAL_COLUMNS)}")
+        st.caption("An opening_balance creates a confirmed utang for the customer. Rows with errors are skipped and listed below.")
+        st.download_button(
+            "Download CSV Template",
+            data=CSV_TEMPLATE,
+            file_name="customers_template.csv",
+            mime="text/csv",
+            key="bulk_import_template"
+        )
+        
+        uploaded_file = st.file_uploader("Customer CSV", type=["csv"], key="bulk_import_file")
+        if uploaded_file is not None and st.button("Import Customers", use_container_width=True, key="bulk_import_submit"):
+            with st.spinner("Importing customers..."):
+                result = import_customers_upload(uploaded_file, owner_username)
+            
+            if result["imported"]:
+                st.success(f"✅ Imported {result['imported']} customers with {result['opening_balances']} opening balances")
+            if result["errors"]:
+                st.warning(f"{len(result['errors'])} rows were skipped")
+                st.dataframe(
+                    [{"Line": line, "Username": username, "Error": error} for line, username, error in result["errors"][:1000]],
+                    use_container_width=True
+                )
+    
     st.markdown("---")
     
     # Existing accounts in containers - ONLY SHOW ACCOUNTS CREATED BY THIS OWNER
@@ -525,7 +659,7 @@ def show_account_management():
             with col5:
                 if account["username"] != st.session_state.username:
                     if st.button("Delete", key=f"del_{account['username']}", use_container_width=True):
-                        success, message = delete_account(account["username"])
+                        success, message = delete_account(account["username"], st.session_state.username)
                         if success:
                             st.success(message)
                             st.rerun()
@@ -549,6 +683,7 @@ def show_account_management():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
 
+@timed("page")
 def show_add_utang():
     """Show add utang form with organized containers - ONLY SHOW OWNER'S CUSTOMERS"""
     st.markdown("##  Add Utang")
@@ -610,6 +745,7 @@ def show_add_utang():
                     
                     due_date = st.date_input(
                         "Set Due Date *",
+                        value=min_date,
                         min_value=min_date,
                         max_value=max_date,
                         help="Select the date when this utang should be paid",
@@ -982,14 +1118,7 @@ def display_due_date_item(due_info, urgency_level):
         bg_color = "rgba(16, 185, 129, 0.1)"
         icon = "🟢"
     
-    # Check if this utang is still outstanding
-    customer_balance = calculate_balance(due_info['customer'])
-    has_outstanding_balance = customer_balance["outstanding"] > 0
-    
-    if not has_outstanding_balance:
-        # This utang has been paid - don't display it
-        return
-    
+    # Due-date lists only contain utang with an unpaid remainder, so no balance check is needed here
     st.markdown(f"""
     <div class="due-date-alert" style="border-left-color: {border_color}; background: {bg_color};">
         <div style="display: flex; justify-content: space-between; align-items: center;">
@@ -1007,7 +1136,7 @@ def display_due_date_item(due_info, urgency_level):
                     {due_info['days_until_due']} days
                 </div>
                 <div style="font-size: 0.7rem; color: var(--text-secondary);">
-                    Balance: {format_currency(customer_balance['outstanding'])}
+                    Unpaid: {format_currency(due_info['remaining'])}
                 </div>
             </div>
         </div>
@@ -1042,9 +1171,8 @@ def display_owner_transaction_item(transaction, show_interest_details=True, show
         status_color = "var(--accent-amber)"
         status_bg = "rgba(245, 158, 11, 0.1)"
     
-    # Check if this utang is still outstanding
-    customer_balance = calculate_balance(transaction['customer'])
-    has_outstanding_balance = customer_balance["outstanding"] > 0
+    # Check if this utang is still outstanding (kept up to date by the payment allocations)
+    has_outstanding_balance = transaction.get("settlement_status") != "settled"
     
     # Create the main transaction container
     st.markdown(f"""
@@ -1108,14 +1236,12 @@ def display_owner_transaction_item(transaction, show_interest_details=True, show
         """, unsafe_allow_html=True)
     
     # Due date information - ONLY SHOW FOR UNPAID UTANG
-    if (transaction.get("due_date") and 
+    if (transaction.get("days_until_due") is not None and 
         transaction["type"] == "utang" and 
         transaction["confirmed"]):
         
         if has_outstanding_balance:
-            due_date = datetime.strptime(transaction["due_date"], '%Y-%m-%d').date()
-            today = datetime.now().date()
-            days_until_due = (due_date - today).days
+            days_until_due = transaction["days_until_due"]
             
             if days_until_due < 0:
                 due_status = f"OVERDUE: {abs(days_until_due)} days"
@@ -1155,7 +1281,7 @@ def display_owner_transaction_item(transaction, show_interest_details=True, show
                         <div style="font-size: 1rem;">✅</div>
                         <div>
                             <div style="font-size: 0.75rem; color: var(--text-secondary);">Status</div>
-                            <div style="font-size: 0.9rem; color: var(--accent-green); font-weight: 500;">PAID - Due date cleared</div>
+                            <div style="font-size: 0.9rem; color: var(--accent-green); font-weight: 500;">PAID - Fully settled</div>
                         </div>
                     </div>
             """, unsafe_allow_html=True)
@@ -1172,16 +1298,17 @@ def display_owner_transaction_item(transaction, show_interest_details=True, show
                     </div>
         """, unsafe_allow_html=True)
     
-    # Current balance info for owner
-    st.markdown(f"""
+    # Unpaid remainder of a confirmed utang (kept up to date by the payment allocations)
+    if transaction["type"] == "utang" and transaction["confirmed"]:
+        st.markdown(f"""
                     <div style="display: flex; align-items: center; gap: 0.5rem; background: rgba(148, 163, 184, 0.1); padding: 0.5rem 0.75rem; border-radius: 6px;">
                         <div style="font-size: 1rem;">📈</div>
                         <div>
-                            <div style="font-size: 0.75rem; color: var(--text-secondary);">Current Balance</div>
-                            <div style="font-size: 0.9rem; color: var(--text-primary); font-weight: 500;">{format_currency(customer_balance['outstanding'])}</div>
+                            <div style="font-size: 0.75rem; color: var(--text-secondary);">Unpaid</div>
+                            <div style="font-size: 0.9rem; color: var(--text-primary); font-weight: 500;">{format_currency(transaction['remaining_amount'])}</div>
                         </div>
                     </div>
-    """, unsafe_allow_html=True)
+        """, unsafe_allow_html=True)
     
     # Close the details row and left section
     st.markdown("""
@@ -1217,6 +1344,7 @@ def display_owner_transaction_item(transaction, show_interest_details=True, show
     </div>
     """, unsafe_allow_html=True)
 
+@timed("page")
 def show_record_payment():
     """Show record payment form with OTP workflow - ONLY SHOW OWNER'S CUSTOMERS"""
     st.markdown("## Record Payment")
@@ -1687,6 +1815,7 @@ def show_record_payment():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
 
+@timed("page")
 def show_pending_confirmations():
     """Show pending transactions in organized message containers - matching customer dashboard style"""
     st.markdown("## Pending Confirmations (My Customers)")
@@ -1695,14 +1824,7 @@ def show_pending_confirmations():
     owner_username = st.session_state.username
     
     # Get pending transactions for owner's customers
-    pending_transactions = []
-    all_pending = get_pending_transactions()
-    
-    # Filter to only show pending transactions for owner's customers
-    my_customers = get_my_customer_list(owner_username)
-    for transaction in all_pending:
-        if transaction['customer'] in my_customers:
-            pending_transactions.append(transaction)
+    pending_transactions = get_my_pending_transactions(owner_username)
     
     if not pending_transactions:
         st.markdown("""
@@ -1721,6 +1843,15 @@ def show_pending_confirmations():
             st.rerun()
         return
     
+    # Result of the last bulk confirmation (kept across the rerun that refreshes the list)
+    bulk_result = st.session_state.pop("bulk_confirm_result", None)
+    if bulk_result:
+        confirmed_count, failures = bulk_result
+        if confirmed_count:
+            st.success(f"✅ {confirmed_count} transaction(s) confirmed")
+        for label, message in failures:
+            st.error(f"❌ {label}: {message}")
+    
     # Main Pending Transactions Container
     with st.container():
         st.markdown("""
@@ -1740,6 +1871,20 @@ def show_pending_confirmations():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
     
+    # Bulk Confirmation Container (end-of-day reconciliation)
+    with st.container():
+        st.markdown("""
+        <div class="message-container">
+            <div class="message-header">
+                <span>⚡ Bulk Confirmation</span>
+            </div>
+            <div class="message-content">
+        """, unsafe_allow_html=True)
+        
+        show_bulk_confirmation(pending_transactions, owner_username)
+        
+        st.markdown("</div></div>", unsafe_allow_html=True)
+    
     # Instructions Container
     with st.container():
         st.markdown("""
@@ -1776,6 +1921,42 @@ def show_pending_confirmations():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
 
+def show_bulk_confirmation(pending_transactions, owner_username):
+    """Form confirming every pending transaction that has an OTP entered, in one database transaction"""
+    st.write("Enter the OTPs you have collected and confirm them together. Items left blank stay pending.")
+    
+    with st.form("bulk_confirm_form"):
+        for transaction in pending_transactions:
+            col_item, col_otp = st.columns([3, 1])
+            with col_item:
+                st.write(f"**{transaction['customer']}** · {transaction['description']} · {transaction['type'].title()} {format_currency(transaction['amount'])}")
+            with col_otp:
+                st.text_input(
+                    "OTP",
+                    placeholder="6-digit OTP",
+                    max_chars=6,
+                    key=f"bulk_otp_{transaction['id']}",
+                    label_visibility="collapsed"
+                )
+        
+        submitted = st.form_submit_button("✅ Confirm All Entered OTPs", use_container_width=True, type="primary")
+    
+    if submitted:
+        labels = {transaction['id']: f"{transaction['customer']} - {transaction['description']}" for transaction in pending_transactions}
+        pairs = [
+            (transaction['id'], st.session_state[f"bulk_otp_{transaction['id']}"].strip())
+            for transaction in pending_transactions
+            if st.session_state.get(f"bulk_otp_{transaction['id']}", "").strip()
+        ]
+        if not pairs:
+            st.error("❌ Enter at least one OTP")
+            return
+        
+        results = confirm_transactions_with_otp(pairs, owner_username)
+        failures = [(labels[transaction_id], message) for transaction_id, (success, message) in results.items() if not success]
+        st.session_state.bulk_confirm_result = (len(results) - len(failures), failures)
+        st.rerun()
+
 def display_pending_transaction_item(transaction, show_delete=False):
     """Display a single pending transaction item in customer dashboard style"""
     # Determine colors based on transaction type
@@ -1828,13 +2009,12 @@ def display_pending_transaction_item(transaction, show_delete=False):
                 with col3a:
                     st.metric("Principal", format_currency(transaction.get('principal_amount', transaction['amount'])))
             
-            # Due date information for utang
-            if (transaction.get("due_date") and 
-                transaction["type"] == "utang"):
+            # Due date information for unpaid utang
+            if (transaction.get("days_until_due") is not None and 
+                transaction["type"] == "utang" and 
+                transaction.get("settlement_status") != "settled"):
                 
-                due_date = datetime.strptime(transaction["due_date"], '%Y-%m-%d').date()
-                today = datetime.now().date()
-                days_until_due = (due_date - today).days
+                days_until_due = transaction["days_until_due"]
                 
                 if days_until_due < 0:
                     due_status = f"OVERDUE ({abs(days_until_due)} days)"
@@ -1934,6 +2114,7 @@ def display_pending_transaction_item(transaction, show_delete=False):
     # Separator between transactions
     st.markdown("---")
 
+@timed("page")
 def show_reports():
     """Show reports with due date analytics - ONLY SHOW OWNER'S DATA"""
     st.markdown("## Reports & Analytics (My Customers)")
@@ -1973,6 +2154,73 @@ def show_reports():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
     
+    # Receivables aging - grouped in SQL per customer, with drill-down paging
+    with st.container():
+        st.markdown("""
+        <div class="message-container">
+            <div class="message-header">
+                <span>🧾 Receivables Aging (days past due)</span>
+            </div>
+            <div class="message-content">
+        """, unsafe_allow_html=True)
+        
+        aging = get_receivables_aging(owner_username)
+        
+        if aging["customers"]:
+            bucket_labels = {key: label for key, label, *_ in AGING_BUCKETS}
+            bucket_columns = st.columns(len(AGING_BUCKETS))
+            for column, (key, label, *_) in zip(bucket_columns, AGING_BUCKETS):
+                with column:
+                    st.metric(label, format_currency(aging["totals"][key]))
+            
+            st.dataframe(
+                [{
+                    "Customer": row["customer"],
+                    "Open Utang": row["open_count"],
+                    **{label: format_currency(row[key]) for key, label, *_ in AGING_BUCKETS},
+                    "Outstanding": format_currency(row["outstanding"])
+                } for row in aging["customers"]],
+                use_container_width=True
+            )
+            
+            st.markdown("**Drill Down**")
+            col1, col2, col3 = st.columns([2, 2, 1])
+            with col1:
+                bucket = st.selectbox("Bucket", list(bucket_labels.keys()), format_func=lambda key: bucket_labels[key], key="aging_bucket")
+            with col2:
+                customer_filter = st.selectbox("Customer", ["All customers"] + [row["customer"] for row in aging["customers"]], key="aging_customer")
+            with col3:
+                page = st.number_input("Page", min_value=1, value=1, step=1, key="aging_page")
+            
+            page_size = 25
+            items, total_count = get_aging_drilldown(
+                owner_username, bucket,
+                customer=None if customer_filter == "All customers" else customer_filter,
+                page=int(page), page_size=page_size
+            )
+            
+            if items:
+                total_pages = (total_count + page_size - 1) // page_size
+                st.caption(f"Page {int(page)} of {total_pages} • {total_count} open utang")
+                st.dataframe(
+                    [{
+                        "Customer": item["customer"],
+                        "Description": item["description"],
+                        "Date": item["date"],
+                        "Due Date": item["due_date"],
+                        "Days Past Due": item["days_past_due"],
+                        "Amount": format_currency(item["amount"]),
+                        "Unpaid": format_currency(item["remaining"])
+                    } for item in items],
+                    use_container_width=True
+                )
+            else:
+                st.info("No open utang in this bucket" if int(page) == 1 else "No more results - go back a page")
+        else:
+            st.info("No outstanding utang")
+        
+        st.markdown("</div></div>", unsafe_allow_html=True)
+    
     # Transaction summary for owner's customers
     with st.container():
         st.markdown("""
@@ -2048,6 +2296,97 @@ def show_reports():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
     
+    # Portfolio analytics - vectorized over the owner's transactions
+    with st.container():
+        st.markdown("""
+        <div class="message-container">
+            <div class="message-header">
+                <span>📈 Portfolio Analytics (My Customers)</span>
+            </div>
+            <div class="message-content">
+        """, unsafe_allow_html=True)
+        
+        analytics = get_owner_analytics(owner_username)
+        
+        # Aging is shown once, in the Receivables Aging section above
+        if analytics and analytics["transaction_count"]:
+            monthly = analytics["monthly"]
+            collection = analytics["collection"]
+            
+            st.markdown("**Monthly Issuance vs Collection**")
+            st.bar_chart(
+                {
+                    "Month": monthly["months"],
+                    "Issued": (monthly["issued_cents"] / 100).tolist(),
+                    "Collected": (monthly["collected_cents"] / 100).tolist()
+                },
+                x="Month",
+                y=["Issued", "Collected"]
+            )
+            
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                st.metric("Overall Collection Rate", f"{collection['overall']:.1f}%")
+            with col2:
+                st.line_chart(
+                    {
+                        "Month": monthly["months"],
+                        "Cumulative Collection Rate (%)": [None if rate != rate else round(float(rate), 1) for rate in collection["cumulative"]]
+                    },
+                    x="Month"
+                )
+            
+            balances = analytics["balances"]
+            order = balances["outstanding_cents"].argsort()[::-1][:20]
+            with st.expander("Customer Balances (top 20 by outstanding)"):
+                st.dataframe(
+                    [{
+                        "Customer": balances["customers"][i],
+                        "Issued": format_currency(from_cents(balances["issued_cents"][i])),
+                        "Paid": format_currency(from_cents(balances["paid_cents"][i])),
+                        "Outstanding": format_currency(from_cents(balances["outstanding_cents"][i]))
+                    } for i in order],
+                    use_container_width=True
+                )
+        else:
+            st.info("No confirmed transactions to analyze yet")
+        
+        st.markdown("</div></div>", unsafe_allow_html=True)
+    
+    # Daily trend - read from the pre-aggregated daily_rollups table
+    with st.container():
+        st.markdown("""
+        <div class="message-container">
+            <div class="message-header">
+                <span>📉 Daily Trend (My Customers)</span>
+            </div>
+            <div class="message-content">
+        """, unsafe_allow_html=True)
+        
+        trend_ranges = {"Last 30 days": 30, "Last 90 days": 90, "Last 180 days": 180, "Last 365 days": 365}
+        trend_range = st.selectbox("Range", list(trend_ranges.keys()), index=1, key="trend_range")
+        trend = get_daily_trend(owner_username, trend_ranges[trend_range])
+        
+        if any(trend["count"]):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Utang Issued", format_currency(sum(trend["utang"])))
+            with col2:
+                st.metric("Payments Received", format_currency(sum(trend["payment"])))
+            with col3:
+                st.metric("Interest Charged", format_currency(sum(trend["interest"])))
+            
+            st.area_chart(
+                {"Date": trend["dates"], "Utang": trend["utang"], "Payments": trend["payment"]},
+                x="Date",
+                y=["Utang", "Payments"]
+            )
+            st.line_chart({"Date": trend["dates"], "Interest": trend["interest"]}, x="Date")
+        else:
+            st.info(f"No confirmed transactions in the {trend_range.lower()}")
+        
+        st.markdown("</div></div>", unsafe_allow_html=True)
+    
     # Top debtors - ONLY OWNER'S CUSTOMERS
     with st.container():
         st.markdown("""
@@ -2089,6 +2428,56 @@ def show_reports():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
     
+    # Export - streamed from the database in batches
+    with st.container():
+        st.markdown("""
+        <div class="message-container">
+            <div class="message-header">
+                <span>📤 Export Data (My Customers)</span>
+            </div>
+            <div class="message-content">
+        """, unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            dataset = st.selectbox(
+                "Data",
+                list(EXPORT_DATASETS.keys()),
+                format_func=lambda key: EXPORT_DATASETS[key]["label"],
+                key="export_dataset"
+            )
+        
+        with col2:
+            export_format = st.selectbox(
+                "Format",
+                list(EXPORT_FORMATS.keys()),
+                format_func=lambda key: EXPORT_FORMATS[key]["label"],
+                key="export_format"
+            )
+        
+        if st.button("Prepare Export", use_container_width=True, key="prepare_export"):
+            try:
+                with st.spinner("Preparing export..."):
+                    export_file, file_name, mime = export_to_file(dataset, owner_username, export_format)
+                
+                # download_button keeps its data in memory anyway, so read the file and close it here
+                with export_file:
+                    st.download_button(
+                        f"⬇️ Download {file_name}",
+                        data=export_file.read(),
+                        file_name=file_name,
+                        mime=mime,
+                        use_container_width=True,
+                        key="download_export"
+                    )
+            except ImportError:
+                st.error("❌ XLSX export requires the openpyxl package")
+            except Exception as e:
+                st.error(f"❌ Export failed: {str(e)}")
+        
+        st.markdown("</div></div>", unsafe_allow_html=True)
+    
     # Back button
     with st.container():
         st.markdown("""
@@ -2102,6 +2491,7 @@ def show_reports():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
 
+@timed("page")
 def show_settings():
     """Show system settings"""
     st.markdown("## System Settings")
@@ -2135,14 +2525,51 @@ def show_settings():
                                         value=get_setting("dueDateReminderDays", "7,3,1,0"),
                                         help="Comma-separated days before due date to send reminders")
             
+            # Interest accrual on overdue utang (batch job, see interest_accrual.py)
+            st.markdown("### Overdue Interest Accrual")
+            current_schedule = get_setting("accrualSchedule", "monthly")
+            current_method = get_setting("accrualMethod", "simple")
+            col1, col2 = st.columns(2)
+            with col1:
+                accrual_schedule = st.selectbox("Accrual Schedule", SCHEDULES,
+                                                index=SCHEDULES.index(current_schedule) if current_schedule in SCHEDULES else 1)
+                accrual_rate = st.number_input("Accrual Rate (% per month)",
+                                               min_value=0.0,
+                                               max_value=50.0,
+                                               value=float(get_setting("accrualRate", 3.0)),
+                                               step=0.5)
+            with col2:
+                accrual_method = st.selectbox("Accrual Method", METHODS,
+                                              index=METHODS.index(current_method) if current_method in METHODS else 0,
+                                              help="Compound also charges interest on unpaid accrued interest")
+                accrual_grace_days = st.number_input("Grace Days After Due Date",
+                                                     min_value=0,
+                                                     max_value=365,
+                                                     value=int(get_setting("accrualGraceDays", 0)),
+                                                     step=1)
+            
             if st.form_submit_button("Save Settings", use_container_width=True):
                 update_setting("currencySymbol", currency_symbol)
                 update_setting("appName", app_name)
                 update_setting("interestRate", interest_rate)
                 update_setting("customerCreditLimit", customer_credit_limit)
                 update_setting("dueDateReminderDays", reminder_days)
+                update_setting("accrualSchedule", accrual_schedule)
+                update_setting("accrualMethod", accrual_method)
+                update_setting("accrualRate", accrual_rate)
+                update_setting("accrualGraceDays", accrual_grace_days)
                 st.success("Settings saved successfully!")
         
+        # Accrual normally runs as a scheduled job; this runs the latest ended period for my customers now
+        if st.button("💹 Accrue Overdue Interest Now (My Customers)", use_container_width=True):
+            with st.spinner("Accruing interest..."):
+                result = run_interest_accrual(owner_username=st.session_state.username)
+            if result["success"]:
+                st.success(f"Period {result['period']}: charged {result['customers']} customers "
+                           f"{format_currency(from_cents(result['accrued_cents']))} ({result['skipped']} already charged)")
+            else:
+                st.error(result["message"])
+        
         st.markdown("</div></div>", unsafe_allow_html=True)
     
     # Danger zone
@@ -2180,6 +2607,7 @@ def show_settings():
         
         st.markdown("</div></div>", unsafe_allow_html=True)
 
+@timed("page")
 def show_owner_profile():
     """Show owner profile settings with organized message containers"""
     st.markdown("## 👤 Owner Profile Settings")
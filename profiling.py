@@ -0,0 +1,126 @@
+"""Timing and on-demand profiling hooks for pages and key service calls.
+
+Functions decorated with @timed("page") or @timed("services") record each call's
+duration, the page being rendered and whether it raised into an in-memory ring
+buffer (the most recent RING_BUFFER_SIZE calls of the process), which the
+owner profiling panel summarizes per function. Recording costs one
+perf_counter pair and a deque append, so it is always on.
+
+For a deeper look, RerunProfiler runs a single rerun under cProfile (top
+functions by cumulative time) or tracemalloc (peak memory and the lines that
+allocated the most), and turns the result into a text report.
+"""
+import contextvars
+import cProfile
+import functools
+import io
+import pstats
+import statistics
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+
+RING_BUFFER_SIZE = 2000
+REPORT_LINES = 30
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+_timings = deque(maxlen=RING_BUFFER_SIZE)
+_current_page = contextvars.ContextVar('iums_profiling_page', default=None)
+
+def set_page(page):
+    """Label the timings recorded during the current rerun with a page name"""
+    _current_page.set(page)
+
+def timed(kind):
+    """Decorator recording every call's duration into the ring buffer under 'module.function'"""
+    def decorator(function):
+        name = f"{function.__module__}.{function.__name__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            raised = True
+            try:
+                result = function(*args, **kwargs)
+                raised = False
+                return result
+            finally:
+                _timings.append((kind, name, _current_page.get(), (time.perf_counter() - started) * 1000, time.time(), raised))
+        return wrapper
+    return decorator
+
+def get_timings():
+    """Recorded calls, oldest first, as dicts"""
+    return [
+        {"kind": kind, "name": name, "page": page, "ms": ms, "at": at, "raised": raised}
+        for kind, name, page, ms, at, raised in list(_timings)
+    ]
+
+def clear_timings():
+    """Empty the ring buffer"""
+    _timings.clear()
+
+def summarize_timings():
+    """Per-function call count, mean, p95 and max milliseconds, slowest mean first"""
+    groups = {}
+    for kind, name, page, ms, at, raised in list(_timings):
+        group = groups.setdefault(name, {"kind": kind, "name": name, "samples": [], "last_page": page})
+        group["samples"].append(ms)
+        group["last_page"] = page
+
+    summary = []
+    for group in groups.values():
+        samples = group.pop("samples")
+        group["calls"] = len(samples)
+        group["mean_ms"] = statistics.fmean(samples)
+        group["p95_ms"] = statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0]
+        group["max_ms"] = max(samples)
+        summary.append(group)
+    return sorted(summary, key=lambda group: group["mean_ms"], reverse=True)
+
+class RerunProfiler:
+    """Profile everything between start() and stop() with cProfile or tracemalloc"""
+    def __init__(self, mode):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}")
+        self.mode = mode
+        self._profiler = None
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            tracemalloc.start()
+        return self
+
+    def stop(self, page=None):
+        """Stop profiling; returns a report dict with the text to show"""
+        elapsed_ms = (time.perf_counter() - self._started) * 1000
+        stream = io.StringIO()
+
+        if self.mode == "cprofile":
+            self._profiler.disable()
+            pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative").print_stats(REPORT_LINES)
+        else:
+            snapshot = tracemalloc.take_snapshot()
+            current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            snapshot = snapshot.filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>")
+            ))
+            stream.write(f"Peak traced memory: {peak_bytes / (1024 * 1024):.2f} MB, still allocated: {current_bytes / (1024 * 1024):.2f} MB\n\n")
+            for stat in snapshot.statistics("lineno")[:REPORT_LINES]:
+                stream.write(f"{stat}\n")
+
+        return {
+            "mode": self.mode,
+            "page": page,
+            "at": datetime.now().isoformat(timespec='seconds'),
+            "elapsed_ms": elapsed_ms,
+            "text": stream.getvalue()
+        }
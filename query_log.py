@@ -0,0 +1,207 @@
+"""Per-rerun SQL query log and N+1 detector.
+
+While a rerun is being logged (start_rerun() ... finish_rerun(), driven by
+iums.main() when an owner turns on the query debug panel), get_connection()
+hands out instrumented connections that record every statement's text,
+parameter shape, duration, rows returned and calling function. Statements run
+many times in one rerun with different parameters (a query inside a loop, like
+calculate_balance per customer) are reported as N+1 suspects.
+
+The same instrumented connections feed the iums_db_query_seconds histogram
+(see metrics.py) whenever a metrics exporter is running. Otherwise, when no
+rerun is being logged, get_connection() uses plain sqlite3 connections and
+nothing here adds any overhead.
+"""
+import contextvars
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from metrics import histogram, is_exporting
+
+# A statement repeated this many times in one rerun is flagged as an N+1 suspect
+N_PLUS_ONE_THRESHOLD = 5
+# Stop recording individual statements past this many per rerun (counts still add up)
+MAX_STATEMENTS = 5000
+
+_current_rerun = contextvars.ContextVar('iums_query_log_rerun', default=None)
+_WHITESPACE = re.compile(r"\s+")
+
+DB_QUERY_SECONDS = histogram("iums_db_query_seconds", "SQLite statement execute time in seconds", ["statement"])
+
+def normalize_sql(sql):
+    """Collapse whitespace so the same statement from different call sites compares equal"""
+    return _WHITESPACE.sub(" ", sql).strip()
+
+def params_shape(parameters):
+    """Describe bound parameters by type only, never by value (e.g. 'str, int')"""
+    if not parameters:
+        return ""
+    if isinstance(parameters, dict):
+        return ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items())
+    return ", ".join(type(value).__name__ for value in parameters)
+
+def _caller():
+    """'module.function' of the code that ran the statement, and of the code that called it"""
+    frame = sys._getframe(2)
+    names = []
+    while frame and len(names) < 2:
+        module = os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
+        if module != "query_log":
+            names.append(f"{module}.{frame.f_code.co_name}")
+        frame = frame.f_back
+    return " ← ".join(names)
+
+class RerunLog:
+    """Statements and connections recorded during one Streamlit rerun"""
+    def __init__(self, page):
+        self.page = page
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.statements = []
+        self.statement_count = 0
+        self.connections = 0
+        self.total_ms = 0.0
+
+    def record(self, sql, shape, duration_ms, caller):
+        """Add one executed statement; returns its entry so fetches can add rows and time"""
+        self.statement_count += 1
+        self.total_ms += duration_ms
+        entry = {"sql": normalize_sql(sql), "params": shape, "ms": duration_ms, "rows": 0, "caller": caller}
+        if len(self.statements) < MAX_STATEMENTS:
+            self.statements.append(entry)
+        return entry
+
+    def add_fetch(self, entry, rows, duration_ms):
+        """Charge rows fetched (and the time spent fetching them) to a statement"""
+        entry["rows"] += rows
+        entry["ms"] += duration_ms
+        self.total_ms += duration_ms
+
+    def repeated_statements(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """Statements run at least threshold times in this rerun, most frequent first"""
+        groups = {}
+        for entry in self.statements:
+            group = groups.setdefault(entry["sql"], {"sql": entry["sql"], "count": 0, "ms": 0.0, "rows": 0, "callers": {}})
+            group["count"] += 1
+            group["ms"] += entry["ms"]
+            group["rows"] += entry["rows"]
+            group["callers"][entry["caller"]] = group["callers"].get(entry["caller"], 0) + 1
+        repeated = [group for group in groups.values() if group["count"] >= threshold]
+        return sorted(repeated, key=lambda group: group["count"], reverse=True)
+
+    def summary(self):
+        """One-line numbers for the rerun history table"""
+        return {
+            "page": self.page,
+            "started_at": self.started_at,
+            "statements": self.statement_count,
+            "connections": self.connections,
+            "sql_ms": round(self.total_ms, 2),
+            "n_plus_one": len(self.repeated_statements())
+        }
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that records each execute and the rows fetched from it in the current rerun log"""
+    _entry = None
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(sql, params_shape(parameters), started)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        shape = f"{len(seq_of_parameters)} × ({params_shape(seq_of_parameters[0])})" if seq_of_parameters else ""
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(sql, shape, started)
+
+    def executescript(self, sql_script):
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._record(sql_script, "", started)
+
+    def _record(self, sql, shape, started):
+        elapsed = time.perf_counter() - started
+        DB_QUERY_SECONDS.observe(elapsed, statement=sql.lstrip().split(None, 1)[0].lower() if sql.strip() else "")
+        rerun = _current_rerun.get()
+        self._entry = rerun.record(sql, shape, elapsed * 1000, _caller()) if rerun else None
+        if self._entry is not None and self.rowcount > 0:
+            # Writes report affected rows; SELECTs count rows as they are fetched
+            self._entry["rows"] = self.rowcount
+
+    def _fetched(self, rows, started):
+        rerun = _current_rerun.get()
+        if rerun and self._entry is not None:
+            rerun.add_fetch(self._entry, rows, (time.perf_counter() - started) * 1000)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(row is not None, started)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(len(rows), started)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(len(rows), started)
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        row = super().__next__()
+        self._fetched(1, started)
+        return row
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute shortcuts) are instrumented"""
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+def get_connection_factory():
+    """Connection class for get_connection(): instrumented only while a rerun is logged or metrics are exported"""
+    rerun = _current_rerun.get()
+    if rerun is None:
+        return InstrumentedConnection if is_exporting() else sqlite3.Connection
+    rerun.connections += 1
+    return InstrumentedConnection
+
+def start_rerun(page):
+    """Start logging the current rerun's statements under a page name"""
+    rerun = RerunLog(page)
+    _current_rerun.set(rerun)
+    return rerun
+
+def current_rerun():
+    """The rerun being logged in this session/thread, or None"""
+    return _current_rerun.get()
+
+def finish_rerun():
+    """Stop logging and return the finished rerun log (None if nothing was being logged)"""
+    rerun = _current_rerun.get()
+    _current_rerun.set(None)
+    return rerun
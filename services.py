@@ -0,0 +1,1869 @@
+"""Core accounting API: accounts, transactions, OTP confirmation, due dates, alerts, balances and reports.
+
+Nothing here imports Streamlit. Functions that act on behalf of a user take
+that user explicitly (created_by, owner_username, actor_username), so the same
+calls work from the dashboards, CLIs, background workers and benchmarks.
+"""
+import json
+import sqlite3
+import uuid
+from datetime import datetime, timedelta
+from database import (
+    get_connection, get_read_connection, serialized_write,
+    is_sharding_enabled, lookup_shard, register_account, unregister_account, rename_catalog_account,
+    get_shard_file_for_owner, activate_shard, get_active_shard, update_daily_rollups
+)
+from email_utils import email_service
+from ids import new_ulid
+from money import to_cents, from_cents, percent_of_cents
+from dates import to_day_number, from_day_number, today_day_number
+from allocations import allocate_customer_payments, rebuild_customer_allocations, has_open_utang
+from profiling import timed
+from metrics import counter, histogram
+
+# Due date reminder runs (see metrics.py)
+DUE_DATE_CHECKS = counter("iums_due_date_checks_total", "check_due_dates() runs by result", ["result"])
+DUE_DATE_CHECK_SECONDS = histogram("iums_due_date_check_seconds", "check_due_dates() run time in seconds")
+DUE_DATE_REMINDERS = counter("iums_due_date_reminders_total", "Due date reminders sent by channel", ["channel"])
+
+# ID and date generation
+def generate_id():
+    """Generate unique, time-ordered ID"""
+    return new_ulid()
+
+def get_current_date():
+    """Get current date in YYYY-MM-DD format"""
+    return datetime.now().strftime("%Y-%m-%d")
+
+def get_current_datetime():
+    """Get current datetime"""
+    return datetime.now().isoformat()
+
+def calculate_due_date(days=30):
+    """Calculate default due date (30 days from today)"""
+    return (datetime.now() + timedelta(days=days)).strftime("%Y-%m-%d")
+
+# Account Management
+def get_account(username):
+    """Get account by username"""
+    conn = get_read_connection()
+    if not conn:
+        return None
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('SELECT * FROM accounts WHERE username = ?', (username,))
+        row = cursor.fetchone()
+        conn.close()
+        
+        if not row:
+            return None
+        
+        personal_info = json.loads(row[4]) if row[4] else {}
+        
+        return {
+            "username": row[0],
+            "password": row[1],
+            "role": row[2],
+            "debtLimit": from_cents(row["debt_limit_cents"]),
+            "personalInfo": personal_info,
+            "created_date": row[5],
+            "created_by": row[6] if len(row) > 6 else "system"
+        }
+    except Exception as e:
+        conn.close()
+        return None
+
+def get_personal_info(usernames):
+    """Get {username: personal info} for many accounts in one query (usernames without an account are left out)"""
+    conn = get_read_connection()
+    if not conn:
+        return {}
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+            SELECT username, personal_info FROM accounts
+            WHERE username IN (SELECT value FROM json_each(?))
+        ''', (json.dumps(list(usernames)),))
+        rows = cursor.fetchall()
+        conn.close()
+        return {row[0]: json.loads(row[1]) if row[1] else {} for row in rows}
+    except Exception as e:
+        conn.close()
+        print(f"Error getting personal info: {e}")
+        return {}
+
+def get_account_owner(account):
+    """Get the owner a row belongs to: owners own themselves, customers belong to their creator"""
+    if not account:
+        return None
+    if account.get("role") == "Owner":
+        return account["username"]
+    return account.get("created_by")
+
+@serialized_write
+def create_account(username, password, role, personal_info=None, created_by=None):
+    """Create new account with creator tracking"""
+    if not username or not password:
+        return False, "Username and password are required"
+    
+    # Usernames are unique across all shards, so check the catalog too
+    if get_account(username) or (is_sharding_enabled() and lookup_shard(username)):
+        return False, "Username already exists"
+    
+    if role == "Customer":
+        debt_limit_cents = to_cents(get_setting("customerCreditLimit", 10000.00))
+    else:
+        debt_limit_cents = 0
+    
+    if personal_info is None:
+        personal_info = {
+            "full_name": "",
+            "email": "",
+            "address": ""
+        }
+    
+    personal_info_json = json.dumps(personal_info)
+    
+    # Accounts created outside a user action (imports, scripts) belong to "system"
+    if created_by is None:
+        created_by = "system"
+    
+    # A new owner starts a new shard; customers live in their creator's shard
+    previous_shard = get_active_shard()
+    if is_sharding_enabled():
+        shard_file = get_shard_file_for_owner(username if role == "Owner" else created_by)
+        activate_shard(shard_file)
+    
+    conn = get_connection()
+    if not conn:
+        return False, "Database connection failed"
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+            INSERT INTO accounts (username, password, role, debt_limit_cents, personal_info, created_date, created_by)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (username, password, role, debt_limit_cents, personal_info_json, get_current_datetime(), created_by))
+        
+        conn.commit()
+        conn.close()
+        
+        if is_sharding_enabled():
+            register_account(username, role, username if role == "Owner" else created_by, shard_file)
+        
+        # Send welcome alert to the new account
+        if role == "Customer":
+            send_alert(username, f"Welcome to IUMS! Your account has been created by {created_by}.")
+        
+        return True, f"{role} account created successfully!"
+    except Exception as e:
+        conn.close()
+        return False, f"Error creating account: {str(e)}"
+    finally:
+        if is_sharding_enabled():
+            activate_shard(previous_shard)
+
+def list_accounts(role_filter=None):
+    """Get all accounts with optional role filter"""
+    conn = get_read_connection()
+    if not conn:
+        return []
+        
+    cursor = conn.cursor()
+    
+    try:
+        if role_filter:
+            cursor.execute('SELECT * FROM accounts WHERE role = ?', (role_filter,))
+        else:
+            cursor.execute('SELECT * FROM accounts')
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        accounts = []
+        for row in rows:
+            personal_info = json.loads(row[4]) if row[4] else {}
+            accounts.append({
+                "username": row[0],
+                "password": row[1],
+                "role": row[2],
+                "debtLimit": from_cents(row["debt_limit_cents"]),
+                "personalInfo": personal_info,
+                "created_date": row[5],
+                "created_by": row[6] if len(row) > 6 else "system"
+            })
+        
+        return accounts
+    except Exception as e:
+        conn.close()
+        return []
+
+def list_my_accounts(owner_username):
+    """Get accounts created by a specific owner"""
+    if not owner_username:
+        return []
+    
+    conn = get_read_connection()
+    if not conn:
+        return []
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('SELECT * FROM accounts WHERE created_by = ?', (owner_username,))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        accounts = []
+        for row in rows:
+            personal_info = json.loads(row[4]) if row[4] else {}
+            accounts.append({
+                "username": row[0],
+                "password": row[1],
+                "role": row[2],
+                "debtLimit": from_cents(row["debt_limit_cents"]),
+                "personalInfo": personal_info,
+                "created_date": row[5],
+                "created_by": row[6] if len(row) > 6 else "system"
+            })
+        
+        return accounts
+    except Exception as e:
+        conn.close()
+        return []
+
+@serialized_write
+def delete_account(username, actor_username):
+    """Delete account and related data on behalf of actor_username (who must have created it)"""
+    account = get_account(username)
+    if not account:
+        return False, "Account not found"
+    
+    if username == actor_username:
+        return False, "Cannot delete your own account"
+    
+    # Check if the acting user is the creator of this account
+    if account.get("created_by") != actor_username:
+        return False, "You can only delete accounts you created"
+    
+    conn = get_connection()
+    if not conn:
+        return False, "Database connection failed"
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('DELETE FROM accounts WHERE username = ?', (username,))
+        cursor.execute('DELETE FROM alerts WHERE username = ?', (username,))
+        update_daily_rollups(cursor, "customer = ?", (username,), sign=-1)
+        cursor.execute('DELETE FROM payment_allocations WHERE customer = ?', (username,))
+        cursor.execute('DELETE FROM interest_accruals WHERE customer = ?', (username,))
+        cursor.execute('DELETE FROM transactions WHERE customer = ?', (username,))
+        
+        conn.commit()
+        conn.close()
+        
+        if is_sharding_enabled():
+            unregister_account(username)
+        return True, "Account deleted successfully"
+    except Exception as e:
+        conn.close()
+        return False, f"Error deleting account: {str(e)}"
+
+@serialized_write
+def update_account_password(username, new_password):
+    """Update account password"""
+    conn = get_connection()
+    if not conn:
+        return False, "Database connection failed"
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+            UPDATE accounts SET password = ? WHERE username = ?
+        ''', (new_password, username))
+        
+        conn.commit()
+        conn.close()
+        
+        send_alert(username, "Your account password has been updated successfully.")
+        return True, "Password updated successfully"
+    except Exception as e:
+        conn.close()
+        return False, f"Error updating password: {str(e)}"
+
+@serialized_write
+def update_personal_info(username, personal_info):
+    """Replace an account's personal information (full name, email, address)"""
+    conn = get_connection()
+    if not conn:
+        return False, "Database connection failed"
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('UPDATE accounts SET personal_info = ? WHERE username = ?', (json.dumps(personal_info), username))
+        
+        conn.commit()
+        conn.close()
+        return True, "Personal information updated successfully"
+    except Exception as e:
+        conn.close()
+        return False, f"Error updating personal information: {str(e)}"
+
+@serialized_write
+def update_account_username(old_username, new_username):
+    """Update account username"""
+    if get_account(new_username) or (is_sharding_enabled() and lookup_shard(new_username)):
+        return False, "Username already exists"
+    
+    conn = get_connection()
+    if not conn:
+        return False, "Database connection failed"
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('UPDATE accounts SET username = ? WHERE username = ?', (new_username, old_username))
+        cursor.execute('UPDATE transactions SET customer = ? WHERE customer = ?', (new_username, old_username))
+        cursor.execute('UPDATE payment_allocations SET customer = ? WHERE customer = ?', (new_username, old_username))
+        cursor.execute('UPDATE interest_accruals SET customer = ? WHERE customer = ?', (new_username, old_username))
+        cursor.execute('UPDATE alerts SET username = ? WHERE username = ?', (new_username, old_username))
+        # Keep creator and denormalized owner references pointing at the renamed owner
+        cursor.execute('UPDATE accounts SET created_by = ? WHERE created_by = ?', (new_username, old_username))
+        cursor.execute('UPDATE transactions SET owner = ? WHERE owner = ?', (new_username, old_username))
+        cursor.execute('UPDATE alerts SET owner = ? WHERE owner = ?', (new_username, old_username))
+        cursor.execute('UPDATE daily_rollups SET owner = ? WHERE owner = ?', (new_username, old_username))
+        cursor.execute('UPDATE payment_allocations SET owner = ? WHERE owner = ?', (new_username, old_username))
+        cursor.execute('UPDATE interest_accruals SET owner = ? WHERE owner = ?', (new_username, old_username))
+        
+        conn.commit()
+        conn.close()
+        
+        if is_sharding_enabled():
+            rename_catalog_account(old_username, new_username)
+        
+        send_alert(new_username, f"Your account username has been updated from '{old_username}' to '{new_username}'.")
+        return True, "Username updated successfully"
+    except Exception as e:
+        conn.close()
+        return False, f"Error updating username: {str(e)}"
+
+# Transaction Management with Due Date Support
+TRANSACTION_COLUMNS = (
+    "id", "customer", "type", "description", "amount_cents", "date", "confirmed", "otp", "created_by", "created_at",
+    "status", "interest_rate", "interest_cents", "principal_cents", "due_date", "owner", "date_day", "due_day",
+    "remaining_cents", "settlement_status"
+)
+
+@serialized_write
+def insert_pending_transaction(values):
+    """Insert one transactions row awaiting OTP confirmation (values in TRANSACTION_COLUMNS order)"""
+    conn = get_connection()
+    if not conn:
+        raise sqlite3.OperationalError("Database connection failed")
+    
+    try:
+        conn.execute(f'''
+            INSERT INTO transactions ({", ".join(TRANSACTION_COLUMNS)})
+            VALUES ({", ".join("?" * len(TRANSACTION_COLUMNS))})
+        ''', values)
+        conn.commit()
+    finally:
+        conn.close()
+
+def create_pending_transaction_with_due_date(customer, transaction_type, description, amount, created_by=None, interest_rate=0, due_date=None):
+    """Create a pending transaction with due date that waits for OTP confirmation"""
+    customer_account = get_account(customer)
+    if not customer_account:
+        return None, "Customer account not found"
+    owner = get_account_owner(customer_account)
+    
+    # COMPREHENSIVE None handling for amount
+    if amount is None:
+        return None, "Amount cannot be empty"
+    
+    # Handle different types of None values
+    if isinstance(amount, str) and amount.strip() == "":
+        return None, "Amount cannot be empty"
+    
+    try:
+        # Convert to integer cents safely with comprehensive error handling
+        principal_cents = to_cents(amount)
+        if principal_cents <= 0:
+            return None, "Amount must be greater than 0"
+    except (ValueError, TypeError) as e:
+        print(f"Amount conversion error: {e}, amount value: {amount}, type: {type(amount)}")
+        return None, f"Please enter a valid amount. Error: {str(e)}"
+    
+    transaction_id = generate_id()
+    otp = str(uuid.uuid4().int)[:6]
+    
+    # Calculate interest if applicable (exact integer cents)
+    interest_cents = 0
+    if transaction_type == "utang" and interest_rate > 0:
+        interest_cents = percent_of_cents(principal_cents, interest_rate)
+    amount_cents = principal_cents + interest_cents
+    
+    final_amount = from_cents(amount_cents)
+    amount_float = from_cents(principal_cents)
+    interest_amount = from_cents(interest_cents)
+    
+    # Set default due date if not provided (30 days from today)
+    if not due_date:
+        due_date = calculate_due_date(30)
+    
+    try:
+        insert_pending_transaction((
+            transaction_id, customer, transaction_type, description, amount_cents,
+            get_current_date(), False, otp, created_by or "system", 
+            get_current_datetime(), "pending_otp", interest_rate, interest_cents, 
+            principal_cents, due_date, owner, today_day_number(), to_day_number(due_date),
+            amount_cents, "open"
+        ))
+        
+        # Get customer details for email
+        customer_name = customer_account.get("personalInfo", {}).get("full_name", customer)
+        customer_email = customer_account.get("personalInfo", {}).get("email", "")
+        
+        # Send OTP to customer via email AND alert
+        days_until_due = to_day_number(due_date) - today_day_number()
+        
+        # Send email if email is provided and service is configured
+        if customer_email and email_service.is_configured:
+            email_sent = email_service.send_otp_email(
+                recipient_email=customer_email,
+                customer_name=customer_name,
+                otp_code=otp,
+                transaction_type=transaction_type,
+                amount=final_amount,
+                description=description,
+                due_date=due_date if transaction_type == "utang" else None
+            )
+            
+            if email_sent:
+                email_status = " (Email sent)"
+            else:
+                email_status = " (Email failed)"
+        else:
+            email_status = " (Email not configured)"
+        
+        # Also send alert to customer's web account
+        if transaction_type == "utang":
+            if interest_rate > 0:
+                alert_message = f"📝 NEW UTANG PENDING: {description}\nAmount: {format_currency(final_amount)} (Principal: {format_currency(amount_float)} + {interest_rate}% Interest: {format_currency(interest_amount)})\nDue Date: {due_date} ({days_until_due} days from today)\nOTP for confirmation: {otp}{email_status}"
+            else:
+                alert_message = f"📝 NEW UTANG PENDING: {description}\nAmount: {format_currency(amount_float)}\nDue Date: {due_date} ({days_until_due} days from today)\nOTP for confirmation: {otp}{email_status}"
+        else:
+            alert_message = f"💰 PAYMENT PENDING: {description}\nAmount: {format_currency(amount_float)}\nOTP for confirmation: {otp}{email_status}"
+        
+        send_alert(customer, alert_message)
+        
+        transaction = {
+            "id": transaction_id,
+            "customer": customer,
+            "type": transaction_type,
+            "description": description,
+            "amount": final_amount,
+            "date": get_current_date(),
+            "confirmed": False,
+            "otp": otp,
+            "created_by": created_by or "system",
+            "created_at": get_current_datetime(),
+            "status": "pending_otp",
+            "interest_rate": interest_rate,
+            "interest_amount": interest_amount,
+            "principal_amount": amount_float,
+            "due_date": due_date,
+            "owner": owner
+        }
+        
+        print(f"✅ Transaction created with ID: {transaction_id}")
+        return transaction, f"OTP sent to customer. Please ask customer for OTP to complete transaction."
+    except Exception as e:
+        return None, f"Error creating transaction: {str(e)}"
+
+def confirmation_alert_message(row, settled_utang=()):
+    """Alert text telling a customer that a transactions row was confirmed (and which utang it paid off)"""
+    description = row["description"]
+    amount = from_cents(row["amount_cents"])
+    
+    if row["type"] == "utang":
+        interest_rate = row["interest_rate"] or 0
+        if interest_rate > 0:
+            alert_message = f"✅ UTANG CONFIRMED: {description}\nTotal: {format_currency(amount)} (Principal: {format_currency(from_cents(row['principal_cents']))} + Interest: {format_currency(from_cents(row['interest_cents']))})"
+        else:
+            alert_message = f"✅ UTANG CONFIRMED: {description}\nAmount: {format_currency(amount)}"
+        
+        if row["due_date"] and row["due_day"] is not None:
+            days_until_due = row["due_day"] - today_day_number()
+            alert_message += f"\n📅 Due Date: {row['due_date']} ({days_until_due} days from today)"
+    else:
+        alert_message = f"✅ PAYMENT CONFIRMED: {description}\nAmount: {format_currency(amount)}"
+    
+    if settled_utang:
+        alert_message += f"\n🧾 Fully paid: {', '.join(settled_utang)}"
+    return alert_message
+
+# Invalid OTPs allowed per transaction; after that it can no longer be confirmed and has to be recorded again
+MAX_OTP_ATTEMPTS = 5
+OTP_ATTEMPTS_EXCEEDED = "Too many invalid OTP attempts. Delete this transaction and record it again"
+
+@timed("services")
+@serialized_write
+def confirm_transaction_with_otp(transaction_id, otp):
+    """Confirm a pending transaction with OTP"""
+    conn = get_connection()
+    if not conn:
+        return False, "Database connection failed"
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('SELECT * FROM transactions WHERE id = ?', (transaction_id,))
+        row = cursor.fetchone()
+        
+        if not row:
+            conn.close()
+            return False, "Transaction not found"
+        
+        if row[6]:  # confirmed field
+            conn.close()
+            return False, "Transaction already confirmed"
+        
+        if (row["otp_attempts"] or 0) >= MAX_OTP_ATTEMPTS:
+            conn.close()
+            return False, OTP_ATTEMPTS_EXCEEDED
+        
+        if row[7] != otp:  # otp field
+            cursor.execute('UPDATE transactions SET otp_attempts = COALESCE(otp_attempts, 0) + 1 WHERE id = ?', (transaction_id,))
+            conn.commit()
+            conn.close()
+            return False, "Invalid OTP"
+        
+        cursor.execute('''
+            UPDATE transactions 
+            SET confirmed = 1, confirmed_at = ?, status = 'confirmed'
+            WHERE id = ?
+        ''', (get_current_datetime(), transaction_id))
+        update_daily_rollups(cursor, "id = ?", (transaction_id,))
+        
+        # Apply any unallocated payment credit to the oldest open utang (only affected rows are touched)
+        settled_utang = allocate_customer_payments(cursor, row["customer"])
+        fully_paid = bool(settled_utang) and not has_open_utang(cursor, row["customer"])
+        
+        conn.commit()
+        
+        customer = row["customer"]
+        
+        # Send confirmation alert
+        send_alert(customer, confirmation_alert_message(row, settled_utang))
+        
+        if fully_paid:
+            send_alert(customer, "🎉 All utang fully paid!")
+        conn.close()
+        return True, "Transaction confirmed successfully"
+    except Exception as e:
+        conn.close()
+        return False, f"Error confirming transaction: {str(e)}"
+
+# Rows fetched per IN (...) query, well under SQLite's bound parameter limit
+BULK_CONFIRM_CHUNK = 500
+
+@timed("services")
+@serialized_write
+def confirm_transactions_with_otp(pairs, owner_username=None):
+    """Confirm many (transaction_id, otp) pairs in one database transaction.
+    
+    Each pair is checked like confirm_transaction_with_otp; the valid ones are confirmed
+    together, with the daily rollups updated once and each affected customer's payment
+    allocations run once. Returns {transaction_id: (success, message)} in input order.
+    """
+    results = {}
+    pairs = [(str(transaction_id), str(otp).strip()) for transaction_id, otp in pairs]
+    if not pairs:
+        return results
+    
+    conn = get_connection()
+    if not conn:
+        return {transaction_id: (False, "Database connection failed") for transaction_id, _ in pairs}
+        
+    cursor = conn.cursor()
+    
+    try:
+        ids = list(dict.fromkeys(transaction_id for transaction_id, _ in pairs))
+        rows = {}
+        for start in range(0, len(ids), BULK_CONFIRM_CHUNK):
+            chunk = ids[start:start + BULK_CONFIRM_CHUNK]
+            cursor.execute(f'SELECT * FROM transactions WHERE id IN ({", ".join("?" * len(chunk))})', chunk)
+            rows.update((row["id"], row) for row in cursor.fetchall())
+        
+        confirmed = []
+        invalid_ids = []
+        for transaction_id, otp in pairs:
+            row = rows.get(transaction_id)
+            if transaction_id in results:
+                continue
+            if not row or (owner_username and row["owner"] != owner_username):
+                results[transaction_id] = (False, "Transaction not found")
+            elif row["confirmed"]:
+                results[transaction_id] = (False, "Transaction already confirmed")
+            elif (row["otp_attempts"] or 0) >= MAX_OTP_ATTEMPTS:
+                results[transaction_id] = (False, OTP_ATTEMPTS_EXCEEDED)
+            elif row["otp"] != otp:
+                results[transaction_id] = (False, "Invalid OTP")
+                invalid_ids.append((transaction_id,))
+            else:
+                results[transaction_id] = (True, "Transaction confirmed successfully")
+                confirmed.append(row)
+        
+        cursor.executemany('UPDATE transactions SET otp_attempts = COALESCE(otp_attempts, 0) + 1 WHERE id = ?', invalid_ids)
+        if not confirmed:
+            conn.commit()
+            conn.close()
+            return results
+        
+        confirmed_ids = [row["id"] for row in confirmed]
+        cursor.executemany('''
+            UPDATE transactions 
+            SET confirmed = 1, confirmed_at = ?, status = 'confirmed'
+            WHERE id = ?
+        ''', [(get_current_datetime(), transaction_id) for transaction_id in confirmed_ids])
+        for start in range(0, len(confirmed_ids), BULK_CONFIRM_CHUNK):
+            chunk = confirmed_ids[start:start + BULK_CONFIRM_CHUNK]
+            update_daily_rollups(cursor, f'id IN ({", ".join("?" * len(chunk))})', chunk)
+        
+        # Allocate each customer's new payment credit once, however many of their items were confirmed
+        settled_by_customer = {}
+        fully_paid = []
+        for customer in dict.fromkeys(row["customer"] for row in confirmed):
+            settled_by_customer[customer] = allocate_customer_payments(cursor, customer)
+            if settled_by_customer[customer] and not has_open_utang(cursor, customer):
+                fully_paid.append(customer)
+        
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        conn.close()
+        return {transaction_id: (False, f"Error confirming transaction: {str(e)}") for transaction_id, _ in pairs}
+    
+    # One confirmation alert per item; the customer's last one lists the utang that got paid off
+    last_row = {row["customer"]: row["id"] for row in confirmed}
+    alerts = [
+        (row["customer"], confirmation_alert_message(row, settled_by_customer[row["customer"]] if last_row[row["customer"]] == row["id"] else ()))
+        for row in confirmed
+    ]
+    alerts.extend((customer, "🎉 All utang fully paid!") for customer in fully_paid)
+    send_alerts(alerts)
+    return results
+
+def transaction_from_row(row):
+    """Convert a transactions row into the dict used by the dashboards (money in pesos)"""
+    amount_cents = row["amount_cents"] if row["amount_cents"] is not None else 0
+    principal_cents = row["principal_cents"] if row["principal_cents"] is not None else amount_cents
+    
+    return {
+        "id": row["id"] if row["id"] is not None else "",
+        "customer": row["customer"] if row["customer"] is not None else "",
+        "type": row["type"] if row["type"] is not None else "utang",
+        "description": row["description"] if row["description"] is not None else "",
+        "amount": from_cents(amount_cents),
+        "date": row["date"] if row["date"] is not None else get_current_date(),
+        "confirmed": bool(row["confirmed"]) if row["confirmed"] is not None else False,
+        "otp": row["otp"] if row["otp"] is not None else "",
+        "created_by": row["created_by"] if row["created_by"] is not None else "system",
+        "created_at": row["created_at"] if row["created_at"] is not None else get_current_datetime(),
+        "confirmed_at": row["confirmed_at"] if row["confirmed_at"] is not None else "",
+        "status": row["status"] if row["status"] is not None else "pending",
+        "interest_rate": float(row["interest_rate"]) if row["interest_rate"] is not None else 0.0,
+        "interest_amount": from_cents(row["interest_cents"]),
+        "principal_amount": from_cents(principal_cents),
+        "due_date": row["due_date"] if row["due_date"] else None,
+        "days_until_due": row["due_day"] - today_day_number() if row["due_day"] is not None else None,
+        "owner": row["owner"],
+        "remaining_amount": from_cents(row["remaining_cents"] if row["remaining_cents"] is not None else amount_cents),
+        "settlement_status": row["settlement_status"] or "open",
+        "settled_at": row["settled_at"]
+    }
+
+def get_transaction(transaction_id):
+    """Get one transaction by ID (None if it does not exist)"""
+    conn = get_read_connection()
+    if not conn:
+        return None
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('SELECT * FROM transactions WHERE id = ?', (transaction_id,))
+        row = cursor.fetchone()
+        conn.close()
+        return transaction_from_row(row) if row else None
+    except Exception as e:
+        conn.close()
+        return None
+
+@timed("services")
+def get_customer_transactions(username):
+    """Get all transactions for a customer with safe column access"""
+    conn = get_read_connection()
+    if not conn:
+        return []
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('SELECT * FROM transactions WHERE customer = ? ORDER BY date DESC', (username,))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        transactions = []
+        for row in rows:
+            try:
+                transaction = transaction_from_row(row)
+                transactions.append(transaction)
+            except Exception as e:
+                print(f"Error processing transaction row: {e}")
+                continue
+        
+        return transactions
+    except Exception as e:
+        conn.close()
+        print(f"Error getting customer transactions: {e}")
+        return []
+
+def get_pending_transactions(customer_username=None, owner_username=None):
+    """Get pending transactions (unconfirmed), optionally scoped to a customer or an owner's customers"""
+    conn = get_read_connection()
+    if not conn:
+        return []
+        
+    cursor = conn.cursor()
+    
+    try:
+        if customer_username:
+            cursor.execute('SELECT * FROM transactions WHERE confirmed = 0 AND customer = ?', (customer_username,))
+        elif owner_username:
+            cursor.execute('''
+                SELECT * FROM transactions
+                WHERE owner = ? AND status IN ('pending', 'pending_otp') AND confirmed = 0
+            ''', (owner_username,))
+        else:
+            cursor.execute('SELECT * FROM transactions WHERE confirmed = 0')
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        pending = []
+        for row in rows:
+            transaction = transaction_from_row(row)
+            pending.append(transaction)
+        
+        return pending
+    except Exception as e:
+        conn.close()
+        return []
+
+def get_my_pending_transactions(owner_username):
+    """Get pending transactions for customers created by a specific owner"""
+    return get_pending_transactions(owner_username=owner_username)
+
+@serialized_write
+def delete_transaction(transaction_id):
+    """Delete a transaction"""
+    conn = get_connection()
+    if not conn:
+        return False
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('SELECT customer, confirmed FROM transactions WHERE id = ?', (transaction_id,))
+        row = cursor.fetchone()
+        
+        update_daily_rollups(cursor, "id = ?", (transaction_id,), sign=-1)
+        cursor.execute('DELETE FROM transactions WHERE id = ?', (transaction_id,))
+        # Deleting an interest accrual entry waives it; the period stays recorded so it is not re-accrued
+        cursor.execute('UPDATE interest_accruals SET transaction_id = NULL WHERE transaction_id = ?', (transaction_id,))
+        
+        # Removing a confirmed utang or payment changes what every later payment settled
+        if row and row["confirmed"]:
+            rebuild_customer_allocations(cursor, row["customer"])
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        conn.close()
+        return False
+
+def get_all_transactions():
+    """Get all transactions from the database with comprehensive None handling"""
+    conn = get_read_connection()
+    if not conn:
+        return []
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('SELECT * FROM transactions ORDER BY date DESC, created_at DESC')
+        rows = cursor.fetchall()
+        conn.close()
+        
+        transactions = []
+        for row in rows:
+            try:
+                transaction = transaction_from_row(row)
+                transactions.append(transaction)
+            except Exception as e:
+                print(f"Error processing transaction row: {e}")
+                continue
+        
+        return transactions
+    except Exception as e:
+        conn.close()
+        print(f"Error getting all transactions: {e}")
+        return []
+
+@timed("services")
+def get_my_transactions(owner_username):
+    """Get transactions for customers created by a specific owner"""
+    conn = get_read_connection()
+    if not conn:
+        return []
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+            SELECT * FROM transactions
+            WHERE owner = ?
+            ORDER BY date DESC, created_at DESC
+        ''', (owner_username,))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        transactions = []
+        for row in rows:
+            try:
+                transaction = transaction_from_row(row)
+                transactions.append(transaction)
+            except Exception as e:
+                print(f"Error processing transaction row: {e}")
+                continue
+        
+        return transactions
+    except Exception as e:
+        conn.close()
+        print(f"Error getting my transactions: {e}")
+        return []
+
+# Due Date Management System
+REMINDER_DAYS_AHEAD = 7
+
+def get_due_reminder_rows(days_ahead=REMINDER_DAYS_AHEAD):
+    """Confirmed, still unpaid utang due within days_ahead days or overdue, soonest first (None if the query fails)"""
+    conn = get_read_connection()
+    if not conn:
+        return None
+        
+    cursor = conn.cursor()
+    
+    try:
+        today = today_day_number()
+        
+        # remaining_cents is kept by the payment allocations; a range scan on the partial index of open utang
+        cursor.execute('''
+            SELECT t.id, t.customer, t.description, t.amount_cents, t.due_date, t.due_day - ? AS days_until_due
+            FROM transactions t
+            WHERE t.type = 'utang' 
+            AND t.confirmed = 1 
+            AND t.remaining_cents > 0
+            AND t.due_day <= ?
+            ORDER BY t.due_day ASC
+        ''', (today, today + days_ahead))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+    except Exception as e:
+        conn.close()
+        print(f"Error getting due date reminders: {e}")
+        return None
+
+def due_reminder_message(description, amount, due_date, days_until_due):
+    """Alert text for an utang that is due soon, due today or overdue"""
+    if days_until_due == 0:
+        return f"🚨 DUE TODAY: Your utang '{description}' for {format_currency(amount)} is DUE TODAY! Please make payment immediately."
+    elif days_until_due < 0:
+        return f"🚨 OVERDUE: Your utang '{description}' for {format_currency(amount)} was due {abs(days_until_due)} days ago! Please pay immediately."
+    elif days_until_due <= 3:
+        return f"⏰ URGENT: Your utang '{description}' for {format_currency(amount)} is due in {days_until_due} days ({due_date}). Please prepare payment."
+    return f"📅 REMINDER: Your utang '{description}' for {format_currency(amount)} is due in {days_until_due} days ({due_date})."
+
+def due_check_summary(total_checked, reminders_sent, email_reminders_sent):
+    """Record a finished reminder run in the metrics and describe it for the UI"""
+    DUE_DATE_CHECKS.inc(result="ok")
+    DUE_DATE_REMINDERS.inc(reminders_sent, channel="web")
+    DUE_DATE_REMINDERS.inc(email_reminders_sent, channel="email")
+    
+    email_status = f" + {email_reminders_sent} email reminders" if email_reminders_sent > 0 else ""
+    return f"✅ Checked {total_checked} utang due within {REMINDER_DAYS_AHEAD} days or overdue. Sent {reminders_sent} web alerts{email_status} for ACTIVE utang."
+
+@timed("services")
+@DUE_DATE_CHECK_SECONDS.time()
+def check_due_dates():
+    """Check all due dates and send reminders for APPROACHING deadlines - ONLY FOR UNPAID UTANG"""
+    rows = get_due_reminder_rows()
+    if rows is None:
+        DUE_DATE_CHECKS.inc(result="error")
+        return False, "Error checking due dates: could not read due utang"
+    
+    reminders = []
+    for row in rows:
+        amount = from_cents(row["amount_cents"])
+        reminders.append((row, amount, due_reminder_message(row["description"], amount, row["due_date"], row["days_until_due"])))
+    
+    # One transaction for every alert instead of one queued write per utang
+    reminders_sent = send_alerts([(row["customer"], message) for row, _, message in reminders])
+    
+    # Send email reminders if configured (one account lookup for all customers)
+    email_reminders_sent = 0
+    if email_service.is_configured:
+        personal_info = get_personal_info({row["customer"] for row in rows})
+        for row, amount, _ in reminders:
+            customer_info = personal_info.get(row["customer"], {})
+            if not customer_info.get("email"):
+                continue
+            try:
+                if email_service.send_due_date_reminder(
+                    customer_info["email"], customer_info.get("full_name", row["customer"]),
+                    row["description"], amount, row["due_date"], row["days_until_due"]
+                ):
+                    email_reminders_sent += 1
+            except Exception as e:
+                print(f"Error emailing due date reminder to {row['customer']}: {e}")
+    
+    return True, due_check_summary(len(rows), reminders_sent, email_reminders_sent)
+
+@timed("services")
+def get_upcoming_due_dates(days_threshold=7, owner_username=None):
+    """Get all utang with due dates approaching within the specified days - ONLY FOR UNPAID UTANG"""
+    conn = get_read_connection()
+    if not conn:
+        return []
+        
+    cursor = conn.cursor()
+    
+    # Owner scope goes through the denormalized owner column (partial index of open utang by owner, due_day)
+    today = today_day_number()
+    owner_clause = "AND t.owner = ? AND t.status = 'confirmed'" if owner_username else ""
+    params = (today, today + days_threshold) + ((owner_username,) if owner_username else ())
+    
+    try:
+        # Overdue and upcoming due dates: one range predicate on the day number
+        cursor.execute(f'''
+            SELECT t.customer, t.description, t.amount_cents, t.remaining_cents, t.due_date, t.due_day - ? AS days_until_due
+            FROM transactions t
+            WHERE t.type = 'utang' 
+            AND t.confirmed = 1 
+            AND t.remaining_cents > 0
+            AND t.due_day <= ?
+            {owner_clause}
+            ORDER BY t.due_day ASC
+        ''', params)
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [{
+            'customer': row["customer"],
+            'description': row["description"],
+            'amount': from_cents(row["amount_cents"]),
+            'remaining': from_cents(row["remaining_cents"]),
+            'due_date': row["due_date"],
+            'days_until_due': row["days_until_due"]
+        } for row in rows]
+    except Exception as e:
+        conn.close()
+        return []
+
+def get_my_upcoming_due_dates(owner_username, days_threshold=7):
+    """Get upcoming due dates for customers created by a specific owner"""
+    return get_upcoming_due_dates(days_threshold, owner_username=owner_username)
+
+@timed("services")
+def get_overdue_transactions(owner_username=None):
+    """Get all overdue transactions - ONLY FOR UNPAID UTANG"""
+    conn = get_read_connection()
+    if not conn:
+        return []
+        
+    cursor = conn.cursor()
+    
+    today = today_day_number()
+    owner_clause = "AND t.owner = ? AND t.status = 'confirmed'" if owner_username else ""
+    params = (today, today) + ((owner_username,) if owner_username else ())
+    
+    try:
+        cursor.execute(f'''
+            SELECT t.customer, t.description, t.amount_cents, t.remaining_cents, t.due_date, ? - t.due_day AS days_overdue
+            FROM transactions t
+            WHERE t.type = 'utang' 
+            AND t.confirmed = 1 
+            AND t.remaining_cents > 0
+            AND t.due_day < ?
+            {owner_clause}
+            ORDER BY t.due_day ASC
+        ''', params)
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [{
+            'customer': row["customer"],
+            'description': row["description"],
+            'amount': from_cents(row["amount_cents"]),
+            'remaining': from_cents(row["remaining_cents"]),
+            'due_date': row["due_date"],
+            'days_overdue': row["days_overdue"]
+        } for row in rows]
+    except Exception as e:
+        conn.close()
+        return []
+
+def get_my_overdue_transactions(owner_username):
+    """Get overdue transactions for customers created by a specific owner"""
+    return get_overdue_transactions(owner_username=owner_username)
+
+# Alert System
+@serialized_write
+def send_alert(username, message):
+    """Send alert to user"""
+    account = get_account(username)
+    if not account:
+        return False
+    
+    alert_id = generate_id()
+    
+    conn = get_connection()
+    if not conn:
+        return False
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+            INSERT INTO alerts (id, username, date, timestamp, message, read, owner)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (alert_id, username, get_current_date(), get_current_datetime(), message, False, get_account_owner(account)))
+        
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        conn.close()
+        return False
+
+@serialized_write
+def send_alerts(alerts):
+    """Send many (username, message) alerts in one transaction; returns how many were written"""
+    if not alerts:
+        return 0
+    
+    conn = get_connection()
+    if not conn:
+        return 0
+        
+    cursor = conn.cursor()
+    date, timestamp = get_current_date(), get_current_datetime()
+    
+    try:
+        # Same owner rule as get_account_owner(); users without an account get no alert
+        cursor.executemany('''
+            INSERT INTO alerts (id, username, date, timestamp, message, read, owner)
+            SELECT ?, username, ?, ?, ?, 0, CASE WHEN role = 'Owner' THEN username ELSE created_by END
+            FROM accounts WHERE username = ?
+        ''', [(generate_id(), date, timestamp, message, username) for username, message in alerts])
+        sent = cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        return sent
+    except Exception as e:
+        conn.close()
+        print(f"Error sending alerts: {e}")
+        return 0
+
+@timed("services")
+def get_alerts(username):
+    """Get user alerts"""
+    conn = get_read_connection()
+    if not conn:
+        return []
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+            SELECT * FROM alerts WHERE username = ? ORDER BY timestamp DESC LIMIT 50
+        ''', (username,))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        alerts = []
+        for row in rows:
+            alerts.append({
+                "id": row[0],
+                "username": row[1],
+                "date": row[2],
+                "timestamp": row[3],
+                "message": row[4],
+                "read": bool(row[5])
+            })
+        
+        return alerts
+    except Exception as e:
+        conn.close()
+        return []
+
+@serialized_write
+def mark_alerts_read(username):
+    """Mark all alerts as read"""
+    conn = get_connection()
+    if not conn:
+        return False
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('UPDATE alerts SET read = 1 WHERE username = ?', (username,))
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        conn.close()
+        return False
+
+@serialized_write
+def delete_alert(alert_id):
+    """Delete an alert"""
+    conn = get_connection()
+    if not conn:
+        return False
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('DELETE FROM alerts WHERE id = ?', (alert_id,))
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        conn.close()
+        return False
+
+# Balance and Reporting
+@timed("services")
+def calculate_balance(username):
+    """Calculate customer balance with SQL aggregates over integer cents"""
+    empty_balance = {
+        "total_debt": 0,
+        "total_payment": 0,
+        "outstanding": 0,
+        "debt_limit": 0,
+        "available_credit": 0,
+        "total_interest_paid": 0
+    }
+    
+    conn = get_read_connection()
+    if not conn:
+        return empty_balance
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+            SELECT COALESCE(SUM(CASE WHEN type = 'utang' THEN amount_cents ELSE 0 END), 0) AS total_debt,
+                   COALESCE(SUM(CASE WHEN type = 'payment' THEN amount_cents ELSE 0 END), 0) AS total_payment,
+                   COALESCE(SUM(interest_cents), 0) AS total_interest
+            FROM transactions
+            WHERE customer = ? AND confirmed = 1
+        ''', (username,))
+        totals = cursor.fetchone()
+        
+        cursor.execute('SELECT debt_limit_cents FROM accounts WHERE username = ?', (username,))
+        account_row = cursor.fetchone()
+        conn.close()
+        
+        outstanding_cents = totals["total_debt"] - totals["total_payment"]
+        debt_limit_cents = (account_row["debt_limit_cents"] or 0) if account_row else 0
+        
+        return {
+            "total_debt": from_cents(totals["total_debt"]),
+            "total_payment": from_cents(totals["total_payment"]),
+            "outstanding": from_cents(outstanding_cents),
+            "debt_limit": from_cents(debt_limit_cents),
+            "available_credit": from_cents(max(0, debt_limit_cents - outstanding_cents)),
+            "total_interest_paid": from_cents(totals["total_interest"])
+        }
+    except Exception as e:
+        conn.close()
+        print(f"Error calculating balance for {username}: {e}")
+        return empty_balance
+
+def get_top_debtors(limit=5):
+    """Get customers with highest outstanding balances"""
+    try:
+        customers = list_accounts("Customer")
+        
+        debtor_balances = []
+        for account in customers:
+            balance = calculate_balance(account["username"])
+            if balance["outstanding"] > 0:
+                debtor_balances.append((account["username"], balance["outstanding"]))
+        
+        debtor_balances.sort(key=lambda x: x[1], reverse=True)
+        return debtor_balances[:limit]
+    except Exception as e:
+        return []
+
+def get_my_top_debtors(owner_username, limit=5):
+    """Get customers created by specific owner with highest outstanding balances"""
+    try:
+        debtor_balances = [
+            (username, balance["outstanding"])
+            for username, balance in get_my_customer_balances(owner_username).items()
+            if balance["outstanding"] > 0
+        ]
+        
+        debtor_balances.sort(key=lambda x: x[1], reverse=True)
+        return debtor_balances[:limit]
+    except Exception as e:
+        return []
+
+@timed("services")
+def get_my_customer_balances(owner_username):
+    """Get outstanding balance and interest for every customer of an owner in one grouped query"""
+    conn = get_read_connection()
+    if not conn:
+        return {}
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+            SELECT a.username,
+                   COALESCE(SUM(CASE WHEN t.type = 'utang' THEN t.amount_cents ELSE 0 END), 0) AS total_debt,
+                   COALESCE(SUM(CASE WHEN t.type = 'payment' THEN t.amount_cents ELSE 0 END), 0) AS total_payment,
+                   COALESCE(SUM(t.interest_cents), 0) AS total_interest
+            FROM accounts a
+            LEFT JOIN transactions t ON t.customer = a.username AND t.confirmed = 1
+            WHERE a.created_by = ? AND a.role = 'Customer'
+            GROUP BY a.username
+        ''', (owner_username,))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        balances = {}
+        for row in rows:
+            username, total_debt, total_payment, total_interest = row
+            balances[username] = {
+                "total_debt": from_cents(total_debt),
+                "total_payment": from_cents(total_payment),
+                "outstanding": from_cents(total_debt - total_payment),
+                "total_interest_paid": from_cents(total_interest)
+            }
+        
+        return balances
+    except Exception as e:
+        conn.close()
+        print(f"Error getting customer balances for {owner_username}: {e}")
+        return {}
+
+# Receivables aging: (key, label, first day past due, last day past due), None = open-ended.
+# Shared by the Reports aging table and analytics.aging_buckets()
+AGING_BUCKETS = [
+    ("current", "Not yet due", None, -1),
+    ("0_30", "0-30 days", 0, 30),
+    ("31_60", "31-60 days", 31, 60),
+    ("61_90", "61-90 days", 61, 90),
+    ("90_plus", "90+ days", 91, None)
+]
+
+def _aging_bucket_case():
+    """SQL CASE assigning days_past_due (NULL = no due date, not yet due) to its AGING_BUCKETS key"""
+    whens = "\n".join(
+        f"WHEN days_past_due <= {high} THEN '{key}'"
+        for key, _, _, high in AGING_BUCKETS if high is not None
+    )
+    return f"CASE WHEN days_past_due IS NULL THEN '{AGING_BUCKETS[0][0]}' {whens} ELSE '{AGING_BUCKETS[-1][0]}' END"
+
+# Unpaid part of each confirmed utang of an owner, as kept by the payment allocations
+# (remaining_cents), bucketed by days past its due_day.
+OPEN_UTANG_CTE = f'''
+    WITH open_utang AS (
+        SELECT id, customer, description, date, due_date, due_day, amount_cents, remaining_cents
+        FROM transactions
+        WHERE owner = ? AND type = 'utang' AND confirmed = 1 AND remaining_cents > 0
+    ),
+    dated AS (
+        SELECT *, ? - due_day AS days_past_due
+        FROM open_utang
+    ),
+    aged AS (
+        SELECT *, {_aging_bucket_case()} AS bucket
+        FROM dated
+    )
+'''
+
+@timed("services")
+def get_receivables_aging(owner_username):
+    """Get outstanding utang per aging bucket for each customer of an owner (one grouped query) plus owner totals"""
+    conn = get_read_connection()
+    if not conn:
+        return {"customers": [], "totals": {}}
+        
+    cursor = conn.cursor()
+    
+    bucket_sums = ",\n".join(
+        f"SUM(CASE WHEN bucket = '{key}' THEN remaining_cents ELSE 0 END) AS cents_{key}"
+        for key, *_ in AGING_BUCKETS
+    )
+    
+    try:
+        cursor.execute(f'''
+            {OPEN_UTANG_CTE}
+            SELECT customer, COUNT(*) AS open_count, SUM(remaining_cents) AS outstanding_cents,
+                   {bucket_sums}
+            FROM aged
+            GROUP BY customer
+            ORDER BY outstanding_cents DESC
+        ''', (owner_username, today_day_number()))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        customers = []
+        totals = {key: 0.0 for key, *_ in AGING_BUCKETS}
+        totals["outstanding"] = 0.0
+        totals["open_count"] = 0
+        for row in rows:
+            customer = {
+                "customer": row["customer"],
+                "open_count": row["open_count"],
+                "outstanding": from_cents(row["outstanding_cents"])
+            }
+            for key, *_ in AGING_BUCKETS:
+                customer[key] = from_cents(row[f"cents_{key}"])
+                totals[key] = round(totals[key] + customer[key], 2)
+            totals["outstanding"] = round(totals["outstanding"] + customer["outstanding"], 2)
+            totals["open_count"] += row["open_count"]
+            customers.append(customer)
+        
+        return {"customers": customers, "totals": totals}
+    except Exception as e:
+        conn.close()
+        print(f"Error getting receivables aging for {owner_username}: {e}")
+        return {"customers": [], "totals": {}}
+
+def get_aging_drilldown(owner_username, bucket, customer=None, page=1, page_size=25):
+    """Get one page of the open utang in an aging bucket (optionally for one customer) and the total count"""
+    conn = get_read_connection()
+    if not conn:
+        return [], 0
+        
+    cursor = conn.cursor()
+    
+    customer_clause = "AND customer = ?" if customer else ""
+    filters = (bucket, customer) if customer else (bucket,)
+    offset = (max(page, 1) - 1) * page_size
+    
+    try:
+        cursor.execute(f'''
+            {OPEN_UTANG_CTE}
+            SELECT id, customer, description, date, due_date, amount_cents, remaining_cents, days_past_due,
+                   COUNT(*) OVER () AS total_count
+            FROM aged
+            WHERE bucket = ? {customer_clause}
+            ORDER BY days_past_due DESC, id
+            LIMIT ? OFFSET ?
+        ''', (owner_username, today_day_number()) + filters + (page_size, offset))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        items = [{
+            "id": row["id"],
+            "customer": row["customer"],
+            "description": row["description"],
+            "date": row["date"],
+            "due_date": row["due_date"],
+            "amount": from_cents(row["amount_cents"]),
+            "remaining": from_cents(row["remaining_cents"]),
+            "days_past_due": row["days_past_due"]
+        } for row in rows]
+        total_count = rows[0]["total_count"] if rows else 0
+        return items, total_count
+    except Exception as e:
+        conn.close()
+        print(f"Error getting aging drill-down for {owner_username}: {e}")
+        return [], 0
+
+@timed("services")
+def get_daily_trend(owner_username, days=90):
+    """Get an owner's daily utang, payment and interest totals for the last `days` days from daily_rollups"""
+    today = today_day_number()
+    start_day = today - days + 1
+    trend = {
+        "dates": [from_day_number(day) for day in range(start_day, today + 1)],
+        "utang": [0.0] * days,
+        "payment": [0.0] * days,
+        "interest": [0.0] * days,
+        "count": [0] * days
+    }
+    
+    conn = get_read_connection()
+    if not conn:
+        return trend
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+            SELECT day, type, txn_count, amount_cents, interest_cents
+            FROM daily_rollups
+            WHERE owner = ? AND status = 'confirmed' AND day BETWEEN ? AND ?
+        ''', (owner_username, start_day, today))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        # Zero-filled series: days without activity have no rollup row
+        for row in rows:
+            index = row["day"] - start_day
+            if row["type"] in ("utang", "payment"):
+                trend[row["type"]][index] = from_cents(row["amount_cents"])
+            if row["type"] == "utang":
+                trend["interest"][index] = from_cents(row["interest_cents"])
+            trend["count"][index] += row["txn_count"]
+        
+        return trend
+    except Exception as e:
+        conn.close()
+        print(f"Error getting daily trend for {owner_username}: {e}")
+        return trend
+
+# Settings Management
+def get_setting(key, default=None):
+    """Get system setting"""
+    conn = get_read_connection()
+    if not conn:
+        return default
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('SELECT value FROM system_settings WHERE key = ?', (key,))
+        row = cursor.fetchone()
+        conn.close()
+        
+        if not row:
+            return default
+        
+        value = row[0]
+        try:
+            if '.' in value:
+                return float(value)
+            else:
+                return int(value)
+        except ValueError:
+            return value
+    except Exception as e:
+        conn.close()
+        return default
+
+@serialized_write
+def update_setting(key, value):
+    """Update system setting"""
+    conn = get_connection()
+    if not conn:
+        return False
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+            INSERT OR REPLACE INTO system_settings (key, value) VALUES (?, ?)
+        ''', (key, str(value)))
+        
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        conn.close()
+        return False
+
+@serialized_write
+def reset_all_data():
+    """Reset all application data"""
+    conn = get_connection()
+    if not conn:
+        return False, "Database connection failed"
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('DELETE FROM accounts')
+        cursor.execute('DELETE FROM transactions')
+        cursor.execute('DELETE FROM alerts')
+        cursor.execute('DELETE FROM daily_rollups')
+        cursor.execute('DELETE FROM payment_allocations')
+        cursor.execute('DELETE FROM interest_accruals')
+        
+        default_settings = [
+            ('currencySymbol', '₱'),
+            ('appName', 'IUMS'),
+            ('customerCreditLimit', '10000.00'),
+            ('interestRate', '3.0'),
+            ('dueDateReminderDays', '7,3,1,0'),
+            ('accrualSchedule', 'monthly'),
+            ('accrualMethod', 'simple'),
+            ('accrualRate', '3.0'),
+            ('accrualGraceDays', '0')
+        ]
+        
+        cursor.executemany('''
+            INSERT OR REPLACE INTO system_settings (key, value) VALUES (?, ?)
+        ''', default_settings)
+        
+        conn.commit()
+        conn.close()
+        return True, "All data has been reset successfully"
+    except Exception as e:
+        conn.close()
+        return False, f"Error resetting data: {str(e)}"
+
+# Utility Functions
+def format_currency(amount):
+    """Format amount as currency with comprehensive None handling"""
+    symbol = get_setting("currencySymbol", "₱")
+    try:
+        # Handle None values and empty strings
+        if amount is None:
+            amount = 0.0
+        elif isinstance(amount, str) and amount.strip() == "":
+            amount = 0.0
+        
+        amount_float = float(amount)
+        return f"{symbol} {amount_float:,.2f}"
+    except (ValueError, TypeError):
+        return f"{symbol} 0.00"
+
+def get_customer_list():
+    """Get list of all customer usernames"""
+    try:
+        return [acc["username"] for acc in list_accounts("Customer")]
+    except Exception as e:
+        return []
+
+def get_my_customer_list(owner_username):
+    """Get list of customer usernames created by specific owner"""
+    if not owner_username:
+        return []
+    
+    conn = get_read_connection()
+    if not conn:
+        return []
+        
+    cursor = conn.cursor()
+    
+    try:
+        # Only usernames are needed, so skip loading and parsing personal_info
+        cursor.execute('''
+            SELECT username FROM accounts WHERE created_by = ? AND role = 'Customer'
+        ''', (owner_username,))
+        rows = cursor.fetchall()
+        conn.close()
+        return [row[0] for row in rows]
+    except Exception as e:
+        conn.close()
+        print(f"Error getting customer list: {e}")
+        return []
+
+def validate_amount(amount):
+    """Validate amount input with comprehensive None handling"""
+    try:
+        if amount is None:
+            return False, "Amount cannot be empty"
+        
+        if isinstance(amount, str):
+            amount = amount.strip()
+            if amount == "":
+                return False, "Amount cannot be empty"
+        
+        amount_float = float(amount)
+        if amount_float <= 0:
+            return False, "Amount must be greater than 0"
+        if amount_float > 1000000:  # Reasonable upper limit
+            return False, "Amount is too large"
+            
+        return True, amount_float
+    except (ValueError, TypeError) as e:
+        return False, f"Please enter a valid number: {str(e)}"
+
+def get_personal_info_display(account):
+    """Get formatted personal information for display without contact number"""
+    try:
+        personal_info = account.get("personalInfo", {})
+        full_name = personal_info.get("full_name", "Not provided")
+        email = personal_info.get("email", "Not provided")
+        address = personal_info.get("address", "Not provided")
+        
+        info_lines = []
+        if full_name and full_name != "Not provided":
+            info_lines.append(f"Name: {full_name}")
+        if email and email != "Not provided":
+            info_lines.append(f"Email: {email}")
+        if address and address != "Not provided":
+            info_lines.append(f"Address: {address}")
+        
+        return "\n".join(info_lines) if info_lines else "No personal information"
+    except Exception as e:
+        return "Error loading personal information"
+
+def calculate_interest(principal, interest_rate):
+    """Calculate interest amount with comprehensive None handling"""
+    try:
+        if principal is None:
+            return 0.0
+        
+        if isinstance(principal, str) and principal.strip() == "":
+            return 0.0
+            
+        return from_cents(percent_of_cents(to_cents(principal), float(interest_rate)))
+    except (ValueError, TypeError):
+        return 0.0
+
+def get_interest_rate():
+    """Get the current interest rate from settings"""
+    return get_setting("interestRate", 3.0)
+
+def get_transaction_totals(owner_username=None):
+    """Get transaction counts and confirmed money totals (in cents) with one aggregate query"""
+    conn = get_read_connection()
+    if not conn:
+        return None
+        
+    cursor = conn.cursor()
+    
+    owner_clause = "WHERE owner = ?" if owner_username else ""
+    params = (owner_username,) if owner_username else ()
+    
+    try:
+        cursor.execute(f'''
+            SELECT COUNT(*) AS total,
+                   COALESCE(SUM(confirmed = 1), 0) AS confirmed,
+                   COALESCE(SUM(confirmed = 1 AND type = 'utang'), 0) AS utang,
+                   COALESCE(SUM(confirmed = 1 AND type = 'payment'), 0) AS payment,
+                   COALESCE(SUM(CASE WHEN confirmed = 1 AND type = 'utang' THEN amount_cents ELSE 0 END), 0) AS utang_cents,
+                   COALESCE(SUM(CASE WHEN confirmed = 1 AND type = 'payment' THEN amount_cents ELSE 0 END), 0) AS payment_cents,
+                   COALESCE(SUM(CASE WHEN confirmed = 1 AND type = 'utang' THEN interest_cents ELSE 0 END), 0) AS interest_cents
+            FROM transactions
+            {owner_clause}
+        ''', params)
+        row = cursor.fetchone()
+        conn.close()
+        return row
+    except Exception as e:
+        conn.close()
+        print(f"Error getting transaction totals: {e}")
+        return None
+
+def get_transaction_statistics():
+    """Get comprehensive transaction statistics"""
+    try:
+        totals = get_transaction_totals()
+        accounts = list_accounts("Customer")
+        
+        # Due date statistics
+        upcoming_due_dates = get_upcoming_due_dates(7)
+        overdue_transactions = get_overdue_transactions()
+        
+        # Count customers with debt
+        customers_with_debt = 0
+        for acc in accounts:
+            balance = calculate_balance(acc["username"])
+            if balance["outstanding"] > 0:
+                customers_with_debt += 1
+        
+        return {
+            "total_transactions": totals["total"],
+            "confirmed_transactions": totals["confirmed"],
+            "pending_transactions": totals["total"] - totals["confirmed"],
+            "utang_transactions": totals["utang"],
+            "payment_transactions": totals["payment"],
+            "total_utang_amount": from_cents(totals["utang_cents"]),
+            "total_payment_amount": from_cents(totals["payment_cents"]),
+            "total_interest_amount": from_cents(totals["interest_cents"]),
+            "net_outstanding": from_cents(totals["utang_cents"] - totals["payment_cents"]),
+            "active_customers": len(accounts),
+            "customers_with_debt": customers_with_debt,
+            "upcoming_due_dates": len(upcoming_due_dates),
+            "overdue_transactions": len(overdue_transactions)
+        }
+    except Exception as e:
+        print(f"Error getting transaction statistics: {e}")
+        return {
+            "total_transactions": 0,
+            "confirmed_transactions": 0,
+            "pending_transactions": 0,
+            "utang_transactions": 0,
+            "payment_transactions": 0,
+            "total_utang_amount": 0,
+            "total_payment_amount": 0,
+            "total_interest_amount": 0,
+            "net_outstanding": 0,
+            "active_customers": 0,
+            "customers_with_debt": 0,
+            "upcoming_due_dates": 0,
+            "overdue_transactions": 0
+        }
+
+@timed("services")
+def get_my_transaction_statistics(owner_username):
+    """Get transaction statistics for customers created by specific owner"""
+    try:
+        # Get my customers with their balances in a single grouped query
+        customer_balances = get_my_customer_balances(owner_username)
+        
+        if not customer_balances:
+            return {
+                "total_transactions": 0,
+                "confirmed_transactions": 0,
+                "pending_transactions": 0,
+                "utang_transactions": 0,
+                "payment_transactions": 0,
+                "total_utang_amount": 0,
+                "total_payment_amount": 0,
+                "total_interest_amount": 0,
+                "net_outstanding": 0,
+                "active_customers": 0,
+                "customers_with_debt": 0,
+                "upcoming_due_dates": 0,
+                "overdue_transactions": 0
+            }
+        
+        # Aggregate my customers' transactions in SQL (cents)
+        totals = get_transaction_totals(owner_username)
+        
+        # Due date statistics for my customers
+        upcoming_due_dates = get_my_upcoming_due_dates(owner_username, 7)
+        overdue_transactions = get_my_overdue_transactions(owner_username)
+        
+        # Count my customers with debt
+        customers_with_debt = len([b for b in customer_balances.values() if b["outstanding"] > 0])
+        
+        return {
+            "total_transactions": totals["total"],
+            "confirmed_transactions": totals["confirmed"],
+            "pending_transactions": totals["total"] - totals["confirmed"],
+            "utang_transactions": totals["utang"],
+            "payment_transactions": totals["payment"],
+            "total_utang_amount": from_cents(totals["utang_cents"]),
+            "total_payment_amount": from_cents(totals["payment_cents"]),
+            "total_interest_amount": from_cents(totals["interest_cents"]),
+            "net_outstanding": from_cents(totals["utang_cents"] - totals["payment_cents"]),
+            "active_customers": len(customer_balances),
+            "customers_with_debt": customers_with_debt,
+            "upcoming_due_dates": len(upcoming_due_dates),
+            "overdue_transactions": len(overdue_transactions)
+        }
+    except Exception as e:
+        print(f"Error getting my transaction statistics: {e}")
+        return {
+            "total_transactions": 0,
+            "confirmed_transactions": 0,
+            "pending_transactions": 0,
+            "utang_transactions": 0,
+            "payment_transactions": 0,
+            "total_utang_amount": 0,
+            "total_payment_amount": 0,
+            "total_interest_amount": 0,
+            "net_outstanding": 0,
+            "active_customers": 0,
+            "customers_with_debt": 0,
+            "upcoming_due_dates": 0,
+            "overdue_transactions": 0
+        }
+
+# Customer-specific due date functions
+def get_customer_due_dates(username, max_days_until_due):
+    """Get a customer's unpaid utang due on or before today + max_days_until_due, with days until due computed in SQL"""
+    conn = get_read_connection()
+    if not conn:
+        return []
+        
+    cursor = conn.cursor()
+    
+    today = today_day_number()
+    
+    try:
+        cursor.execute('''
+            SELECT description, amount_cents, remaining_cents, due_date, due_day - ? AS days_until_due
+            FROM transactions
+            WHERE customer = ? AND type = 'utang' AND confirmed = 1 AND remaining_cents > 0 AND due_day <= ?
+            ORDER BY due_day ASC
+        ''', (today, username, today + max_days_until_due))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+    except Exception as e:
+        conn.close()
+        print(f"Error getting due dates for {username}: {e}")
+        return []
+
+def get_upcoming_due_dates_for_customer(username, days_threshold=7):
+    """Get upcoming due dates for a specific customer - ONLY FOR UNPAID UTANG"""
+    return [{
+        'description': row["description"],
+        'amount': from_cents(row["amount_cents"]),
+        'remaining': from_cents(row["remaining_cents"]),
+        'due_date': row["due_date"],
+        'days_until_due': row["days_until_due"]
+    } for row in get_customer_due_dates(username, days_threshold)]
+
+def get_overdue_transactions_for_customer(username):
+    """Get overdue transactions for a specific customer - ONLY FOR UNPAID UTANG"""
+    return [{
+        'description': row["description"],
+        'amount': from_cents(row["amount_cents"]),
+        'remaining': from_cents(row["remaining_cents"]),
+        'due_date': row["due_date"],
+        'days_overdue': -row["days_until_due"]
+    } for row in get_customer_due_dates(username, -1)]
+
+def verify_transaction_exists(transaction_id):
+    """Verify if a transaction exists in the database"""
+    conn = get_read_connection()
+    if not conn:
+        return False
+        
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('SELECT id FROM transactions WHERE id = ?', (transaction_id,))
+        row = cursor.fetchone()
+        conn.close()
+        return row is not None
+    except Exception as e:
+        conn.close()
+        return False
\ No newline at end of file
@@ -0,0 +1,301 @@
+"""Columnar snapshot export of transactions, accounts and alerts for offline analytics.
+
+The live database is first copied with the SQLite online backup API, so the
+export reads one consistent snapshot and never holds locks on the live file.
+Tables are written as compressed Parquet (or Arrow IPC) files partitioned by
+owner and month:
+
+    <out>/transactions/owner=<owner>/month=<YYYY-MM>/part-<run>.parquet
+    <out>/alerts/owner=<owner>/month=<YYYY-MM>/part-<run>.parquet
+    <out>/accounts/owner=<owner>/accounts.parquet   (rewritten each run, no passwords)
+
+Runs are incremental: confirmed transactions are appended by confirmed_at and
+alerts by timestamp, using high-water marks kept in <out>/_state.json. Only new
+rows are picked up: later edits or deletes of rows that were already exported
+(and alerts marked read afterwards) are not propagated, so run with --full to
+rebuild the export from scratch when those need to show up.
+
+Each run writes into <out>/_staging-<run>/ and is published at the end: the
+list of moves and the new watermarks are recorded in <out>/_pending.json before
+any file is moved, and a run that finds that file finishes the publish first.
+A crash before that point leaves the published export and watermarks untouched
+(the staged files are discarded), so a rerun never writes duplicate parts.
+
+    python snapshot_export.py --out analytics/ [--format arrow] [--full]
+"""
+import glob
+import itertools
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.feather as feather
+
+import database
+from ids import new_ulid
+
+FETCH_BATCH_SIZE = 10000
+STATE_FILE = "_state.json"
+PENDING_FILE = "_pending.json"
+STAGING_PREFIX = "_staging-"
+
+TRANSACTIONS_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("customer", pa.string()),
+    ("type", pa.string()),
+    ("description", pa.string()),
+    ("amount_cents", pa.int64()),
+    ("principal_cents", pa.int64()),
+    ("interest_cents", pa.int64()),
+    ("interest_rate", pa.float64()),
+    ("date", pa.string()),
+    ("due_date", pa.string()),
+    ("status", pa.string()),
+    ("created_by", pa.string()),
+    ("created_at", pa.string()),
+    ("confirmed_at", pa.string())
+])
+
+ALERTS_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("username", pa.string()),
+    ("date", pa.string()),
+    ("timestamp", pa.string()),
+    ("message", pa.string()),
+    ("read", pa.bool_())
+])
+
+ACCOUNTS_SCHEMA = pa.schema([
+    ("username", pa.string()),
+    ("role", pa.string()),
+    ("debt_limit_cents", pa.int64()),
+    ("personal_info", pa.string()),
+    ("created_date", pa.string()),
+    ("created_by", pa.string())
+])
+
+# Incremental tables: (schema, query). Each query selects the owner and month partition
+# keys and the watermark value first, then the exported columns.
+INCREMENTAL_TABLES = {
+    "transactions": (TRANSACTIONS_SCHEMA, '''
+        SELECT COALESCE(owner, '_unassigned') AS owner, substr(date, 1, 7) AS month,
+               COALESCE(NULLIF(confirmed_at, ''), created_at) AS watermark,
+               id, customer, type, description, amount_cents, principal_cents, interest_cents,
+               interest_rate, date, due_date, status, created_by, created_at, confirmed_at
+        FROM transactions
+        WHERE confirmed = 1 AND COALESCE(NULLIF(confirmed_at, ''), created_at) > ?
+        ORDER BY owner, month, watermark
+    '''),
+    "alerts": (ALERTS_SCHEMA, '''
+        SELECT COALESCE(owner, '_unassigned') AS owner, substr(date, 1, 7) AS month,
+               timestamp AS watermark,
+               id, username, date, timestamp, message, read
+        FROM alerts
+        WHERE timestamp > ?
+        ORDER BY owner, month, watermark
+    ''')
+}
+
+ACCOUNTS_QUERY = '''
+    SELECT CASE WHEN role = 'Owner' THEN username ELSE COALESCE(created_by, 'system') END AS owner,
+           username, role, debt_limit_cents, personal_info, created_date, created_by
+    FROM accounts
+    ORDER BY owner, username
+'''
+
+def take_snapshot(source_path, snapshot_path):
+    """Copy a live database to snapshot_path with the SQLite online backup API"""
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(snapshot_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+def _partition_value(value):
+    """Make an owner/month value safe to use as a directory name"""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', value or "unknown")
+
+def _write_table(table, path, file_format):
+    """Write an Arrow table as zstd-compressed Parquet or Arrow IPC"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if file_format == "arrow":
+        feather.write_feather(table, path, compression="zstd")
+    else:
+        pq.write_table(table, path, compression="zstd")
+
+def _iter_rows(cursor):
+    """Yield rows from a cursor fetchmany() batch at a time"""
+    while True:
+        rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+        if not rows:
+            return
+        yield from rows
+
+def _rows_to_table(rows, schema, offset):
+    """Build an Arrow table from row tuples, skipping the first `offset` partition columns"""
+    columns = list(zip(*(tuple(row)[offset:] for row in rows)))
+    arrays = [
+        pa.array([bool(value) if value is not None else None for value in column] if field.type == pa.bool_() else column, type=field.type)
+        for column, field in zip(columns, schema)
+    ]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def _export_incremental(conn, out_dir, table_name, watermark, run_id, file_format):
+    """Append rows newer than the watermark, one file per owner/month partition; returns (new watermark, rows)"""
+    schema, query = INCREMENTAL_TABLES[table_name]
+    extension = "arrow" if file_format == "arrow" else "parquet"
+
+    cursor = conn.execute(query, (watermark or "",))
+    exported = 0
+    for (owner, month), group in itertools.groupby(_iter_rows(cursor), key=lambda row: (row[0], row[1])):
+        rows = list(group)
+        table = _rows_to_table(rows, schema, offset=3)
+        path = os.path.join(
+            out_dir, table_name, f"owner={_partition_value(owner)}", f"month={_partition_value(month)}",
+            f"part-{run_id}.{extension}"
+        )
+        _write_table(table, path, file_format)
+
+        watermark = max(watermark or "", max(row["watermark"] for row in rows))
+        exported += len(rows)
+
+    return watermark, exported
+
+def _export_accounts(conn, out_dir, file_format):
+    """Rewrite the accounts partition of every owner (passwords are never exported)"""
+    extension = "arrow" if file_format == "arrow" else "parquet"
+    exported = 0
+    cursor = conn.execute(ACCOUNTS_QUERY)
+    for owner, group in itertools.groupby(_iter_rows(cursor), key=lambda row: row[0]):
+        rows = list(group)
+        table = _rows_to_table(rows, ACCOUNTS_SCHEMA, offset=1)
+        _write_table(table, os.path.join(out_dir, "accounts", f"owner={_partition_value(owner)}", f"accounts.{extension}"), file_format)
+        exported += len(rows)
+    return exported
+
+def _load_json(path, default):
+    """Load a JSON file, or return default if it does not exist"""
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _save_json(path, data):
+    """Atomically write a JSON file"""
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def _load_state(out_dir):
+    """Load the per-source high-water marks of previous runs"""
+    return _load_json(os.path.join(out_dir, STATE_FILE), {"sources": {}})
+
+def _save_state(out_dir, state):
+    """Atomically save the high-water marks"""
+    _save_json(os.path.join(out_dir, STATE_FILE), state)
+
+def _publish(out_dir, pending):
+    """Move a run's staged files into the export, then save its watermarks; safe to repeat after a crash"""
+    pending_path = os.path.join(out_dir, PENDING_FILE)
+    staging_dir = os.path.join(out_dir, pending["staging"])
+
+    if pending["full"]:
+        # A full export replaces the appended part files instead of duplicating them
+        for table_name in INCREMENTAL_TABLES:
+            shutil.rmtree(os.path.join(out_dir, table_name), ignore_errors=True)
+        # Never clear again on a repeat, it would delete files already moved
+        pending["full"] = False
+        _save_json(pending_path, pending)
+
+    for relative_path in pending["files"]:
+        staged_path = os.path.join(staging_dir, relative_path)
+        if os.path.exists(staged_path):
+            target_path = os.path.join(out_dir, relative_path)
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            os.replace(staged_path, target_path)
+
+    _save_state(out_dir, pending["state"])
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.remove(pending_path)
+
+def _recover(out_dir):
+    """Finish a publish interrupted by a crash and discard the staging directories of unpublished runs"""
+    pending = _load_json(os.path.join(out_dir, PENDING_FILE), None)
+    if pending:
+        print(f"⚠️ Finishing interrupted snapshot publish {pending['staging']}")
+        _publish(out_dir, pending)
+    for staging_dir in glob.glob(os.path.join(out_dir, STAGING_PREFIX + "*")):
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+def _staged_files(staging_dir):
+    """List the files written under a staging directory, relative to it"""
+    return sorted(
+        os.path.relpath(os.path.join(root, name), staging_dir)
+        for root, _, names in os.walk(staging_dir)
+        for name in names
+    )
+
+def get_source_databases():
+    """Get every database file to export: all shard files when sharding, otherwise DB_PATH"""
+    if database.is_sharding_enabled():
+        return sorted(glob.glob(os.path.join(database.SHARD_DIR, "owner_*.db")))
+    return [database.DB_PATH]
+
+def export_snapshot(out_dir, sources=None, file_format="parquet", full=False):
+    """Export a consistent snapshot of each source database, appending only new rows unless full=True"""
+    os.makedirs(out_dir, exist_ok=True)
+    _recover(out_dir)
+    state = {"sources": {}} if full else _load_state(out_dir)
+    # Time-ordered, so part files sort by run; unique even for runs in the same second
+    run_id = new_ulid()
+    staging_name = STAGING_PREFIX + run_id
+    staging_dir = os.path.join(out_dir, staging_name)
+    summary = {}
+
+    for source_path in sources or get_source_databases():
+        source_key = os.path.abspath(source_path)
+        marks = state["sources"].setdefault(source_key, {})
+
+        with tempfile.TemporaryDirectory() as workdir:
+            snapshot_path = os.path.join(workdir, "snapshot.db")
+            take_snapshot(source_path, snapshot_path)
+
+            conn = sqlite3.connect(snapshot_path)
+            conn.row_factory = sqlite3.Row
+            try:
+                counts = {"accounts": _export_accounts(conn, staging_dir, file_format)}
+                for table_name in INCREMENTAL_TABLES:
+                    marks[table_name], counts[table_name] = _export_incremental(
+                        conn, staging_dir, table_name, marks.get(table_name), run_id, file_format
+                    )
+            finally:
+                conn.close()
+
+        summary[source_path] = counts
+        print(f"✅ Exported {source_path}: {counts}")
+
+    # Only advance the watermarks once every source's files are written
+    pending = {"staging": staging_name, "full": full, "files": _staged_files(staging_dir), "state": state}
+    _save_json(os.path.join(out_dir, PENDING_FILE), pending)
+    _publish(out_dir, pending)
+
+    return summary
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export IUMS tables to partitioned Parquet/Arrow snapshots")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--source", action="append", help="Database file(s) to export (default: IUMS_DB_PATH or every shard)")
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--full", action="store_true", help="Ignore saved watermarks and export everything again")
+    args = parser.parse_args()
+
+    export_snapshot(args.out, args.source, args.format, args.full)